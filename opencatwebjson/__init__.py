@@ -0,0 +1,6 @@
+from .binary import from_bytes, to_bytes
+from .loader import iterevents, iterload, load, loads
+from .serializer import dump, dumps
+from .validator import validate
+
+__all__ = ["dump", "dumps", "from_bytes", "iterevents", "iterload", "load", "loads", "to_bytes", "validate"]
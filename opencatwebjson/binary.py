@@ -0,0 +1,260 @@
+from struct import Struct, error as StructError
+from typing import IO, Any, Dict, List, Tuple
+
+import orjson
+
+from .loader import JSONInput, decode_script
+from .script import Action, Event, Parameter, ScriptObject
+from .serializer import _default
+
+MAGIC = b"CWB\x02"
+"""Leading bytes of every binary document; the last byte is the format version."""
+
+# Tags. Strings, numeric strings and object shapes that fit are packed into the
+# tag byte itself, so most values of a script take a single byte.
+_NULL, _FALSE, _TRUE, _INT, _FLOAT, _STR, _NUMSTR, _LIST, _SHAPE = range(9)
+_SMALL_SHAPE = 0x10  # 0x10-0x3f: object with shape index < 48
+_SMALL_STR = 0x40  # 0x40-0x7f: string table index < 64
+_SMALL_NUMSTR = 0x80  # 0x80-0xff: string-encoded integer 0-127, e.g. an action id
+
+_DOUBLE = Struct("<d")
+_SCRIPT_CLASSES = (ScriptObject, Event, Action, Parameter)
+
+
+def _numstr(s: str) -> bool:
+    # True for strings that are exactly str(int(s)), such as "4703", "-2" or "112".
+    if not s.isascii() or len(s) > 18:
+        return False
+    digits = s[1:] if s[:1] == "-" else s
+    return digits.isdigit() and (digits == "0" or digits[0] != "0") and s != "-0"
+
+
+def _varint(out: bytearray, n: int):
+    while n > 0x7F:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+class _Encoder:
+    def __init__(self):
+        self.body = bytearray()
+        self.strings: Dict[str, int] = {}
+        self.shapes: Dict[Tuple[str, ...], int] = {}
+
+    def string(self, s: str) -> int:
+        index = self.strings.get(s)
+        if index is None:
+            index = self.strings[s] = len(self.strings)
+        return index
+
+    def value(self, v: Any):
+        out = self.body
+        cls = v.__class__
+        if cls is str:
+            if _numstr(v):
+                n = int(v)
+                if 0 <= n < 0x80:
+                    out.append(_SMALL_NUMSTR | n)
+                else:
+                    out.append(_NUMSTR)
+                    _varint(out, n << 1 if n >= 0 else (-n << 1) - 1)
+                return
+            index = self.string(v)
+            if index < 0x40:
+                out.append(_SMALL_STR | index)
+            else:
+                out.append(_STR)
+                _varint(out, index)
+        elif cls is dict or cls in _SCRIPT_CLASSES:
+            d = v if cls is dict else v.__dict__
+            keys = tuple(d)
+            shape = self.shapes.get(keys)
+            if shape is None:
+                shape = self.shapes[keys] = len(self.shapes)
+                for key in keys:
+                    self.string(key)
+            if shape < 0x30:
+                out.append(_SMALL_SHAPE + shape)
+            else:
+                out.append(_SHAPE)
+                _varint(out, shape)
+            for item in d.values():
+                self.value(item)
+        elif cls is list or cls is tuple:
+            out.append(_LIST)
+            _varint(out, len(v))
+            for item in v:
+                self.value(item)
+        elif cls is bool:
+            out.append(_TRUE if v else _FALSE)
+        elif cls is int:
+            out.append(_INT)
+            _varint(out, v << 1 if v >= 0 else (-v << 1) - 1)
+        elif cls is float:
+            out.append(_FLOAT)
+            out += _DOUBLE.pack(v)
+        elif v is None:
+            out.append(_NULL)
+        elif hasattr(v, "__dataclass_fields__"):
+            # Elements: reuse the JSON representation so both formats agree.
+            self.value(orjson.loads(orjson.dumps(v, default=_default)))
+        else:
+            self.value(_default(v))
+
+    def finish(self) -> bytes:
+        head = bytearray(MAGIC)
+        _varint(head, len(self.strings))
+        for s in self.strings:
+            raw = s.encode("utf-8", "surrogatepass")
+            _varint(head, len(raw))
+            head += raw
+        _varint(head, len(self.shapes))
+        strings = self.strings
+        for keys in self.shapes:
+            _varint(head, len(keys))
+            for key in keys:
+                _varint(head, strings[key])
+        return bytes(head + self.body)
+
+
+def to_bytes(obj: Any) -> bytes:
+    """
+    Serialize scripts or elements to the compact binary format.
+
+    The output holds the same JSON value that dumps would write. Strings
+    are stored once in a string table, and the key sequence of every
+    distinct object layout once in a shape table, so repeated keys such as
+    "value", "t" and "l" cost nothing per object. Integers are varints, and
+    string-encoded integers such as coordinates and action ids are stored
+    as numbers but still decode to strings; ids up to 127 take one byte.
+
+    Args:
+        obj (Any): A list of ScriptObject, decoded JSON, or anything else accepted by dumps.
+
+    Returns:
+        bytes: The encoded document, starting with MAGIC.
+
+    Raises:
+        TypeError: If obj contains a value that cannot be serialized.
+    """
+    encoder = _Encoder()
+    encoder.value(obj)
+    return encoder.finish()
+
+
+def _decode(data: JSONInput) -> Any:
+    if isinstance(data, str):
+        raise TypeError("Binary documents must be bytes-like")
+    view = memoryview(data)
+    if view[:4] != MAGIC:
+        raise ValueError("Not a binary CatWeb document")
+    buf = bytes(view)
+    try:
+        return _decode_body(buf)
+    except (IndexError, StructError):
+        raise ValueError("Unexpected end of binary data") from None
+
+
+def _decode_body(buf: bytes) -> Any:
+    pos = len(MAGIC)
+
+    def varint() -> int:
+        nonlocal pos
+        n = shift = 0
+        while True:
+            b = buf[pos]
+            pos += 1
+            n |= (b & 0x7F) << shift
+            if b < 0x80:
+                return n
+            shift += 7
+
+    strings: List[str] = []
+    for _ in range(varint()):
+        length = varint()
+        strings.append(buf[pos:pos + length].decode("utf-8", "surrogatepass"))
+        pos += length
+    shapes: List[Tuple[str, ...]] = []
+    for _ in range(varint()):
+        shapes.append(tuple(strings[varint()] for _ in range(varint())))
+    numstrs = [str(n) for n in range(0x80)]
+    unpack = _DOUBLE.unpack_from
+
+    def value() -> Any:
+        nonlocal pos
+        tag = buf[pos]
+        pos += 1
+        if tag >= _SMALL_NUMSTR:
+            return numstrs[tag - _SMALL_NUMSTR]
+        if tag >= _SMALL_STR:
+            return strings[tag - _SMALL_STR]
+        if tag >= _SMALL_SHAPE or tag == _SHAPE:
+            keys = shapes[tag - _SMALL_SHAPE if tag >= _SMALL_SHAPE else varint()]
+            return {key: value() for key in keys}
+        if tag == _LIST:
+            return [value() for _ in range(varint())]
+        if tag == _STR:
+            return strings[varint()]
+        if tag == _NUMSTR or tag == _INT:
+            n = varint()
+            n = n >> 1 if not n & 1 else -((n + 1) >> 1)
+            return str(n) if tag == _NUMSTR else n
+        if tag == _FLOAT:
+            pos += 8
+            return unpack(buf, pos - 8)[0]
+        if tag <= _TRUE:
+            return (None, False, True)[tag]
+        raise ValueError(f"Unknown tag {tag} at offset {pos - 1}")
+
+    root = value()
+    if pos != len(buf):
+        raise ValueError("Trailing data after binary document")
+    return root
+
+
+def from_bytes(data: JSONInput, raw: bool = False) -> Any:
+    """
+    Parse a binary document written by to_bytes.
+
+    Args:
+        data (JSONInput): bytes, bytearray or memoryview.
+        raw (bool): Return the plain decoded value, e.g. for element trees, instead of typed scripts.
+
+    Returns:
+        Any: List[ScriptObject] like loads, or the decoded JSON value if raw is set.
+
+    Raises:
+        ValueError: If the data is not a valid binary document, or the root is not an array when raw is not set.
+    """
+    root = _decode(data)
+    if raw:
+        return root
+    if root.__class__ is not list:
+        raise ValueError("Root must be an array")
+    return [decode_script(s) for s in root]
+
+
+def load_bytes(fp: IO[bytes], raw: bool = False) -> Any:
+    """
+    Parse a binary document from a binary file object.
+
+    Args:
+        fp (IO[bytes]): Binary file object.
+        raw (bool): See from_bytes.
+
+    Returns:
+        Any: See from_bytes.
+    """
+    return from_bytes(fp.read(), raw)
+
+
+def dump_bytes(obj: Any, fp: IO[bytes]) -> None:
+    """
+    Serialize to the binary format and write to a binary file object.
+
+    Args:
+        obj (Any): Object accepted by to_bytes.
+        fp (IO[bytes]): Binary file object.
+    """
+    fp.write(to_bytes(obj))
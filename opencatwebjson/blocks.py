@@ -0,0 +1,120 @@
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List
+
+from .ids import BLOCK_OPENERS, CONDITIONALS, ELSE, END
+from .validator import Location, Violation, format_path
+
+# Block tables store IDs as C ints.
+_MAX_ID = 2 ** 31 - 1
+
+
+def action_id(action: Any) -> int:
+    """
+    Get the numeric ID of an action dictionary or Action object.
+
+    Args:
+        action (Any): Decoded action dictionary or Action.
+
+    Returns:
+        int: The action ID, or -1 if it is missing, not numeric or out of range.
+    """
+    aid = action.get("id") if isinstance(action, dict) else getattr(action, "id", None)
+    try:
+        aid = int(aid)
+    except (TypeError, ValueError, OverflowError):
+        return -1
+    return aid if -_MAX_ID <= aid <= _MAX_ID else -1
+
+
+@dataclass
+class BlockTable:
+    """
+    Jump tables for the blocks in one event's action list.
+
+    All arrays have one entry per action and hold -1 where not applicable.
+
+    Attributes:
+        ids (array): Numeric action IDs.
+        else_of (array): For a conditional opener, the index of its else.
+        end_of (array): For an opener or else, the index of the matching end.
+        opener_of (array): For an else or end, the index of the opener it belongs to.
+        depth (array): Block nesting depth of each action; openers, else and end sit at the outer depth.
+        errors (List[Violation]): Unbalanced or misplaced block actions.
+    """
+    ids: array
+    else_of: array
+    end_of: array
+    opener_of: array
+    depth: array
+    errors: List[Violation] = field(default_factory=list)
+
+    @property
+    def balanced(self) -> bool:
+        """True if every block is properly closed."""
+        return not self.errors
+
+    def body(self, index: int) -> range:
+        """
+        Get the indices of the actions inside a block.
+
+        Args:
+            index (int): Index of the opener.
+
+        Returns:
+            range: Indices between the opener and its end, including any else.
+        """
+        end = self.end_of[index]
+        return range(index + 1, end if end != -1 else len(self.ids))
+
+
+def match_blocks(actions: Iterable[Any], loc: Location = ()) -> BlockTable:
+    """
+    Match block openers with their else and end actions in one pass.
+
+    Args:
+        actions (Iterable[Any]): Action dictionaries or Action objects of one event.
+        loc (Location): Script and event index used for error paths.
+
+    Returns:
+        BlockTable: The jump tables and any block structure errors.
+    """
+    ids = array("i", [action_id(a) for a in actions])
+    n = len(ids)
+    else_of = array("i", [-1]) * n
+    end_of = array("i", [-1]) * n
+    opener_of = array("i", [-1]) * n
+    depth = array("i", [0]) * n
+    errors: List[Violation] = []
+    stack: List[int] = []
+    for i, aid in enumerate(ids):
+        depth[i] = len(stack)
+        if aid in BLOCK_OPENERS:
+            stack.append(i)
+        elif aid == ELSE:
+            if not stack:
+                errors.append(Violation(format_path(loc + (i,)), "else without a matching block"))
+                continue
+            depth[i] -= 1
+            o = stack[-1]
+            if ids[o] not in CONDITIONALS:
+                errors.append(Violation(format_path(loc + (i,)), f"else inside a non-conditional block (action ID {ids[o]})"))
+            elif else_of[o] != -1:
+                errors.append(Violation(format_path(loc + (i,)), "Block already has an else"))
+            else:
+                else_of[o] = i
+                opener_of[i] = o
+        elif aid == END:
+            if not stack:
+                errors.append(Violation(format_path(loc + (i,)), "end without a matching block"))
+                continue
+            depth[i] -= 1
+            o = stack.pop()
+            end_of[o] = i
+            opener_of[i] = o
+            e = else_of[o]
+            if e != -1:
+                end_of[e] = i
+    for o in stack:
+        errors.append(Violation(format_path(loc + (o,)), f"Block opened by action ID {ids[o]} is never closed"))
+    return BlockTable(ids, else_of, end_of, opener_of, depth, errors)
@@ -0,0 +1,242 @@
+import mmap
+import re
+from array import array
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import orjson
+
+from .loader import _TOKEN, decode_script
+from .script import ScriptObject
+
+# A "]" that is followed by another site or the end of the file.
+_SITE_END = re.compile(rb"\](?=\s*(?:\[|\Z))")
+_SPACE = re.compile(rb"\s*")
+
+
+class ScriptEntry(NamedTuple):
+    """Location of one script in a bundle."""
+    site: int
+    start: int
+    length: int
+    globalid: Optional[str]
+
+
+class Bundle:
+    """
+    Random access to the sites of a bundle of concatenated CatWeb JSON documents.
+
+    The file is memory-mapped, and one pass over it records the byte range
+    of every site (root array) and of every script in it, along with the
+    script's globalid. Site ends are found with a regular expression and
+    confirmed by parsing the site with orjson; script offsets follow from
+    the lengths orjson writes for compact sites, and other sites are
+    scanned token by token. Entries are decoded with orjson straight from
+    memoryview slices of the map, so the file is never read into Python
+    memory as a whole, and at most one site is decoded at a time while
+    indexing.
+
+    Sites may be separated by any whitespace, e.g. one per line.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): Bundle file.
+
+        Raises:
+            ValueError: If the bundle is not a sequence of JSON arrays of objects.
+        """
+        self.path = path
+        with open(path, "rb") as fp:
+            try:
+                self._map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped.
+                self._map = None
+        self._view = memoryview(self._map) if self._map is not None else memoryview(b"")
+        self.site_starts = array("q")
+        self.site_lengths = array("q")
+        self.script_sites = array("q")
+        self.script_starts = array("q")
+        self.script_lengths = array("q")
+        self.globalids: List[Optional[str]] = []
+        self.first_script = array("q")
+        self._by_globalid: Dict[str, List[int]] = {}
+        if self._map is not None:
+            self._scan()
+        # Sentinel, so scripts_of works for the last site.
+        self.first_script.append(len(self.globalids))
+
+    def _scan(self):
+        buf, view = self._map, self._view
+        size = len(buf)
+        pos = _SPACE.match(buf).end()
+        while pos < size:
+            if buf[pos] != 0x5B:
+                raise ValueError(f"Expected a site array at offset {pos}")
+            # A site can only end at a "]" followed by the next site or the end
+            # of the file; candidates inside strings fail to parse and are skipped.
+            site = None
+            for m in _SITE_END.finditer(buf, pos):
+                end = m.end()
+                try:
+                    site = orjson.loads(view[pos:end])
+                    break
+                except orjson.JSONDecodeError as e:
+                    if e.pos < end - pos:
+                        raise self._invalid(pos, e) from None
+            if site is None:
+                # No "]" ends a valid site; parsing the rest locates the actual error.
+                try:
+                    orjson.loads(view[pos:])
+                except orjson.JSONDecodeError as e:
+                    raise self._invalid(pos, e) from None
+                raise ValueError(f"Invalid site at offset {pos}")
+            self._add_site(pos, end, site)
+            pos = _SPACE.match(buf, end).end()
+
+    def _invalid(self, pos: int, e: orjson.JSONDecodeError) -> ValueError:
+        # orjson reports a complete site followed by something other than a site
+        # at the end of the site; point at what follows it instead.
+        end = pos + e.pos
+        try:
+            orjson.loads(self._view[pos:end])
+        except orjson.JSONDecodeError:
+            return ValueError(f"Invalid JSON at offset {end}: {e.msg}")
+        return ValueError(f"Expected a site array at offset {_SPACE.match(self._map, end).end()}")
+
+    def _add_site(self, start: int, end: int, site: list):
+        site_number = len(self.site_starts)
+        self.site_starts.append(start)
+        self.site_lengths.append(end - start)
+        self.first_script.append(len(self.globalids))
+        for script in site:
+            if script.__class__ is not dict:
+                raise ValueError(f"Expected a script object in the site at offset {start}")
+        # Compact exports are exactly what orjson writes, so script offsets follow
+        # from the re-serialized lengths; anything else is scanned token by token.
+        parts = [orjson.dumps(script) for script in site]
+        if self._view[start:end] == b"[" + b",".join(parts) + b"]":
+            offset = start + 1
+            ranges = []
+            for part in parts:
+                ranges.append((offset, len(part)))
+                offset += len(part) + 1
+        else:
+            ranges = self._script_ranges(start, end)
+        by_globalid = self._by_globalid
+        for script, (offset, length) in zip(site, ranges):
+            globalid = script.get("globalid")
+            if globalid.__class__ is not str:
+                globalid = None
+            else:
+                by_globalid.setdefault(globalid, []).append(len(self.globalids))
+            self.script_sites.append(site_number)
+            self.script_starts.append(offset)
+            self.script_lengths.append(length)
+            self.globalids.append(globalid)
+
+    def _script_ranges(self, start: int, end: int) -> List[Tuple[int, int]]:
+        # Byte ranges of the scripts of one valid site, by tracking bracket depth.
+        buf = self._map
+        ranges = []
+        depth = 0
+        script_start = start
+        for m in _TOKEN.finditer(buf, start, end):
+            c = buf[m.start()]
+            if c == 0x5B or c == 0x7B:
+                if depth == 1:
+                    script_start = m.start()
+                depth += 1
+            elif c == 0x5D or c == 0x7D:
+                depth -= 1
+                if depth == 1:
+                    ranges.append((script_start, m.end() - script_start))
+        return ranges
+
+    def close(self):
+        """
+        Release the memory map.
+
+        Decoded sites and scripts stay valid, but slices returned by raw_site
+        and raw_script must be released first.
+
+        Raises:
+            BufferError: If such a slice is still alive.
+        """
+        self._view.release()
+        if self._map is not None:
+            self._map.close()
+
+    def __enter__(self) -> "Bundle":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.site_starts)
+
+    def raw_site(self, index: int) -> memoryview:
+        """Get the JSON bytes of one site as a slice of the map, without copying."""
+        start = self.site_starts[index]
+        return self._view[start:start + self.site_lengths[index]]
+
+    def raw_script(self, index: int) -> memoryview:
+        """Get the JSON bytes of one script as a slice of the map, without copying."""
+        start = self.script_starts[index]
+        return self._view[start:start + self.script_lengths[index]]
+
+    def site(self, index: int) -> List[ScriptObject]:
+        """
+        Decode one site.
+
+        Args:
+            index (int): Site number in file order.
+
+        Returns:
+            List[ScriptObject]: The site's scripts.
+        """
+        return [decode_script(s) for s in orjson.loads(self.raw_site(index))]
+
+    def site_data(self, index: int) -> Any:
+        """Decode one site into plain dictionaries and lists."""
+        return orjson.loads(self.raw_site(index))
+
+    def sites(self) -> Iterator[List[ScriptObject]]:
+        """Decode every site in file order, one at a time."""
+        for i in range(len(self)):
+            yield self.site(i)
+
+    def script(self, index: int) -> ScriptObject:
+        """
+        Decode one script.
+
+        Args:
+            index (int): Script number across the whole bundle.
+
+        Returns:
+            ScriptObject: The script.
+        """
+        return decode_script(orjson.loads(self.raw_script(index)))
+
+    def entry(self, index: int) -> ScriptEntry:
+        """Get the site, byte range and globalid of a script."""
+        return ScriptEntry(self.script_sites[index], self.script_starts[index],
+                           self.script_lengths[index], self.globalids[index])
+
+    def scripts_of(self, site: int) -> range:
+        """Get the script numbers of one site."""
+        return range(self.first_script[site], self.first_script[site + 1])
+
+    def find(self, globalid: str) -> List[int]:
+        """
+        Find scripts by globalid.
+
+        Args:
+            globalid (str): Script globalid.
+
+        Returns:
+            List[int]: Script numbers, in file order; copied templates can share a globalid across sites.
+        """
+        return list(self._by_globalid.get(globalid, ()))
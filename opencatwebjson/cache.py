@@ -0,0 +1,257 @@
+import os
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from dataclasses import FrozenInstanceError
+from hashlib import blake2b
+from typing import IO, Any, List, Optional, Tuple
+
+import orjson
+
+from .binary import from_bytes, to_bytes
+from .loader import JSONInput, _new, _restore, _variant, decode_script
+from .script import Action, Event, Parameter, ScriptObject
+
+_READ_ONLY = "Cached scripts are read-only; edit a copy made with copy.deepcopy"
+
+
+class _ReadOnlyDict(dict):
+    # Instance dictionary of a frozen object; the package edits objects through it.
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(_READ_ONLY)
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    setdefault = update = pop = popitem = clear = _read_only
+
+
+def _read_only_attribute(self, *args):
+    raise FrozenInstanceError(_READ_ONLY)
+
+
+def _thawed(cls: type):
+    # copy.copy, copy.deepcopy and pickle of a frozen object give an editable object of cls.
+    def __copy__(self):
+        obj = _new(cls)
+        obj.__dict__ = dict(self.__dict__)
+        return obj
+
+    def __deepcopy__(self, memo):
+        obj = _new(cls)
+        obj.__dict__ = {key: deepcopy(value, memo) for key, value in self.__dict__.items()}
+        return obj
+
+    def __reduce__(self):
+        return _restore, (cls, dict(self.__dict__))
+
+    return {
+        "__setattr__": _read_only_attribute,
+        "__delattr__": _read_only_attribute,
+        "__copy__": __copy__,
+        "__deepcopy__": __deepcopy__,
+        "__reduce__": __reduce__,
+    }
+
+
+_FROZEN = {cls: _variant(cls, _thawed(cls)) for cls in (ScriptObject, Event, Action, Parameter)}
+
+
+def _freeze(value: Any) -> Any:
+    # Turn a decoded script into read-only objects of the same classes, in place.
+    cls = value.__class__
+    if cls is list:
+        for item in value:
+            _freeze(item)
+    elif cls in _FROZEN:
+        d = value.__dict__
+        for item in d.values():
+            _freeze(item)
+        value.__dict__ = _ReadOnlyDict(d)
+        value.__class__ = _FROZEN[cls]
+    return value
+
+
+def script_key(raw: bytes) -> bytes:
+    """
+    Hash the compact JSON of one script.
+
+    Args:
+        raw (bytes): The script serialized by orjson without indentation.
+
+    Returns:
+        bytes: 16-byte BLAKE2b digest.
+    """
+    return blake2b(raw, digest_size=16).digest()
+
+
+class ParseCache:
+    """
+    Parsed scripts keyed by a hash of their JSON bytes.
+
+    Documents are decoded with orjson, and each root-level script is then
+    looked up by a hash of its compact JSON, so sites built from the same
+    template share the typed objects of every script they have in common
+    and only new scripts are typed. Whitespace in the source does not
+    affect the key. Entries are evicted least recently used first once the
+    compact size of all cached scripts exceeds max_bytes.
+
+    Cached scripts are shared between every caller that loads the same
+    bytes, so they are frozen: they are instances of the usual classes
+    that serialize and compare like them, but assigning an attribute or
+    a key of their instance dictionaries raises, and so do the editing
+    functions of this package (optimize, apply_patch, assign, ...). Lists
+    inside them stay plain lists for speed and must not be modified. To
+    edit a script, make a private copy first with copy.deepcopy, which
+    returns ordinary objects; pickled scripts also unpickle as ordinary
+    objects.
+
+    With a directory, every parsed script is also written there in the
+    binary format (see binary.to_bytes), and misses check the directory
+    before parsing, so the cache survives restarts and can be shared by
+    several processes. Files are never removed by eviction.
+
+    All methods may be called from several threads.
+    """
+
+    SUFFIX = ".cwb"
+    """File name suffix of persisted scripts."""
+
+    def __init__(self, max_bytes: int = 64 << 20, directory: Optional[str] = None):
+        """
+        Args:
+            max_bytes (int): Upper bound for the summed compact JSON size of cached scripts.
+            directory (str | None): Directory for persisted scripts; created if missing.
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self._entries: "OrderedDict[bytes, Tuple[ScriptObject, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._entries
+
+    def _path(self, key: bytes) -> str:
+        return os.path.join(self.directory, key.hex() + self.SUFFIX)
+
+    def _read(self, key: bytes) -> Optional[ScriptObject]:
+        try:
+            with open(self._path(key), "rb") as fp:
+                data = fp.read()
+            return _freeze(decode_script(from_bytes(data, raw=True)))
+        except (OSError, ValueError):
+            # Missing or damaged file; it is rewritten after parsing.
+            return None
+
+    def _write(self, key: bytes, script: ScriptObject):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as fp:
+                fp.write(to_bytes(script))
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def get(self, raw: JSONInput) -> ScriptObject:
+        """
+        Get the parsed form of one script.
+
+        Args:
+            raw (JSONInput): JSON of a single script object.
+
+        Returns:
+            ScriptObject: The shared, frozen script.
+
+        Raises:
+            ValueError: If raw is not a valid script object.
+        """
+        return self._adopt(orjson.loads(raw))
+
+    def _adopt(self, d: dict) -> ScriptObject:
+        # Look up a freshly decoded script dictionary, typing it on a miss.
+        if d.__class__ is not dict:
+            raise ValueError("Script must be an object")
+        raw = orjson.dumps(d)
+        key = script_key(raw)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        script = self._read(key) if self.directory is not None else None
+        if script is None:
+            script = decode_script(d)
+            if self.directory is not None:
+                self._write(key, script)
+            _freeze(script)
+        else:
+            with self._lock:
+                self.disk_hits += 1
+        return self._store(key, script, len(raw))
+
+    def _store(self, key: bytes, script: ScriptObject, size: int) -> ScriptObject:
+        with self._lock:
+            entries = self._entries
+            entry = entries.get(key)
+            if entry is not None:
+                # Another thread parsed the same script meanwhile; share its copy.
+                entries.move_to_end(key)
+                return entry[0]
+            entries[key] = (script, size)
+            self.size += size
+            while self.size > self.max_bytes and len(entries) > 1:
+                _, (_, evicted) = entries.popitem(last=False)
+                self.size -= evicted
+            return script
+
+    def loads(self, data: JSONInput) -> List[ScriptObject]:
+        """
+        Parse CatWeb script JSON through the cache.
+
+        Args:
+            data (JSONInput): JSON document whose root is an array of scripts.
+
+        Returns:
+            List[ScriptObject]: A new list of the shared, frozen scripts.
+
+        Raises:
+            ValueError: If the JSON is malformed or the root is not an array.
+        """
+        root = orjson.loads(data)
+        if root.__class__ is not list:
+            raise ValueError("Root must be an array")
+        return [self._adopt(s) for s in root]
+
+    def load(self, fp: IO) -> List[ScriptObject]:
+        """
+        Parse CatWeb script JSON from a file object through the cache.
+
+        Args:
+            fp (IO): Binary or text file object.
+
+        Returns:
+            List[ScriptObject]: A new list of the shared, frozen scripts.
+        """
+        return self.loads(fp.read())
+
+    def clear(self):
+        """Drop every cached script from memory and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+            self.hits = self.misses = self.disk_hits = 0
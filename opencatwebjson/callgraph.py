@@ -0,0 +1,420 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .blocks import action_id, match_blocks
+from .compiler import CONST, compile_operand
+from .globalids import GlobalIdAllocator
+from .ids import BREAK, END, FUNCTION_EVENT, LOOPS, MAX_ACTIONS, RETURN
+from .optimizer import SET, _params, _rebuild
+from .runtime import MATH_FUNCTIONS, RUN_FUNCTION, RUN_IN_BACKGROUND, RUN_MATH_FUNCTION, _event_target
+from .scopes import _ITERATE, _VARIABLE_LABELS, _scan_action, _variable_name
+from .validator import Violation, _as_dict, format_path
+
+_LOCAL_REF = re.compile(r"\{l!([^{}]+)\}")
+
+
+class CallSite(NamedTuple):
+    """One Run function or Run function in background action."""
+    script: int
+    event: int
+    action: int
+    caller: Optional[str]
+    """Name of the function the action is in, or None for other events."""
+    callee: Optional[str]
+    """Name of the called function, or None if it is computed at run time."""
+    arguments: int
+    background: bool
+
+
+@dataclass
+class CallGraph:
+    """
+    Calls between the functions of a document.
+
+    Attributes:
+        functions (Dict[str, Tuple[int, int]]): Script and event index of each function's definition; the runtime uses the first one.
+        calls (List[CallSite]): Every call in document order.
+        edges (Dict[str, Set[str]]): Functions each function calls directly.
+        recursive (Set[str]): Functions that can call themselves, directly or through others.
+        unused (List[str]): Functions no event can reach; empty if any call is computed at run time.
+        violations (List[Violation]): Duplicate and unknown functions, argument count mismatches, recursion and unused functions.
+    """
+    functions: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    calls: List[CallSite] = field(default_factory=list)
+    edges: Dict[str, Set[str]] = field(default_factory=dict)
+    recursive: Set[str] = field(default_factory=set)
+    unused: List[str] = field(default_factory=list)
+    violations: List[Violation] = field(default_factory=list)
+
+    def callers(self, name: str) -> Set[str]:
+        """Get the functions that call a function directly."""
+        return {caller for caller, callees in self.edges.items() if name in callees}
+
+
+def _events(scripts: Iterable[Any]) -> Iterable[Tuple[int, int, dict]]:
+    for si, script in enumerate(scripts):
+        for ei, event in enumerate((_as_dict(script) or {}).get("content") or ()):
+            ed = _as_dict(event)
+            if ed is not None:
+                yield si, ei, ed
+
+
+def _overrides(event: dict) -> List[Any]:
+    return [_as_dict(p).get("value") for p in event.get("variable_overrides") or ()]
+
+
+def _arguments(params: List[Any]) -> Optional[List[Any]]:
+    # The argument tuple of a call, as the runtime picks it: the first tuple after the name.
+    for p in params[1:]:
+        d = _as_dict(p)
+        if d is not None and d.get("value").__class__ is list:
+            return d["value"]
+    return None
+
+
+def _recursive(edges: Dict[str, Set[str]]) -> Set[str]:
+    # Tarjan's strongly connected components, without recursion.
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    found: Set[str] = set()
+    for root in edges:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(sorted(edges[root])))]
+        while work:
+            node, pending = work[-1]
+            for callee in pending:
+                if callee not in index:
+                    index[callee] = low[callee] = len(index)
+                    stack.append(callee)
+                    on_stack.add(callee)
+                    work.append((callee, iter(sorted(edges[callee]))))
+                    break
+                if callee in on_stack:
+                    low[node] = min(low[node], index[callee])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in edges[node]:
+                        found.update(component)
+    return found
+
+
+def call_graph(scripts: Iterable[Any]) -> CallGraph:
+    """
+    Build the call graph of a document.
+
+    Functions are Define function events (ID: 6), named by their function
+    parameter; calls are Run function (ID: 87) and Run function in
+    background (ID: 63) actions with a literal name. Run math function
+    (ID: 114) only reaches built-in functions, so it is checked against
+    those and not added to the graph.
+
+    Args:
+        scripts (Iterable[Any]): ScriptObject instances or decoded script dictionaries.
+
+    Returns:
+        CallGraph: The graph and its findings.
+    """
+    graph = CallGraph()
+    violations = graph.violations
+    events = list(_events(scripts))
+    arity: Dict[str, int] = {}
+    for si, ei, ed in events:
+        if action_id(ed) != FUNCTION_EVENT:
+            continue
+        name = _event_target(ed)
+        if name.__class__ is not str:
+            continue
+        if name in graph.functions:
+            violations.append(Violation(format_path((si, ei)), f"Function {name!r} is already defined; the first definition is used"))
+            continue
+        graph.functions[name] = (si, ei)
+        graph.edges[name] = set()
+        arity[name] = len(_overrides(ed))
+
+    dynamic = False
+    roots: Set[str] = set()
+    for si, ei, ed in events:
+        caller = _event_target(ed) if action_id(ed) == FUNCTION_EVENT else None
+        if caller is not None and graph.functions.get(caller) != (si, ei):
+            # Duplicate definitions never run.
+            continue
+        for ai, action in enumerate(ed.get("actions") or ()):
+            aid = action_id(action)
+            if aid != RUN_FUNCTION and aid != RUN_IN_BACKGROUND and aid != RUN_MATH_FUNCTION:
+                continue
+            params = _params(_as_dict(action))
+            name = compile_operand(params[0]) if params else None
+            callee = name.data if name is not None and name.kind == CONST and name.data.__class__ is str else None
+            path = format_path((si, ei, ai))
+            if aid == RUN_MATH_FUNCTION:
+                if callee is not None and callee not in MATH_FUNCTIONS:
+                    violations.append(Violation(path, f"Unknown math function {callee!r}"))
+                continue
+            arguments = len(_arguments(params) or ())
+            graph.calls.append(CallSite(si, ei, ai, caller, callee, arguments, aid == RUN_IN_BACKGROUND))
+            if callee is None:
+                dynamic = True
+            elif callee not in graph.functions:
+                violations.append(Violation(path, f"Unknown function {callee!r}"))
+            else:
+                (graph.edges[caller] if caller is not None else roots).add(callee)
+                if arguments != arity[callee]:
+                    violations.append(Violation(path, f"Function {callee!r} takes {arity[callee]} arguments, got {arguments}"))
+
+    graph.recursive = _recursive(graph.edges)
+    for name, loc in graph.functions.items():
+        if name in graph.recursive:
+            violations.append(Violation(format_path(loc), f"Function {name!r} is recursive"))
+    if not dynamic:
+        reached = set(roots)
+        pending = list(roots)
+        while pending:
+            for callee in graph.edges[pending.pop()]:
+                if callee not in reached:
+                    reached.add(callee)
+                    pending.append(callee)
+        graph.unused = [name for name in graph.functions if name not in reached]
+        for name in graph.unused:
+            violations.append(Violation(format_path(graph.functions[name]), f"Function {name!r} is never called"))
+    return graph
+
+
+class _Inlinable(NamedTuple):
+    script: int
+    body: List[dict]
+    parameters: List[str]
+    constant_safe: Set[str]
+    returns: bool
+    object_variables: bool
+
+
+def _prepare(script: int, event: dict, max_actions: int) -> Optional[_Inlinable]:
+    # Check that a function body keeps its meaning when pasted into a caller.
+    body = [_as_dict(a) for a in event.get("actions") or ()]
+    table = match_blocks(body)
+    returns = bool(body) and table.ids[-1] == RETURN
+    if table.errors or len(body) - returns > max_actions:
+        return None
+    parameters = [p for p in _overrides(event) if p.__class__ is str]
+    defined = {"l!" + p for p in parameters}
+    by_name: Set[str] = set()
+    object_variables = False
+    loops = 0
+    for pc, (action, op) in enumerate(zip(body, table.ids)):
+        if op == _ITERATE:
+            # Its l!index and l!value would overwrite the caller's.
+            return None
+        if op == RETURN and pc != len(body) - 1:
+            return None
+        if op in LOOPS:
+            loops += 1
+        elif op == END and table.opener_of[pc] != -1 and table.ids[table.opener_of[pc]] in LOOPS:
+            loops -= 1
+        elif op == BREAK and not loops:
+            # Would leave the caller's loop instead of the function.
+            return None
+        reads: List[str] = []
+        writes: List[str] = []
+        _scan_action(action, op, reads, writes)
+        for name in reads:
+            if name.startswith("l!") and name not in defined:
+                # A local read before it is set is nil in every call, but not in a loop of the caller.
+                return None
+        for name in writes:
+            if name.startswith("l!") and table.depth[pc] == 0:
+                defined.add(name)
+        object_variables = object_variables or any(n.startswith("o!") for n in reads + writes)
+        for p in _params(action):
+            d = _as_dict(p)
+            if d.get("l") in _VARIABLE_LABELS and d.get("value").__class__ is str:
+                by_name.add(_variable_name(d["value"]))
+    constant_safe = set()
+    for p in parameters:
+        if "l!" + p in by_name:
+            continue
+        ref = "{l!" + p + "}"
+        if all(f"{{{ref}" not in s and f"{ref}}}" not in s for s in _strings(body)):
+            constant_safe.add(p)
+    return _Inlinable(script, body, parameters, constant_safe, returns, object_variables)
+
+
+def _strings(actions: List[dict]) -> Iterable[str]:
+    def values(p: Any):
+        value = _as_dict(p).get("value")
+        if value.__class__ is str:
+            yield value
+        elif value.__class__ is list:
+            for item in value:
+                yield from values(item)
+    for action in actions:
+        for p in _params(action):
+            yield from values(p)
+
+
+def _locals(actions: Iterable[Any]) -> Set[str]:
+    # Every local variable name an event mentions, without the "l!" prefix.
+    names = set()
+    for s in _strings([_as_dict(a) for a in actions]):
+        names.update(_LOCAL_REF.findall(s))
+        if s.startswith("l!"):
+            names.add(s[2:])
+    return names
+
+
+def _renamed(p: Any, names: Dict[str, str], constants: Dict[str, str]) -> dict:
+    d = dict(_as_dict(p))
+    value = d.get("value")
+    if value.__class__ is list:
+        d["value"] = [_renamed(item, names, constants) for item in value]
+    elif value.__class__ is str and "l!" in value:
+        if d.get("l") in _VARIABLE_LABELS:
+            name = _variable_name(value)
+            if name.startswith("l!") and name[2:] in names:
+                d["value"] = value.replace(name, "l!" + names[name[2:]], 1)
+            return d
+
+        def local(m: "re.Match") -> str:
+            name = m.group(1)
+            if name in constants:
+                return constants[name]
+            return "{l!" + names[name] + "}" if name in names else m.group(0)
+
+        d["value"] = _LOCAL_REF.sub(local, value)
+    return d
+
+
+def _expand(call: Any, function: _Inlinable, arguments: List[Any], taken: Set[str],
+            allocate, serial: int) -> List[Any]:
+    # The actions that replace one call: argument assignments, the body and the result.
+    constants: Dict[str, str] = {}
+    names: Dict[str, str] = {}
+    used = set(taken)
+    for name in sorted(_locals(function.body) | set(function.parameters)):
+        fresh = f"{name}_{serial}"
+        while fresh in used:
+            fresh += "_"
+        used.add(fresh)
+        names[name] = fresh
+    out: List[Any] = []
+    for name, argument in zip(function.parameters, arguments):
+        o = compile_operand(argument)
+        if name in function.constant_safe and o.kind == CONST and o.data.__class__ is str and "}" not in o.data:
+            constants[name] = o.data
+            continue
+        value = dict(_as_dict(argument))
+        value["l"] = "any"
+        target = {"value": "l!" + names[name], "t": "string", "l": "variable"}
+        out.append({"id": str(SET), "text": ["Set", target, "to", value], "globalid": allocate()})
+    body = function.body
+    result = None
+    if function.returns:
+        body, result = body[:-1], _params(body[-1])
+    for action in body:
+        d = dict(action)
+        d["text"] = [item if item.__class__ is str else _renamed(item, names, constants) for item in d.get("text") or ()]
+        d["globalid"] = allocate()
+        out.append(d)
+    target = _output(call)
+    if target is not None:
+        value = _renamed(result[0], names, constants)
+        out.append({"id": str(SET), "text": ["Set", dict(_as_dict(target)), "to", value], "globalid": allocate()})
+    return [_rebuild(call, d) for d in out]
+
+
+def _output(call: Any) -> Optional[Any]:
+    # The variable a call stores its result in, as the compiler picks it.
+    for p in reversed(_params(_as_dict(call))):
+        d = _as_dict(p)
+        if d.get("l") in _VARIABLE_LABELS:
+            return p if compile_operand(p).slot is not None else None
+    return None
+
+
+def inline_functions(scripts: List[Any], max_actions: int = 8) -> List[CallSite]:
+    """
+    Replace calls to small functions with the function's actions, in place.
+
+    A Run function (ID: 87) call is inlined when its function is not
+    recursive, has at most max_actions actions besides a final Return,
+    takes exactly the arguments given, and the caller stays within the
+    action limit. Arguments that are plain text are substituted into the
+    body; others are first stored in fresh local variables, so they are
+    evaluated once, at the call, as before. The body's locals are renamed
+    so they cannot clash with the caller's, and the final Return becomes
+    a Set of the call's result variable. Functions whose meaning depends
+    on being a separate call are left alone: a Return before the last
+    action, a Break outside a loop, Iterate (which sets l!index and
+    l!value), a local read before it is set, or object variables when the
+    caller is in another script. Background calls (ID: 63) are never
+    inlined. Inlined actions get new globalids; function definitions are
+    kept, see CallGraph.unused for the ones no longer needed.
+
+    Args:
+        scripts (List[Any]): ScriptObject instances or decoded script dictionaries.
+        max_actions (int): Largest function body to inline.
+
+    Returns:
+        List[CallSite]: The inlined calls, located as before inlining.
+    """
+    graph = call_graph(scripts)
+    events = {(si, ei): ed for si, ei, ed in _events(scripts)}
+    candidates: Dict[str, Optional[_Inlinable]] = {}
+    allocate = GlobalIdAllocator.from_document(scripts).allocate
+    inlined: List[CallSite] = []
+    by_event: Dict[Tuple[int, int], List[CallSite]] = {}
+    for site in graph.calls:
+        by_event.setdefault((site.script, site.event), []).append(site)
+    # Bodies are read before any event changes, so inlining is one level deep per call.
+    for name, loc in graph.functions.items():
+        if name not in graph.recursive:
+            candidates[name] = _prepare(loc[0], events[loc], max_actions)
+
+    for (si, ei), sites in by_event.items():
+        ed = events[si, ei]
+        actions = list(ed.get("actions") or ())
+        taken = _locals(actions) | {p for p in _overrides(ed) if p.__class__ is str}
+        expansions: Dict[int, List[Any]] = {}
+        size = len(actions)
+        for site in sites:
+            function = candidates.get(site.callee)
+            if site.background or function is None:
+                continue
+            if function.object_variables and function.script != si:
+                continue
+            call = actions[site.action]
+            arguments = _arguments(_params(_as_dict(call))) or []
+            if len(arguments) != len(function.parameters):
+                continue
+            if _output(call) is not None and not (function.returns and _params(function.body[-1])):
+                continue
+            expansion = _expand(call, function, arguments, taken, allocate, len(inlined) + 1)
+            if size - 1 + len(expansion) > MAX_ACTIONS:
+                continue
+            size += len(expansion) - 1
+            taken |= _locals(expansion)
+            expansions[site.action] = expansion
+            inlined.append(site)
+        if expansions:
+            out: List[Any] = []
+            for ai, action in enumerate(actions):
+                out.extend(expansions.get(ai, (action,)))
+            ed["actions"] = out
+    return inlined
@@ -1,12 +1,50 @@
-
 import math
-from typing import List, Union
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple, Type, TypeVar, Union
 
 Number = Union[int, float]
+T = TypeVar("T")
+
+
+class _Frozen:
+    """Base for slotted value classes whose attributes are set once in __init__."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _key(self):
+        # The slot values, in the order __init__ takes them.
+        return tuple(getattr(self, name) for name in self.__slots__)
 
-class HexColor:
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash((self.__class__, self._key()))
+
+    def __reduce__(self):
+        return (self.__class__, self._key())
+
+
+_set = object.__setattr__
+
+
+class HexColor(_Frozen):
     """Represents a hexadecimal color code."""
 
+    __slots__ = ("hex",)
+
     def __init__(self, hex_code: str):
         """
         Initialize a HexColor.
@@ -19,19 +57,21 @@ class HexColor:
         """
         if not (hex_code.startswith("#") and len(hex_code) in (4, 7)):
             raise ValueError("Invalid hex color")
-        self.hex = hex_code.upper()
+        _set(self, "hex", hex_code.upper())
 
     def __str__(self):
         return self.hex
 
 
-class Range01:
+class Range01(_Frozen):
     """Represents a float value restricted to the range [0, 1]."""
 
+    __slots__ = ("value",)
+
     def __init__(self, value: float):
         if not 0 <= value <= 1:
             raise ValueError("Value must be between 0 and 1")
-        self.value = value
+        _set(self, "value", value)
 
     def __float__(self):
         return self.value
@@ -40,9 +80,11 @@ class Range01:
         return f"Range01({self.value})"
 
 
-class ScaleOffset:
+class ScaleOffset(_Frozen):
     """Represents a scale (0-1) with an offset for positioning or sizing."""
 
+    __slots__ = ("scale", "offset")
+
     def __init__(self, scale: Number, offset: Number):
         """
         Args:
@@ -54,19 +96,21 @@ class ScaleOffset:
         """
         if not 0 <= scale <= 1:
             raise ValueError("Scale must be between 0 and 1")
-        self.scale = scale
-        self.offset = offset
+        _set(self, "scale", scale)
+        _set(self, "offset", offset)
 
     def __repr__(self):
         return f"ScaleOffset(scale={self.scale}, offset={self.offset})"
 
 
-class Vector2:
+class Vector2(_Frozen):
     """Represents a 2D vector using scale + offset for x and y axes."""
 
+    __slots__ = ("x", "y")
+
     def __init__(self, x: ScaleOffset, y: ScaleOffset):
-        self.x = x
-        self.y = y
+        _set(self, "x", x)
+        _set(self, "y", y)
 
     def __repr__(self):
         return f"Vector2(x={self.x}, y={self.y})"
@@ -87,12 +131,14 @@ class Vector2:
         return px, py
 
 
-class Size2:
+class Size2(_Frozen):
     """Represents a 2D size using scale + offset for width and height."""
 
+    __slots__ = ("width", "height")
+
     def __init__(self, width: ScaleOffset, height: ScaleOffset):
-        self.width = width
-        self.height = height
+        _set(self, "width", width)
+        _set(self, "height", height)
 
     def __repr__(self):
         return f"Size2(width={self.width}, height={self.height})"
@@ -114,11 +160,25 @@ class Size2:
 
 
 class Rotation:
-    """Represents a rotation in degrees."""
+    """
+    Represents a rotation in degrees.
+
+    Unlike the other value classes, Rotation stays mutable because set()
+    and add() change it in place.
+    """
+
+    __slots__ = ("degrees",)
 
     def __init__(self, degrees: Number):
         self.degrees = float(degrees)
 
+    def __eq__(self, other):
+        if other.__class__ is not Rotation:
+            return NotImplemented
+        return self.degrees == other.degrees
+
+    __hash__ = None
+
     def __repr__(self):
         return f"Rotation({self.degrees}°)"
 
@@ -146,6 +206,191 @@ class Rotation:
         return math.radians(self.degrees)
 
 
+class InternCache:
+    """
+    Bounded cache that maps a literal to one shared immutable instance.
+
+    Each class gets its own table of at most maxsize entries; when a table
+    is full its least recently used entry is evicted. Non-string literals
+    are keyed together with their type, so 1 and 1.0 stay distinct and
+    serialize exactly as they were read.
+
+    All methods may be called from several threads.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        Args:
+            maxsize (int): Maximum number of cached instances per class.
+        """
+        self.maxsize = maxsize
+        self.enabled = True
+        self.hits = 0
+        self.misses = 0
+        self._tables: "Dict[type, OrderedDict[Any, Any]]" = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(t) for t in self._tables.values())
+
+    def get(self, cls: Type[T], value: Any) -> T:
+        """
+        Get the shared instance of cls(value), creating it on a miss.
+
+        Args:
+            cls (Type[T]): An immutable class constructed from a single literal.
+            value (Any): The literal, e.g. a hex string.
+
+        Returns:
+            T: The shared instance, or a new one if the cache is disabled.
+        """
+        if not self.enabled:
+            return cls(value)
+        key = value if value.__class__ is str else (value.__class__, value)
+        with self._lock:
+            table = self._tables.get(cls)
+            if table is None:
+                table = self._tables[cls] = OrderedDict()
+            obj = table.get(key)
+            if obj is not None:
+                table.move_to_end(key)
+                self.hits += 1
+                return obj
+            self.misses += 1
+        obj = cls(value)
+        with self._lock:
+            # Another thread may have stored the same literal meanwhile; keep the first instance.
+            shared = table.setdefault(key, obj)
+            table.move_to_end(key)
+            if len(table) > self.maxsize:
+                table.popitem(last=False)
+        return shared
+
+    def clear(self):
+        """Drop all cached instances and reset the counters."""
+        with self._lock:
+            self._tables.clear()
+            self.hits = self.misses = 0
+
+    @contextmanager
+    def disabled(self) -> Iterator["InternCache"]:
+        """Context manager that turns interning off, e.g. for tests that need fresh instances."""
+        enabled, self.enabled = self.enabled, False
+        try:
+            yield self
+        finally:
+            self.enabled = enabled
+
+
+INTERN_CACHE = InternCache()
+"""Process-wide cache used by interned()."""
+
+
+def interned(cls: Type[T], value: Any) -> T:
+    """
+    Get a shared instance of cls(value) from the process-wide cache.
+
+    Only use this with immutable classes such as HexColor, Range01 or str.
+
+    Args:
+        cls (Type[T]): Class constructed from a single literal.
+        value (Any): The literal.
+
+    Returns:
+        T: The shared instance.
+    """
+    return INTERN_CACHE.get(cls, value)
+
+
+class GeometryBuffer:
+    """
+    Stores the positions and sizes of many elements in contiguous arrays.
+
+    Each scale and offset component lives in its own array("d"), so a page
+    of elements costs eight doubles per element instead of six objects.
+    """
+
+    __slots__ = ("x_scale", "x_offset", "y_scale", "y_offset", "width_scale", "width_offset", "height_scale", "height_offset")
+
+    def __init__(self, items: Iterable[Tuple[Vector2, Size2]] = ()):
+        """
+        Args:
+            items (Iterable[Tuple[Vector2, Size2]]): Initial (position, size) pairs.
+        """
+        for name in self.__slots__:
+            setattr(self, name, array("d"))
+        self.extend(items)
+
+    def __len__(self):
+        return len(self.x_scale)
+
+    def append(self, position: Vector2, size: Size2) -> int:
+        """
+        Add a position and size.
+
+        Returns:
+            int: Index of the new entry.
+        """
+        self.x_scale.append(position.x.scale)
+        self.x_offset.append(position.x.offset)
+        self.y_scale.append(position.y.scale)
+        self.y_offset.append(position.y.offset)
+        self.width_scale.append(size.width.scale)
+        self.width_offset.append(size.width.offset)
+        self.height_scale.append(size.height.scale)
+        self.height_offset.append(size.height.offset)
+        return len(self.x_scale) - 1
+
+    def extend(self, items: Iterable[Tuple[Vector2, Size2]]):
+        """Add several (position, size) pairs."""
+        for position, size in items:
+            self.append(position, size)
+
+    def position(self, index: int) -> Vector2:
+        """Get the position at index as a Vector2."""
+        return Vector2(ScaleOffset(self.x_scale[index], self.x_offset[index]),
+                       ScaleOffset(self.y_scale[index], self.y_offset[index]))
+
+    def size(self, index: int) -> Size2:
+        """Get the size at index as a Size2."""
+        return Size2(ScaleOffset(self.width_scale[index], self.width_offset[index]),
+                     ScaleOffset(self.height_scale[index], self.height_offset[index]))
+
+    def set_position(self, index: int, position: Vector2):
+        """Replace the position at index."""
+        self.x_scale[index] = position.x.scale
+        self.x_offset[index] = position.x.offset
+        self.y_scale[index] = position.y.scale
+        self.y_offset[index] = position.y.offset
+
+    def set_size(self, index: int, size: Size2):
+        """Replace the size at index."""
+        self.width_scale[index] = size.width.scale
+        self.width_offset[index] = size.width.offset
+        self.height_scale[index] = size.height.scale
+        self.height_offset[index] = size.height.offset
+
+    def to_pixels(self, parent_width: Number, parent_height: Number) -> Tuple[array, array, array, array]:
+        """
+        Convert every entry to pixels against the same parent size.
+        
+        Args:
+            parent_width (Number): Width of parent container in pixels.
+            parent_height (Number): Height of parent container in pixels.
+        
+        Returns:
+            Tuple[array, array, array, array]: Pixel x, y, width and height arrays.
+        """
+        pw, ph = parent_width, parent_height
+        return (
+            array("d", [s * pw + o for s, o in zip(self.x_scale, self.x_offset)]),
+            array("d", [s * ph + o for s, o in zip(self.y_scale, self.y_offset)]),
+            array("d", [s * pw + o for s, o in zip(self.width_scale, self.width_offset)]),
+            array("d", [s * ph + o for s, o in zip(self.height_scale, self.height_offset)]),
+        )
+
+
 class GradientStop:
     """Represents a stop in a gradient with a position and a value."""
 
@@ -167,17 +412,87 @@ class GradientStop:
         return f"GradientStop(position={self.position}, value={self.value})"
 
 
+def _check_positions(positions: Sequence[float]):
+    if positions and not (0 <= min(positions) and max(positions) <= 1):
+        raise ValueError("Position must be between 0 and 1")
+
+
+class _StopList(list):
+    # A list of gradient stops that counts its edits, so the gradient knows when to rebuild its lookups.
+    __slots__ = ("version",)
+
+    def __init__(self, stops: Iterable[GradientStop] = ()):
+        super().__init__(stops)
+        self.version = 0
+
+    def __reduce__(self):
+        return _StopList, (list(self),)
+
+
+def _counting(name: str):
+    method = getattr(list, name)
+
+    def edit(self, *args, **kwargs):
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    edit.__name__ = name
+    return edit
+
+
+for _name in ("__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "extend", "insert", "pop", "remove",
+              "clear", "sort", "reverse"):
+    setattr(_StopList, _name, _counting(_name))
+
+
 class TransparencyGradient:
     """Represents a gradient of transparency values (0-1)."""
 
     def __init__(self, stops: List[GradientStop]):
+        self.stops = stops
+
+    @property
+    def stops(self) -> List[GradientStop]:
+        """
+        The stops, sorted by position when assigned.
+
+        The list can be edited in place, e.g. with stops.append(...); the
+        lookups are rebuilt, in position order, on the next read.
+        """
+        return self._stops
+
+    @stops.setter
+    def stops(self, stops: Iterable[GradientStop]):
+        self._stops = _StopList(sorted(stops, key=lambda s: s.position))
+        self._build()
+
+    def _build(self):
+        stops = sorted(self._stops, key=lambda s: s.position)
         for stop in stops:
             if not isinstance(stop.value, (float, int)):
                 raise TypeError("TransparencyGradient values must be float or int")
-        self.stops = sorted(stops, key=lambda s: s.position)
+        self._positions = [s.position for s in stops]
+        self._values = [s.value for s in stops]
+        self._luts: Dict[int, array] = {}
+        self._version = self._stops.version
+
+    def _sync(self):
+        if self._stops.version != self._version:
+            self._build()
 
     def __repr__(self):
-        return f"TransparencyGradient({self.stops})"
+        return f"TransparencyGradient({self._stops})"
+
+    def _value_at(self, position: float) -> float:
+        positions = self._positions
+        if position <= positions[0]:
+            return self._values[0]
+        if position >= positions[-1]:
+            return self._values[-1]
+        i = bisect_left(positions, position)
+        p0, p1 = positions[i - 1], positions[i]
+        v0, v1 = self._values[i - 1], self._values[i]
+        return v0 + (position - p0) / (p1 - p0) * (v1 - v0)
 
     def get_value_at(self, position: float) -> float:
         """
@@ -191,28 +506,82 @@ class TransparencyGradient:
         """
         if not 0 <= position <= 1:
             raise ValueError("Position must be between 0 and 1")
-        if position <= self.stops[0].position:
-            return self.stops[0].value
-        if position >= self.stops[-1].position:
-            return self.stops[-1].value
-        for i in range(len(self.stops)-1):
-            s0, s1 = self.stops[i], self.stops[i+1]
-            if s0.position <= position <= s1.position:
-                t = (position - s0.position) / (s1.position - s0.position)
-                return s0.value + t * (s1.value - s0.value)
+        self._sync()
+        return self._value_at(position)
+
+    def sample(self, positions: Sequence[float]) -> array:
+        """
+        Get interpolated transparency at many positions.
+        
+        Args:
+            positions (Sequence[float]): Positions along gradient (0 to 1).
+        
+        Returns:
+            array: Interpolated transparency values as array("d").
+        """
+        _check_positions(positions)
+        self._sync()
+        return array("d", map(self._value_at, positions))
+
+    def lut(self, size: int = 256) -> array:
+        """
+        Get a lookup table of evenly spaced samples from 0 to 1.
+
+        Tables are computed once per size; each call returns a new copy.
+        
+        Args:
+            size (int): Number of entries, at least 2.
+        
+        Returns:
+            array: size transparency values; entry k is the value at k / (size - 1).
+        """
+        self._sync()
+        table = self._luts.get(size)
+        if table is None:
+            table = self._luts[size] = self.sample([k / (size - 1) for k in range(size)])
+        return array("d", table)
 
 
 class ColorGradient:
     """Represents a gradient of color values (hex strings)."""
 
     def __init__(self, stops: List[GradientStop]):
+        self.stops = stops
+
+    @property
+    def stops(self) -> List[GradientStop]:
+        """
+        The stops, sorted by position when assigned.
+
+        The list can be edited in place, e.g. with stops.append(...); the
+        lookups are rebuilt, in position order, on the next read.
+        """
+        return self._stops
+
+    @stops.setter
+    def stops(self, stops: Iterable[GradientStop]):
+        self._stops = _StopList(sorted(stops, key=lambda s: s.position))
+        self._build()
+
+    def _build(self):
+        stops = sorted(self._stops, key=lambda s: s.position)
         for stop in stops:
             if not isinstance(stop.value, str):
                 raise TypeError("ColorGradient values must be hex strings")
-        self.stops = sorted(stops, key=lambda s: s.position)
+        self._positions = [s.position for s in stops]
+        self._values = [s.value for s in stops]
+        self._luts: Dict[int, List[str]] = {}
+        self._version = self._stops.version
+
+    def _sync(self):
+        if self._stops.version != self._version:
+            self._build()
 
     def __repr__(self):
-        return f"ColorGradient({self.stops})"
+        return f"ColorGradient({self._stops})"
+
+    def _value_at(self, position: float) -> str:
+        return self._values[max(bisect_right(self._positions, position) - 1, 0)]
 
     def get_value_at(self, position: float) -> str:
         """
@@ -226,7 +595,37 @@ class ColorGradient:
         """
         if not 0 <= position <= 1:
             raise ValueError("Position must be between 0 and 1")
-        for stop in reversed(self.stops):
-            if position >= stop.position:
-                return stop.value
-        return self.stops[0].value
+        self._sync()
+        return self._value_at(position)
+
+    def sample(self, positions: Sequence[float]) -> List[str]:
+        """
+        Get colors at many positions.
+        
+        Args:
+            positions (Sequence[float]): Positions along gradient (0 to 1).
+        
+        Returns:
+            List[str]: Hex colors at the given positions.
+        """
+        _check_positions(positions)
+        self._sync()
+        return list(map(self._value_at, positions))
+
+    def lut(self, size: int = 256) -> List[str]:
+        """
+        Get a lookup table of evenly spaced samples from 0 to 1.
+
+        Tables are computed once per size; each call returns a new copy.
+        
+        Args:
+            size (int): Number of entries, at least 2.
+        
+        Returns:
+            List[str]: size hex colors; entry k is the color at k / (size - 1).
+        """
+        self._sync()
+        table = self._luts.get(size)
+        if table is None:
+            table = self._luts[size] = self.sample([k / (size - 1) for k in range(size)])
+        return list(table)
@@ -0,0 +1,230 @@
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+
+from .binary import to_bytes
+from .blocks import match_blocks
+from .loader import loads
+from .scopes import analyze
+from .serializer import dumps
+from .validator import Violation, _as_dict, validate
+
+Job = Tuple[str, Optional[str]]
+"""An input path and the path to write the converted file to, if any."""
+
+_FORMATS = {"json": ".json", "binary": ".cwb"}
+
+
+def _violations(items: Iterable[Violation]) -> List[dict]:
+    return [{"path": v.path, "message": v.message} for v in items]
+
+
+def lint(scripts: List) -> List[Violation]:
+    """
+    Collect block structure errors and variable scope violations.
+
+    Args:
+        scripts (List): ScriptObject instances or decoded script dictionaries.
+
+    Returns:
+        List[Violation]: Unbalanced blocks first, then scope violations.
+    """
+    found: List[Violation] = []
+    for si, script in enumerate(scripts):
+        for ei, event in enumerate((_as_dict(script) or {}).get("content") or ()):
+            ed = _as_dict(event)
+            if ed is not None:
+                found.extend(match_blocks(ed.get("actions") or (), (si, ei)).errors)
+    found.extend(analyze(scripts).violations)
+    return found
+
+
+def check_file(path: str, output: Optional[str] = None, fmt: str = "json", indent: bool = False) -> dict:
+    """
+    Load, validate, lint and re-serialize one site file.
+
+    Args:
+        path (str): CatWeb JSON file.
+        output (str | None): Where to write the re-serialized document; nothing is written if None.
+        fmt (str): "json" or "binary".
+        indent (bool): Pretty-print JSON output.
+
+    Returns:
+        dict: One result record with path, ok, violations, lint, roundtrip and, on failure, error.
+    """
+    result = {"path": path, "ok": False}
+    try:
+        with open(path, "rb") as fp:
+            raw = fp.read()
+        scripts = loads(raw)
+        result["violations"] = _violations(validate(scripts))
+        result["lint"] = _violations(lint(scripts))
+        data = dumps(scripts, indent) if fmt == "json" else to_bytes(scripts)
+        # True when the loader and serializer reproduce the file byte for byte.
+        result["roundtrip"] = dumps(scripts) == raw.strip()
+        if output is not None:
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+            with open(output, "wb") as fp:
+                fp.write(data)
+            result["output"] = output
+    except Exception as e:
+        # One bad file must not abort the batch or drop the results of its chunk.
+        result["error"] = f"{e.__class__.__name__}: {e}"
+        return result
+    result["ok"] = not result["violations"]
+    return result
+
+
+def _check_chunk(jobs: List[Job], fmt: str, indent: bool) -> List[dict]:
+    return [check_file(path, output, fmt, indent) for path, output in jobs]
+
+
+def _base(pattern: str) -> str:
+    # Leading directories of a pattern that contain no glob characters.
+    parts = os.path.normpath(pattern).split(os.sep)
+    static = next((i for i, part in enumerate(parts) if glob.has_magic(part)), len(parts) - 1)
+    return os.sep.join(parts[:static]) or "."
+
+
+def find_files(patterns: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """
+    Expand directories and glob patterns into site files.
+
+    Directories are searched recursively for *.json files.
+
+    Args:
+        patterns (Iterable[str]): Files, directories or glob patterns ("**" is supported).
+
+    Yields:
+        Tuple[str, str]: Each file and the directory its output path is relative to.
+    """
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, dirs, files in os.walk(pattern):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(".json"):
+                        yield os.path.join(root, name), pattern
+        else:
+            base = _base(pattern)
+            for path in sorted(glob.iglob(pattern, recursive=True)):
+                if os.path.isfile(path):
+                    yield path, base
+
+
+def _jobs(patterns: Iterable[str], output_dir: Optional[str], fmt: str) -> Iterator[Job]:
+    for path, base in find_files(patterns):
+        output = None
+        if output_dir is not None:
+            relative = os.path.splitext(os.path.relpath(path, base))[0] + _FORMATS[fmt]
+            output = os.path.join(output_dir, relative)
+        yield path, output
+
+
+def _chunks(jobs: Iterator[Job], size: int) -> Iterator[List[Job]]:
+    chunk: List[Job] = []
+    for job in jobs:
+        chunk.append(job)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run(
+    patterns: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    output_dir: Optional[str] = None,
+    fmt: str = "json",
+    indent: bool = False,
+) -> Iterator[dict]:
+    """
+    Check many site files in parallel, yielding results as chunks finish.
+
+    Files are handed to a process pool in chunks of chunk_size, and at most
+    two chunks per worker are in flight, so memory stays flat no matter how
+    many files match. Results come in completion order, not input order.
+
+    Args:
+        patterns (Iterable[str]): Files, directories or glob patterns.
+        workers (int | None): Number of processes; 1 checks files in this process. Defaults to the CPU count.
+        chunk_size (int): Files per task.
+        output_dir (str | None): Directory to write re-serialized files to, mirroring the input layout.
+        fmt (str): Output format, "json" or "binary".
+        indent (bool): Pretty-print JSON output.
+
+    Yields:
+        dict: One record per file, see check_file.
+    """
+    chunks = _chunks(_jobs(patterns, output_dir, fmt), chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield from _check_chunk(chunk, fmt, indent)
+        return
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as pool:
+        limit = 2 * workers
+        pending = set()
+        for chunk in chunks:
+            pending.add(pool.submit(_check_chunk, chunk, fmt, indent))
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the opencatwebjson command.
+
+    Writes one JSON line per file to stdout and a summary to stderr.
+
+    Args:
+        argv (List[str] | None): Arguments without the program name; defaults to sys.argv[1:].
+
+    Returns:
+        int: 0 if every file loaded and validated, 1 if any failed, 2 if nothing matched.
+    """
+    parser = argparse.ArgumentParser(
+        prog="opencatwebjson",
+        description="Load, validate, lint and re-serialize CatWeb site exports.",
+    )
+    parser.add_argument("paths", nargs="+", help="site files, directories or glob patterns")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="files per task (default: 64)")
+    parser.add_argument("-o", "--output-dir", help="write re-serialized files here")
+    parser.add_argument("--format", choices=sorted(_FORMATS), default="json", help="output format (default: json)")
+    parser.add_argument("--indent", action="store_true", help="pretty-print JSON output")
+    parser.add_argument("--strict", action="store_true", help="treat lint findings as failures")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1 or (args.workers is not None and args.workers < 1):
+        parser.error("--workers and --chunk-size must be at least 1")
+
+    out = sys.stdout.buffer
+    total = failed = 0
+    for result in run(args.paths, args.workers, args.chunk_size, args.output_dir, args.format, args.indent):
+        if args.strict and result.get("lint"):
+            result["ok"] = False
+        total += 1
+        failed += not result["ok"]
+        out.write(orjson.dumps(result) + b"\n")
+        out.flush()
+    print(f"{total} files, {failed} failed", file=sys.stderr)
+    if not total:
+        return 2
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Any, Iterator, List, NamedTuple, Optional, Tuple
+
+from .blocks import match_blocks
+from .cache import _ReadOnlyDict
+from .ids import BREAK, CONDITIONALS, ELSE, END, LOOPS
+from .scopes import GLOBAL, LOCAL, OBJECT, _VARIABLE_LABELS, _variable_name
+from .serializer import dumps
+from .validator import Violation, _as_dict
+
+CONST, REF, TEMPLATE, TUPLE = range(4)
+"""Operand kinds: a literal, a single {variable}, text with embedded references, and a tuple of operands."""
+
+_split_refs = re.compile(r"\{((?:[lo]!)?[^{}]+)\}").split
+
+Slot = Tuple[int, str]
+"""A resolved variable: scope (GLOBAL, OBJECT or LOCAL) and the name without its prefix."""
+
+
+def resolve_slot(name: str) -> Slot:
+    """
+    Split a variable name into its scope and bare name.
+
+    Args:
+        name (str): Variable name with an optional "o!" or "l!" prefix.
+
+    Returns:
+        Slot: (scope, name) with the prefix removed.
+    """
+    if name.startswith("l!"):
+        return LOCAL, name[2:]
+    if name.startswith("o!"):
+        return OBJECT, name[2:]
+    return GLOBAL, name
+
+
+class Operand:
+    """
+    A parameter with its references resolved ahead of time.
+
+    Attributes:
+        kind (int): CONST, REF, TEMPLATE or TUPLE.
+        data (Any): The literal, the Slot, the template parts (str or Slot) or the tuple operands.
+        slot (Slot | None): The value read as a variable name, for parameters such as <variable> and <table>.
+        label (str | None): Parameter label ("l").
+        type (str | None): Parameter type ("t").
+    """
+
+    __slots__ = ("kind", "data", "slot", "label", "type")
+
+    def __init__(self, kind: int, data: Any, slot: Optional[Slot], label: Optional[str], type: Optional[str]):
+        self.kind = kind
+        self.data = data
+        self.slot = slot
+        self.label = label
+        self.type = type
+
+    def __repr__(self):
+        return f"Operand({('CONST', 'REF', 'TEMPLATE', 'TUPLE')[self.kind]}, {self.data!r})"
+
+
+def compile_operand(p: Any) -> Operand:
+    """
+    Resolve a parameter object into an Operand.
+
+    Args:
+        p (Any): Parameter instance or dictionary.
+
+    Returns:
+        Operand: The compiled parameter.
+    """
+    d = _as_dict(p) or {}
+    value = d.get("value")
+    label, type = d.get("l"), d.get("t")
+    slot = resolve_slot(_variable_name(value)) if value.__class__ is str and value else None
+    if value.__class__ is list:
+        return Operand(TUPLE, tuple(compile_operand(v) for v in value), slot, label, type)
+    if value.__class__ is not str or "{" not in value:
+        return Operand(CONST, value, slot, label, type)
+    parts = _split_refs(value)
+    if len(parts) == 3 and not parts[0] and not parts[2]:
+        return Operand(REF, resolve_slot(parts[1]), slot, label, type)
+    # Odd indices are captured names, even indices the literal text between them.
+    compiled = tuple(resolve_slot(part) if i % 2 else part for i, part in enumerate(parts) if i % 2 or part)
+    return Operand(TEMPLATE, compiled, slot, label, type)
+
+
+class Program(NamedTuple):
+    """
+    An event lowered to a flat instruction array.
+
+    Instruction i has opcode ops[i] (the action ID), operands args[i] and the
+    variable its result is written to, outputs[i]. jumps[i] holds the
+    pre-resolved target of control flow instructions:
+
+    - conditionals: where to continue when the condition is false
+    - loops: the instruction after the loop's end
+    - end of a loop: the loop instruction to iterate again; -1 for other ends
+    - else: the instruction after the end of the if
+    - break: the instruction after the innermost loop, or len(ops) outside loops
+
+    Attributes:
+        globalid (str): globalid of the compiled event.
+        ops (array): Opcodes.
+        jumps (array): Jump targets, -1 where unused.
+        args (List[Tuple[Operand, ...]]): Operands per instruction.
+        outputs (List[Slot | None]): Output variable per instruction.
+        errors (List[Violation]): Block structure errors; a program with errors cannot run.
+    """
+    globalid: str
+    ops: array
+    jumps: array
+    args: List[Tuple[Operand, ...]]
+    outputs: List[Optional[Slot]]
+    errors: List[Violation]
+
+
+def compile_event(event: Any) -> Program:
+    """
+    Lower an event's actions to a Program.
+
+    Args:
+        event (Any): Event instance or dictionary.
+
+    Returns:
+        Program: The compiled event.
+    """
+    ed = _as_dict(event)
+    actions = [_as_dict(a) for a in ed.get("actions") or ()]
+    table = match_blocks(actions)
+    ops = table.ids
+    n = len(ops)
+    jumps = array("i", [-1]) * n
+    args: List[Tuple[Operand, ...]] = []
+    outputs: List[Optional[Slot]] = []
+    loops: List[int] = []
+
+    for pc, action in enumerate(actions):
+        operands = tuple(compile_operand(p) for p in action.get("text") or () if p.__class__ is not str)
+        args.append(operands)
+        out = None
+        for o in reversed(operands):
+            if o.label in _VARIABLE_LABELS:
+                out = o.slot
+                break
+        outputs.append(out)
+
+        if table.errors:
+            continue
+        op = ops[pc]
+        if op in CONDITIONALS:
+            e = table.else_of[pc]
+            jumps[pc] = (e if e != -1 else table.end_of[pc]) + 1
+        elif op in LOOPS:
+            jumps[pc] = table.end_of[pc] + 1
+            loops.append(pc)
+        elif op == ELSE:
+            jumps[pc] = table.end_of[pc] + 1
+        elif op == END:
+            opener = table.opener_of[pc]
+            if loops and loops[-1] == opener:
+                jumps[pc] = loops.pop()
+        elif op == BREAK:
+            jumps[pc] = table.end_of[loops[-1]] + 1 if loops else n
+
+    return Program(ed.get("globalid"), ops, jumps, args, outputs, table.errors)
+
+
+class ProgramCache:
+    """
+    Compiled programs keyed by event globalid.
+
+    A cached program is reused while the event's actions serialize to the
+    same bytes as when it was compiled, checked with a hash of their JSON,
+    so edits made in place are picked up without calling invalidate.
+    Hashing the JSON costs a fraction of compiling the event. Events of
+    scripts from a cache.ParseCache are read-only, so they are recognized
+    by identity and not hashed again. Programs are evicted least recently
+    used first once there are more than max_entries.
+
+    All methods may be called from several threads.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        """
+        Args:
+            max_entries (int): Upper bound for the number of cached programs.
+        """
+        self.max_entries = max_entries
+        # globalid -> (digest, program, the read-only event dictionary or None)
+        self._programs: "OrderedDict[str, Tuple[bytes, Program, Optional[dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, event: Any) -> Program:
+        """
+        Get the compiled program of an event, compiling it on a miss.
+
+        Args:
+            event (Any): Event instance or dictionary.
+
+        Returns:
+            Program: The compiled event.
+        """
+        ed = _as_dict(event)
+        gid = ed.get("globalid")
+        programs = self._programs
+        with self._lock:
+            entry = programs.get(gid)
+            if entry is not None and entry[2] is ed:
+                programs.move_to_end(gid)
+                self.hits += 1
+                return entry[1]
+        digest = blake2b(dumps(ed.get("actions") or []), digest_size=16).digest()
+        frozen = ed if ed.__class__ is _ReadOnlyDict else None
+        with self._lock:
+            entry = programs.get(gid)
+            if entry is not None and entry[0] == digest:
+                if frozen is not None:
+                    programs[gid] = (digest, entry[1], frozen)
+                programs.move_to_end(gid)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        program = compile_event(ed)
+        with self._lock:
+            programs[gid] = (digest, program, frozen)
+            programs.move_to_end(gid)
+            while len(programs) > self.max_entries:
+                programs.popitem(last=False)
+        return program
+
+    def invalidate(self, globalid: str):
+        """Drop the cached program of one event."""
+        with self._lock:
+            self._programs.pop(globalid, None)
+
+    def clear(self):
+        """Drop every cached program and reset the counters."""
+        with self._lock:
+            self._programs.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._programs)
+
+    def __iter__(self) -> Iterator[Program]:
+        with self._lock:
+            return iter([entry[1] for entry in self._programs.values()])
+
+
+PROGRAM_CACHE = ProgramCache()
+"""Process-wide program cache used by Runtime."""
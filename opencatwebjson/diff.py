@@ -0,0 +1,292 @@
+from bisect import bisect_left
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+import orjson
+
+from .loader import _decode_text, decode_action, decode_event, decode_parameter, decode_script
+from .serializer import dumps
+from .validator import _as_dict
+
+Patch = List[dict]
+"""A list of patch operations; plain JSON values only, so a patch can be stored with orjson."""
+
+SCRIPT, EVENT, ACTION = "script", "event", "action"
+
+_CHILDREN = {SCRIPT: "content", EVENT: "actions", ACTION: None}
+_CHILD_KIND = {None: SCRIPT, SCRIPT: EVENT, EVENT: ACTION}
+_DECODERS = {SCRIPT: decode_script, EVENT: decode_event, ACTION: decode_action}
+
+
+class _Node(NamedTuple):
+    kind: str
+    d: dict
+    parent: Optional[str]
+    position: int
+
+
+def _index(data: Any) -> Dict[str, _Node]:
+    # globalid -> node for every script, event and action.
+    nodes: Dict[str, _Node] = {}
+    for si, script in enumerate(data):
+        sd = _as_dict(script)
+        sid = sd.get("globalid")
+        nodes[sid] = _Node(SCRIPT, sd, None, si)
+        for ei, event in enumerate(sd.get("content") or ()):
+            ed = _as_dict(event)
+            eid = ed.get("globalid")
+            nodes[eid] = _Node(EVENT, ed, sid, ei)
+            for ai, action in enumerate(ed.get("actions") or ()):
+                ad = _as_dict(action)
+                nodes[ad.get("globalid")] = _Node(ACTION, ad, eid, ai)
+    return nodes
+
+
+def _children(data: Any, node: Optional[_Node]) -> List[str]:
+    if node is None:
+        items = data
+    else:
+        items = node.d.get(_CHILDREN[node.kind]) or ()
+    return [_as_dict(item).get("globalid") for item in items]
+
+
+def _plain(value: Any) -> Any:
+    # Typed objects and parameters become plain JSON values.
+    return orjson.loads(dumps(value))
+
+
+def _stayers(positions: List[int]) -> Set[int]:
+    # Indices (into positions) of a longest increasing subsequence; -1 entries never stay.
+    tails: List[int] = []
+    tail_index: List[int] = []
+    previous = [-1] * len(positions)
+    for i, p in enumerate(positions):
+        if p < 0:
+            continue
+        k = bisect_left(tails, p)
+        if k == len(tails):
+            tails.append(p)
+            tail_index.append(i)
+        else:
+            tails[k] = p
+            tail_index[k] = i
+        previous[i] = tail_index[k - 1] if k else -1
+    keep = set()
+    i = tail_index[-1] if tail_index else -1
+    while i >= 0:
+        keep.add(i)
+        i = previous[i]
+    return keep
+
+
+def _edit(ops: Patch, gid: str, kind: str, old: dict, new: dict):
+    child_key = _CHILDREN[kind]
+    for key, value in new.items():
+        if key == child_key:
+            continue
+        if key not in old:
+            ops.append({"op": "set", "globalid": gid, "key": key, "value": _plain(value)})
+            continue
+        before = old[key]
+        if before == value:
+            continue
+        # Typed objects never equal dicts, so unequal values are compared again as JSON.
+        if key == "text" and before.__class__ is list and value.__class__ is list and len(before) == len(value):
+            for i, (a, b) in enumerate(zip(before, value)):
+                if a != b and _plain(a) != _plain(b):
+                    ops.append({"op": "param", "globalid": gid, "index": i, "value": _plain(b)})
+        elif _plain(before) != _plain(value):
+            ops.append({"op": "set", "globalid": gid, "key": key, "value": _plain(value)})
+    removed = [key for key in old if key not in new]
+    for key in removed:
+        ops.append({"op": "unset", "globalid": gid, "key": key})
+    order = [key for key in old if key in new] + [key for key in new if key not in old]
+    if order != list(new):
+        ops.append({"op": "order", "globalid": gid, "keys": list(new)})
+
+
+def diff(old: Any, new: Any) -> Patch:
+    """
+    Compute the changes that turn one document into another.
+
+    Scripts, events and actions are matched by globalid, not by position.
+    Objects are inserted with their whole subtree, and deleting an object
+    deletes its subtree. Within each list, the matched children forming a
+    longest increasing run of old positions stay put; every other child is
+    reported as a move. Changed keys are reported as set/unset, and
+    changed entries of an equally long text array as param edits.
+
+    The documents may mix typed objects and decoded dictionaries. Every
+    globalid is expected to be unique in both documents (see validate).
+
+    Args:
+        old (Any): Decoded root array or a list of ScriptObject.
+        new (Any): Decoded root array or a list of ScriptObject.
+
+    Returns:
+        Patch: Operations for apply_patch.
+    """
+    a = _index(old)
+    b = _index(new)
+    ops: Patch = []
+
+    # New objects are inserted with their subtree, so old objects that end up
+    # inside one of them are deleted rather than moved.
+    inserted = {gid for gid, node in b.items() if gid not in a or a[gid].kind != node.kind}
+    gone = set()
+    for gid, node in a.items():
+        target = b.get(gid)
+        if target is None or target.kind != node.kind or target.parent in inserted:
+            gone.add(gid)
+            if node.parent not in gone:
+                ops.append({"op": "delete", "globalid": gid})
+
+    containers: List[Optional[str]] = [None] + [gid for gid, node in b.items() if node.kind != ACTION]
+    for parent in containers:
+        if parent is not None:
+            node = b[parent]
+            if parent in inserted:
+                continue
+        else:
+            node = None
+        kind = _CHILD_KIND[None if node is None else node.kind]
+        gids = _children(new, node)
+        positions = []
+        for gid in gids:
+            before = a.get(gid)
+            same = before is not None and before.kind == kind and before.parent == parent
+            positions.append(before.position if same else -1)
+        keep = _stayers(positions)
+        items = new if node is None else node.d.get(_CHILDREN[node.kind])
+        for i, gid in enumerate(gids):
+            if i in keep:
+                continue
+            before = a.get(gid)
+            if before is not None and before.kind == kind:
+                ops.append({"op": "move", "globalid": gid, "parent": parent, "index": i})
+            else:
+                ops.append({"op": "insert", "parent": parent, "index": i, "value": _plain(items[i])})
+
+    for gid, node in b.items():
+        before = a.get(gid)
+        if before is not None and before.kind == node.kind:
+            _edit(ops, gid, node.kind, before.d, node.d)
+    return ops
+
+
+def _copy(value: Any) -> Any:
+    # Values are copied so the document never shares lists or dicts with the patch.
+    if value.__class__ is list or value.__class__ is dict:
+        return orjson.loads(orjson.dumps(value))
+    return value
+
+
+def _typed(key: str, value: Any) -> Any:
+    if key == "text" and value.__class__ is list:
+        return _decode_text(value)
+    if key == "variable_overrides" and value.__class__ is list:
+        return [decode_parameter(v) if v.__class__ is dict else v for v in value]
+    return value
+
+
+def apply_patch(data: Any, patch: Patch) -> Any:
+    """
+    Apply a patch from diff to a document in place.
+
+    Documents loaded with the loader get typed objects for inserted and
+    edited values; decoded dictionaries get plain values. Lists that gain
+    or lose items are replaced with new lists, except the root. Compiled
+    programs of edited events are not dropped explicitly; ProgramCache
+    notices the change by itself.
+
+    Args:
+        data (Any): Decoded root array or a list of ScriptObject; modified in place.
+        patch (Patch): Operations from diff.
+
+    Returns:
+        Any: data, for chaining.
+
+    Raises:
+        KeyError: If the patch refers to a globalid that is not in data.
+    """
+    typed = bool(data) and data[0].__class__ is not dict
+    nodes = _index(data)
+
+    def container(parent: Optional[str]) -> list:
+        if parent is None:
+            return data
+        node = nodes[parent]
+        return node.d.get(_CHILDREN[node.kind]) or []
+
+    def replace(parent: Optional[str], items: list):
+        # The root stays the caller's list; nested lists are swapped for new ones.
+        if parent is None:
+            data[:] = items
+            return
+        node = nodes[parent]
+        node.d[_CHILDREN[node.kind]] = items
+
+    # Detach deleted and moved objects, rebuilding each affected list once.
+    detached: Dict[str, Any] = {}
+    removed: Dict[Optional[str], Set[str]] = {}
+    for op in patch:
+        if op["op"] in ("delete", "move"):
+            removed.setdefault(nodes[op["globalid"]].parent, set()).add(op["globalid"])
+    for parent, gids in removed.items():
+        items = container(parent)
+        kept = []
+        for item in items:
+            gid = _as_dict(item).get("globalid")
+            if gid in gids:
+                detached[gid] = item
+            else:
+                kept.append(item)
+        replace(parent, kept)
+
+    # Place moved and inserted objects, merging each list with its placements in one pass.
+    placements: Dict[Optional[str], List[tuple]] = {}
+    for op in patch:
+        kind = op["op"]
+        if kind == "move":
+            placements.setdefault(op["parent"], []).append((op["index"], detached[op["globalid"]]))
+        elif kind == "insert":
+            parent = op["parent"]
+            value = _copy(op["value"])
+            if typed:
+                value = _DECODERS[_CHILD_KIND[None if parent is None else nodes[parent].kind]](value)
+            placements.setdefault(parent, []).append((op["index"], value))
+    for parent, placed in placements.items():
+        items = container(parent)
+        placed.sort(key=lambda entry: entry[0])
+        merged = []
+        rest = iter(items)
+        k = 0
+        for position in range(len(items) + len(placed)):
+            if k < len(placed) and placed[k][0] == position:
+                merged.append(placed[k][1])
+                k += 1
+            else:
+                merged.append(next(rest))
+        replace(parent, merged)
+
+    for op in patch:
+        kind = op["op"]
+        if kind in ("delete", "move", "insert"):
+            continue
+        d = nodes[op["globalid"]].d
+        if kind == "set":
+            value = _copy(op["value"])
+            d[op["key"]] = _typed(op["key"], value) if typed else value
+        elif kind == "unset":
+            d.pop(op["key"], None)
+        elif kind == "param":
+            value = _copy(op["value"])
+            text = list(d["text"])
+            text[op["index"]] = decode_parameter(value) if typed and value.__class__ is dict else value
+            d["text"] = text
+        elif kind == "order":
+            ordered = {key: d[key] for key in op["keys"]}
+            d.clear()
+            d.update(ordered)
+        else:
+            raise ValueError(f"Unknown patch operation {kind!r}")
+    return data
@@ -0,0 +1,200 @@
+import string
+import threading
+from typing import Any, Iterable, Iterator, List, Set
+
+from .validator import _as_dict
+
+CHARSET = string.ascii_letters + string.digits + "!#$%&()*+,-./:;<=>?@[]^_|~"
+"""Characters used for generated globalids; quotes, backslashes and braces are left out."""
+
+
+def encode(number: int, charset: str = CHARSET) -> str:
+    """
+    Turn a counter value into the shortest string for it.
+
+    Uses bijective numbering, so every string over charset appears exactly
+    once: 0 → "a", 1 → "b", ..., len(charset) → "aa".
+
+    Args:
+        number (int): Non-negative counter value.
+        charset (str): Digits of the numbering.
+
+    Returns:
+        str: The encoded id.
+    """
+    base = len(charset)
+    out = []
+    number += 1
+    while number:
+        number, digit = divmod(number - 1, base)
+        out.append(charset[digit])
+    return "".join(reversed(out))
+
+
+def iter_globalids(data: Any) -> Iterator[str]:
+    """
+    Iterate over every globalid in a document.
+
+    Args:
+        data (Any): Decoded root array or a list of ScriptObject.
+
+    Yields:
+        str: globalids of scripts, events and actions, in document order.
+    """
+    for script in data:
+        sd = _as_dict(script) or {}
+        if "globalid" in sd:
+            yield sd["globalid"]
+        for event in sd.get("content") or ():
+            ed = _as_dict(event) or {}
+            if "globalid" in ed:
+                yield ed["globalid"]
+            for action in ed.get("actions") or ():
+                ad = _as_dict(action) or {}
+                if "globalid" in ad:
+                    yield ad["globalid"]
+
+
+class GlobalIdAllocator:
+    """
+    Hands out short globalids that are unique across a document.
+
+    Ids come from a counter encoded over charset, so the first
+    len(charset) ids are one character long, the next len(charset)**2 are
+    two, and so on. Ids already present in the document are kept in a set
+    and skipped; the counter never produces the same id twice, so no other
+    bookkeeping is needed. All methods may be called from several threads.
+    """
+
+    def __init__(self, used: Iterable[str] = (), charset: str = CHARSET, prefix: str = ""):
+        """
+        Args:
+            used (Iterable[str]): globalids that are already taken.
+            charset (str): Characters to build ids from.
+            prefix (str): Prepended to every generated id, e.g. to keep generators apart.
+        """
+        if len(set(charset)) != len(charset) or not charset:
+            raise ValueError("charset must be non-empty and without repeated characters")
+        self.charset = charset
+        self.prefix = prefix
+        self._used: Set[str] = set(used)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_document(cls, data: Any, **kwargs) -> "GlobalIdAllocator":
+        """
+        Create an allocator that avoids every globalid of a document.
+
+        Args:
+            data (Any): Decoded root array or a list of ScriptObject.
+            **kwargs: charset and prefix, passed to the constructor.
+
+        Returns:
+            GlobalIdAllocator: The allocator.
+        """
+        return cls(iter_globalids(data), **kwargs)
+
+    def __contains__(self, globalid: str) -> bool:
+        with self._lock:
+            return globalid in self._used or self._generated(globalid)
+
+    def _generated(self, globalid: str) -> bool:
+        # Whether the counter already produced globalid.
+        prefix = self.prefix
+        if not globalid.startswith(prefix):
+            return False
+        body = globalid[len(prefix):]
+        if not body:
+            return False
+        charset, base = self.charset, len(self.charset)
+        number = 0
+        for ch in body:
+            digit = charset.find(ch)
+            if digit < 0:
+                return False
+            number = number * base + digit + 1
+        return number - 1 < self._next
+
+    def reserve(self, globalid: str) -> bool:
+        """
+        Mark a globalid as taken.
+
+        Args:
+            globalid (str): The id.
+
+        Returns:
+            bool: False if it was already taken or generated.
+        """
+        with self._lock:
+            if globalid in self._used or self._generated(globalid):
+                return False
+            self._used.add(globalid)
+            return True
+
+    def allocate(self) -> str:
+        """Get a fresh globalid."""
+        return self.allocate_many(1)[0]
+
+    __call__ = allocate
+
+    def allocate_many(self, count: int) -> List[str]:
+        """
+        Get several fresh globalids at once.
+
+        Args:
+            count (int): Number of ids.
+
+        Returns:
+            List[str]: The ids, in allocation order.
+        """
+        out: List[str] = []
+        used, prefix, charset = self._used, self.prefix, self.charset
+        with self._lock:
+            n = self._next
+            while len(out) < count:
+                globalid = prefix + encode(n, charset)
+                n += 1
+                if globalid not in used:
+                    out.append(globalid)
+            self._next = n
+        return out
+
+    def assign(self, data: Any) -> int:
+        """
+        Give a fresh globalid to every object in a document whose globalid is missing or repeated.
+
+        The first object using an id keeps it. Every id in the document is
+        reserved before new ones are handed out, so a new id never collides
+        with one that appears later in the document.
+
+        Args:
+            data (Any): Decoded root array or a list of ScriptObject.
+
+        Returns:
+            int: Number of objects that got a new globalid.
+        """
+        for globalid in iter_globalids(data):
+            if globalid.__class__ is str:
+                self.reserve(globalid)
+        seen: Set[str] = set()
+        changed = 0
+
+        def visit(d: dict):
+            nonlocal changed
+            globalid = d.get("globalid")
+            if globalid.__class__ is str and globalid not in seen:
+                seen.add(globalid)
+            else:
+                d["globalid"] = self.allocate()
+                changed += 1
+
+        for script in data:
+            sd = _as_dict(script) or {}
+            visit(sd)
+            for event in sd.get("content") or ():
+                ed = _as_dict(event) or {}
+                visit(ed)
+                for action in ed.get("actions") or ():
+                    visit(_as_dict(action) or {})
+        return changed
@@ -0,0 +1,171 @@
+from typing import Dict
+
+# Event and action IDs as listed in docs/json_format.md.
+# Events and actions use separate ID spaces, so the same number can mean
+# different things depending on where it appears.
+
+EVENTS: Dict[int, str] = {
+    0: "When website loaded...",
+    1: "When <button> pressed...",
+    2: "When <key> pressed...",
+    3: "When mouse enters <object> ...",
+    5: "When mouse leaves <object> ...",
+    6: "Define function <function>",
+    7: "When <donation> bought...",
+    8: "When <input> submitted...",
+    9: "When message received...",
+    10: "When <object> changed...",
+}
+"""Event IDs mapped to their editor descriptions."""
+
+ACTIONS: Dict[int, str] = {
+    0: "Log <any>",
+    1: "Warn <any>",
+    2: "Error <any>",
+    3: "Wait <number> seconds",
+    4: "Redirect to <string>",
+    5: "Play audio <id> → <variable?>",
+    7: "Stop all audio",
+    8: "Make <object> invisible",
+    9: "Make <object> visible",
+    10: "Set <object> text to <string>",
+    11: "Set <variable> to <any>",
+    12: "Increase <variable> by <number>",
+    13: "Decrease <variable> by <number>",
+    14: "Multiply <variable> by <number>",
+    15: "Divide <variable> by <number>",
+    16: "Round <variable>",
+    17: "Floor <variable>",
+    18: "If <any> is equal to <any>",
+    19: "If <any> is not equal to <any>",
+    20: "If <any> is greater than <any>",
+    21: "If <any> is lower than <any>",
+    22: "Repeat <number> times",
+    23: "Repeat forever",
+    24: "Break",
+    25: "end",
+    26: "Play looped audio <id> → <variable?>",
+    27: "Set <var> to random <n> - <n>",
+    30: "Get text from <input> → <variable>",
+    31: "Set <property> of <object> to <any>",
+    32: "Broadcast <message> across page",
+    33: "Broadcast <message> across site",
+    37: "If <string> contains <string>",
+    38: "If <string> doesn't contain <string>",
+    39: "Get <property> of <object> → <variable>",
+    40: "Raise <variable> to the power of <number>",
+    41: "<variable> modulo <number>",
+    42: "Sub <variable> <start> - <end>",
+    43: "Replace <string> in <variable> by <string>",
+    44: "If <variable> AND <variable>",
+    45: "If <variable> OR <variable>",
+    46: "If <variable> NOR <variable>",
+    47: "If <variable> XOR <variable>",
+    48: "Get length of <string> → <variable>",
+    49: "Duplicate <object> → <variable>",
+    50: "Delete <object>",
+    51: "Get local username → <variable>",
+    52: "Get local user ID → <variable>",
+    53: "Get local display name → <variable>",
+    54: "Create table <table>",
+    55: "Set entry <entry> of <table> to <any>",
+    56: "Get entry <entry> of <table> → <variable>",
+    57: "Split <string> <separator> → <table>",
+    58: "Parent <object> under <object>",
+    59: "Get length of <array> → <variable>",
+    63: "Run function in background <function> <tuple>",
+    66: "Set entry <entry> of <table> to <object>",
+    67: "Get query string parameter <string> → <variable>",
+    68: "Get unix timestamp → <variable>",
+    69: "Lower <string> → <variable>",
+    70: "Upper <string> → <variable>",
+    71: "Format current date/time <format> → <variable>",
+    72: "Format from unix <number> <format> → <variable>",
+    73: "Set volume of <variable> to <number>",
+    74: "Stop audio <variable>",
+    75: "Pause audio <variable>",
+    76: "Resume audio <variable>",
+    77: "Set speed of <variable> to <number>",
+    78: "Ceil <variable>",
+    79: "If left mouse button down",
+    80: "If middle mouse button down",
+    81: "If right mouse button down",
+    82: "If <key> down",
+    83: "Get tick → <variable>",
+    84: "Get viewport size → <x> <y>",
+    85: "Get cursor position → <x> <y>",
+    87: "Run function <function> <tuple> → <variable?>",
+    88: "Tween <property> of <object> to <any> - <time> <style> <direction>",
+    89: "Insert <any> at position <number?> of <array>",
+    90: "Delete entry <entry> of <table>",
+    91: "Remove entry at position <number?> of <array>",
+    92: "If <variable> exists",
+    93: "If <variable> doesn't exist",
+    94: "Set <property> of <variable> to <any>",
+    95: "Get <property> of <variable> → <variable>",
+    96: "Delete <variable>",
+    97: "Get parent of <object> → <variable>",
+    98: "Find ancestor named <string> in <object> → <variable>",
+    99: "Find child named <string> in <object> → <variable>",
+    100: "Find descendant named <string> in <object> → <variable>",
+    101: "Get children of <object> → <table>",
+    102: "Get descendants of <object> → <table>",
+    103: "If <object> is ancestor of <object>",
+    104: "If <object> is child of <object>",
+    105: "If <object> is descendant of <object>",
+    106: "Set <object> image to <id>",
+    107: "Set <object> image to avatar of <userid> <resolution?>",
+    108: "If dark theme enabled",
+    109: "Concatenate <string> with <string> → <variable>",
+    110: "Join <array> using <string> → <variable>",
+    112: "else",
+    113: "Iterate through <table> ({l!index},{l!value})",
+    114: "Run math function <function> <tuple> → <variable>",
+    115: "Return <any>",
+    116: "Get server unix timestamp → <variable>",
+    117: "Get URL → <variable>",
+    118: "Get timezone → <variable>",
+    119: "Convert <hex> to RGB → <variable>",
+    120: "Convert <hex> to HSV → <variable>",
+    121: "Convert <RGB> to hex → <variable>",
+    122: "Convert <HSV> to hex → <variable>",
+    123: "Lerp <hex> to <hex> by <alpha> → <variable>",
+    124: "<comment>",
+}
+"""Action IDs mapped to their editor descriptions."""
+
+FUNCTION_EVENT = 6
+"""Event ID of "Define function", the only event allowed to carry variable_overrides."""
+
+COMMENT = 124
+"""Action ID of comments, the only action allowed to carry a help key."""
+
+MAX_ACTIONS = 120
+"""Maximum number of actions per event."""
+
+MAX_TUPLE = 6
+"""Maximum number of parameters in a tuple."""
+
+CANVAS_SIZE = 9992
+"""Width and height of the scripting canvas in pixels."""
+
+END = 25
+"""Action ID of "end", which closes a block."""
+
+ELSE = 112
+"""Action ID of "else", which splits a conditional block."""
+
+BREAK = 24
+"""Action ID of "Break", which leaves the innermost loop."""
+
+RETURN = 115
+"""Action ID of "Return", which leaves the current function."""
+
+LOOPS = frozenset({22, 23, 113})
+"""Action IDs that open a loop block (Repeat, Repeat forever, Iterate)."""
+
+CONDITIONALS = frozenset({18, 19, 20, 21, 37, 38, 44, 45, 46, 47, 79, 80, 81, 82, 92, 93, 103, 104, 105, 108})
+"""Action IDs that open a conditional block and may be followed by else."""
+
+BLOCK_OPENERS = LOOPS | CONDITIONALS
+"""Action IDs that open a block closed by end."""
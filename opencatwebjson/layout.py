@@ -0,0 +1,346 @@
+from array import array
+from heapq import heapify, heappop, heappush
+from typing import Any, List, NamedTuple, Sequence, Set, Tuple
+
+from .classes import GeometryBuffer, ScaleOffset, Size2, Vector2
+from .elements import AspectRatio, Constraint, Padding
+from .literals import Number
+
+INF = float("inf")
+
+_ZERO = ScaleOffset(0, 0)
+_ZERO_POSITION = Vector2(_ZERO, _ZERO)
+_ZERO_SIZE = Size2(_ZERO, _ZERO)
+
+
+class Rects(NamedTuple):
+    """Absolute pixel rectangles, one entry per element."""
+    x: array
+    y: array
+    width: array
+    height: array
+
+    def rect(self, index: int) -> Tuple[float, float, float, float]:
+        """Get (x, y, width, height) of one element."""
+        return self.x[index], self.y[index], self.width[index], self.height[index]
+
+
+def has_box(element: Any) -> bool:
+    """
+    Check whether an element takes part in layout with its own rectangle.
+
+    Args:
+        element (Any): Any element dataclass.
+
+    Returns:
+        bool: True if it has a Vector2 position and a Size2 size.
+    """
+    return isinstance(getattr(element, "position", None), Vector2) and isinstance(getattr(element, "size", None), Size2)
+
+
+class Layout:
+    """
+    Resolves absolute pixel rectangles for an element tree.
+
+    Everything that does not depend on the viewport (scale/offset columns,
+    anchors, padding, constraints and aspect ratios) is extracted once into
+    flat arrays and grouped by tree depth, so resolve() computes each depth
+    level in a batch and can be called cheaply for many viewport sizes.
+
+    Padding, Constraint and AspectRatio elements apply to their parent.
+    Elements without a position and size (modifiers, scripts, outlines)
+    get the content rectangle of their parent. Rotation and List/Grid
+    arrangement are not applied.
+    """
+
+    def __init__(self, elements: Sequence[Any], parents: Sequence[int]):
+        """
+        Args:
+            elements (Sequence[Any]): Element dataclasses, each parent before its children.
+            parents (Sequence[int]): Index of each element's parent, or -1 for top-level elements.
+
+        Raises:
+            ValueError: If the lengths differ or a parent comes after its child.
+        """
+        n = len(elements)
+        if len(parents) != n:
+            raise ValueError("elements and parents must have the same length")
+        self.elements = elements
+        self.parents = array("i", parents)
+        self.geometry = GeometryBuffer()
+        self.box = bytearray(n)
+        self.anchor_x = array("d", bytes(8 * n))
+        self.anchor_y = array("d", bytes(8 * n))
+        # Padding as (scale, offset) per side, relative to the element's own size.
+        self.padding = [array("d", bytes(8 * n)) for _ in range(8)]
+        self.min_width = array("d", bytes(8 * n))
+        self.min_height = array("d", bytes(8 * n))
+        self.max_width = array("d", [INF]) * n
+        self.max_height = array("d", [INF]) * n
+        self.ratio = array("d", bytes(8 * n))
+        self.canvas = [array("d", bytes(8 * n)) for _ in range(4)]
+        self.has_canvas = bytearray(n)
+
+        self.children: List[List[int]] = [[] for _ in range(n)]
+        for i, p in enumerate(self.parents):
+            if p >= i:
+                raise ValueError(f"Parent of element {i} must come before it")
+            if p >= 0:
+                self.children[p].append(i)
+            self.geometry.append(_ZERO_POSITION, _ZERO_SIZE)
+        for i in range(n):
+            self._extract(i)
+
+        self._levels = None
+        self._viewport = None
+        self._rects = None
+        self._content = None
+        self._dirty = set()
+
+    def __len__(self):
+        return len(self.parents)
+
+    def _extract(self, i: int):
+        # Read the layout inputs of a box element and its modifier children.
+        element = self.elements[i]
+        self.box[i] = has_box(element)
+        if not self.box[i]:
+            return
+        self.geometry.set_position(i, element.position)
+        self.geometry.set_size(i, element.size)
+        anchor = getattr(element, "anchor_point", None)
+        self.anchor_x[i], self.anchor_y[i] = anchor if anchor is not None else (0, 0)
+        canvas = getattr(element, "canvas_size", None)
+        self.has_canvas[i] = isinstance(canvas, Size2)
+        if self.has_canvas[i]:
+            for column, value in zip(self.canvas, (canvas.width.scale, canvas.width.offset, canvas.height.scale, canvas.height.offset)):
+                column[i] = value
+        for column in self.padding:
+            column[i] = 0
+        self.min_width[i] = self.min_height[i] = self.ratio[i] = 0
+        self.max_width[i] = self.max_height[i] = INF
+        for c in self.children[i]:
+            modifier = self.elements[c]
+            if isinstance(modifier, Padding):
+                for k, side in enumerate((modifier.left, modifier.right, modifier.top, modifier.bottom)):
+                    self.padding[2 * k][i], self.padding[2 * k + 1][i] = side
+            elif isinstance(modifier, Constraint):
+                self.min_width[i], self.min_height[i] = modifier.minimum_size
+                if modifier.maximum_size != "inf":
+                    self.max_width[i], self.max_height[i] = modifier.maximum_size
+            elif isinstance(modifier, AspectRatio):
+                self.ratio[i] = modifier.ratio
+
+    def _build_levels(self):
+        # Group elements by depth so each level is resolved with one set of
+        # list comprehensions over columns gathered here, once per tree.
+        n = len(self.parents)
+        depth = array("i", bytes(4 * n))
+        levels: List[List[int]] = []
+        for i, p in enumerate(self.parents):
+            d = depth[i] = depth[p] + 1 if p >= 0 else 0
+            if d == len(levels):
+                levels.append([])
+            levels[d].append(i)
+        g = self.geometry
+        columns = (g.x_scale, g.x_offset, g.y_scale, g.y_offset, g.width_scale, g.width_offset,
+                   g.height_scale, g.height_offset, self.anchor_x, self.anchor_y)
+        self._levels = []
+        for level in levels:
+            boxes = [i for i in level if self.box[i]]
+            others = [i for i in level if not self.box[i]]
+            # Parent -1 refers to the viewport, stored after the last element.
+            box_parents = [self.parents[i] if self.parents[i] >= 0 else n for i in boxes]
+            other_parents = [self.parents[i] if self.parents[i] >= 0 else n for i in others]
+            gathered = [[c[i] for i in boxes] for c in columns]
+            constrained = [i for i in boxes if self.min_width[i] or self.min_height[i]
+                           or self.max_width[i] != INF or self.max_height[i] != INF or self.ratio[i]]
+            padded = [i for i in boxes if self.has_canvas[i] or any(c[i] for c in self.padding)]
+            self._levels.append((boxes, box_parents, gathered, constrained, padded, others, other_parents))
+
+    def _constrain(self, i: int, w: float, h: float) -> Tuple[float, float]:
+        w = min(max(w, self.min_width[i]), self.max_width[i])
+        h = min(max(h, self.min_height[i]), self.max_height[i])
+        ratio = self.ratio[i]
+        if ratio > 0 and w > 0 and h > 0:
+            if w / h > ratio:
+                w = h * ratio
+            else:
+                h = w / ratio
+        return w, h
+
+    def _content_rect(self, i: int, x: float, y: float, w: float, h: float) -> Tuple[float, float, float, float]:
+        cw, ch = w, h
+        if self.has_canvas[i]:
+            c = self.canvas
+            cw = c[0][i] * w + c[1][i]
+            ch = c[2][i] * h + c[3][i]
+        pad = self.padding
+        left = pad[0][i] * w + pad[1][i]
+        right = pad[2][i] * w + pad[3][i]
+        top = pad[4][i] * h + pad[5][i]
+        bottom = pad[6][i] * h + pad[7][i]
+        return x + left, y + top, cw - left - right, ch - top - bottom
+
+    def resolve(self, viewport_width: Number, viewport_height: Number) -> Rects:
+        """
+        Compute absolute rectangles for a viewport size.
+
+        Args:
+            viewport_width (Number): Viewport width in pixels.
+            viewport_height (Number): Viewport height in pixels.
+
+        Returns:
+            Rects: Pixel rectangle of every element.
+        """
+        if self._levels is None:
+            self._build_levels()
+        n = len(self.parents)
+        rects = Rects(*(array("d", bytes(8 * n)) for _ in range(4)))
+        # Content rectangles children are placed in; the viewport is entry n.
+        cx, cy, cw, ch = (array("d", bytes(8 * (n + 1))) for _ in range(4))
+        cw[n] = viewport_width
+        ch[n] = viewport_height
+        X, Y, W, H = rects
+
+        for boxes, parents, columns, constrained, padded, others, other_parents in self._levels:
+            if boxes:
+                xs, xo, ys, yo, ws, wo, hs, ho, ax, ay = columns
+                pw = [cw[p] for p in parents]
+                ph = [ch[p] for p in parents]
+                w = [s * a + o for s, o, a in zip(ws, wo, pw)]
+                h = [s * a + o for s, o, a in zip(hs, ho, ph)]
+                if constrained:
+                    pos = {i: k for k, i in enumerate(boxes)}
+                    for i in constrained:
+                        k = pos[i]
+                        w[k], h[k] = self._constrain(i, w[k], h[k])
+                x = [cx[p] + s * a + o - an * v for p, s, a, o, an, v in zip(parents, xs, pw, xo, ax, w)]
+                y = [cy[p] + s * a + o - an * v for p, s, a, o, an, v in zip(parents, ys, ph, yo, ay, h)]
+                for i, a, b, c, d in zip(boxes, x, y, w, h):
+                    X[i] = cx[i] = a
+                    Y[i] = cy[i] = b
+                    W[i] = cw[i] = c
+                    H[i] = ch[i] = d
+                for i in padded:
+                    cx[i], cy[i], cw[i], ch[i] = self._content_rect(i, X[i], Y[i], W[i], H[i])
+            for i, p in zip(others, other_parents):
+                X[i] = cx[i] = cx[p]
+                Y[i] = cy[i] = cy[p]
+                W[i] = cw[i] = cw[p]
+                H[i] = ch[i] = ch[p]
+        self._viewport = (viewport_width, viewport_height)
+        self._rects = rects
+        self._content = Rects(cx, cy, cw, ch)
+        self._dirty.clear()
+        return rects
+
+    @property
+    def rects(self) -> Rects:
+        """Rectangles from the last resolve() or relayout(), or None before the first."""
+        return self._rects
+
+    def mark_dirty(self, index: int):
+        """
+        Re-read an element after it was changed or replaced in elements.
+
+        The element and its subtree are recomputed by the next relayout().
+        Changing a Padding, Constraint or AspectRatio marks its parent.
+
+        Args:
+            index (int): Index of the changed element.
+        """
+        p = self.parents[index]
+        if not has_box(self.elements[index]) and p >= 0:
+            index = p
+        self._extract(index)
+        self._levels = None
+        self._dirty.add(index)
+
+    def _resolve_node(self, i: int) -> bool:
+        # Recompute one element from its parent's current content rectangle.
+        # Returns True if its rectangle or content rectangle changed.
+        rects, content = self._rects, self._content
+        p = self.parents[i]
+        if p < 0:
+            p = len(self.parents)
+        px, py, pw, ph = content.x[p], content.y[p], content.width[p], content.height[p]
+        if self.box[i]:
+            g = self.geometry
+            w, h = self._constrain(i, g.width_scale[i] * pw + g.width_offset[i], g.height_scale[i] * ph + g.height_offset[i])
+            x = px + g.x_scale[i] * pw + g.x_offset[i] - self.anchor_x[i] * w
+            y = py + g.y_scale[i] * ph + g.y_offset[i] - self.anchor_y[i] * h
+            new_content = self._content_rect(i, x, y, w, h)
+        else:
+            x, y, w, h = new_content = px, py, pw, ph
+        old = rects.rect(i)
+        old_content = content.rect(i)
+        rects.x[i], rects.y[i], rects.width[i], rects.height[i] = x, y, w, h
+        content.x[i], content.y[i], content.width[i], content.height[i] = new_content
+        return old != (x, y, w, h) or old_content != new_content
+
+    def relayout(self, viewport_width: Number, viewport_height: Number) -> Set[int]:
+        """
+        Bring the cached rectangles up to date, recomputing only what changed.
+
+        Only elements marked dirty are recomputed, and their children are
+        only visited when the rectangle they are placed in actually moved or
+        resized, so the work is limited to the affected subtrees. A new
+        viewport size falls back to a full batched resolve().
+
+        Args:
+            viewport_width (Number): Viewport width in pixels.
+            viewport_height (Number): Viewport height in pixels.
+
+        Returns:
+            Set[int]: Indices of elements whose rectangle changed.
+        """
+        n = len(self.parents)
+        if self._rects is None:
+            self.resolve(viewport_width, viewport_height)
+            return set(range(n))
+        if self._viewport != (viewport_width, viewport_height):
+            # Nearly everything depends on the viewport, so the batched full
+            # pass is cheaper than walking the tree node by node.
+            old = self._rects
+            new = self.resolve(viewport_width, viewport_height)
+            return {i for i, a, b, c, d, e, f, g, h in zip(range(n), *old, *new) if (a, b, c, d) != (e, f, g, h)}
+        queue = list(self._dirty)
+        self._dirty.clear()
+
+        # Parents always have lower indices than their children, so a heap
+        # ordered by index processes every parent before its descendants.
+        heapify(queue)
+        changed: Set[int] = set()
+        visited: Set[int] = set()
+        rects = self._rects
+        while queue:
+            i = heappop(queue)
+            if i in visited:
+                continue
+            visited.add(i)
+            before = rects.rect(i)
+            if self._resolve_node(i):
+                if rects.rect(i) != before:
+                    changed.add(i)
+                for c in self.children[i]:
+                    heappush(queue, c)
+        return changed
+
+
+def layout(elements: Sequence[Any], parents: Sequence[int], viewport_width: Number, viewport_height: Number) -> Rects:
+    """
+    Compute absolute rectangles for an element tree and one viewport size.
+
+    Use Layout directly to resolve the same tree for several viewports.
+
+    Args:
+        elements (Sequence[Any]): Element dataclasses, each parent before its children.
+        parents (Sequence[int]): Index of each element's parent, or -1 for top-level elements.
+        viewport_width (Number): Viewport width in pixels.
+        viewport_height (Number): Viewport height in pixels.
+
+    Returns:
+        Rects: Pixel rectangle of every element.
+    """
+    return Layout(elements, parents).resolve(viewport_width, viewport_height)
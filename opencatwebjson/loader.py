@@ -0,0 +1,491 @@
+import re
+from dataclasses import MISSING, fields
+from functools import partial
+from typing import IO, Any, Callable, Dict, Iterator, List, Tuple, Type, TypeVar, Union
+
+import orjson
+
+from .classes import INTERN_CACHE, ColorGradient, GradientStop, HexColor, Range01, Rotation, ScaleOffset, Size2, TransparencyGradient, Vector2
+from .literals import CanvasSize, MaxSize, Tuple2, Vec2
+from .script import Action, Event, Parameter, ScriptObject
+
+JSONInput = Union[bytes, bytearray, memoryview, str]
+T = TypeVar("T")
+
+_new = object.__new__
+
+# Matches a complete or truncated JSON string, or a single bracket.
+# Group 1 is None when the string is cut off by the end of the buffer.
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*(")?|[\[\]{}]', re.S)
+
+
+def decode_parameter(raw: dict) -> Parameter:
+    """
+    Turn a decoded parameter dictionary into a Parameter.
+
+    The dictionary is adopted as the instance dictionary, not copied.
+
+    Args:
+        raw (dict): Decoded parameter object.
+
+    Returns:
+        Parameter: The typed parameter.
+    """
+    value = raw.get("value")
+    if value.__class__ is list:
+        raw["value"] = [decode_parameter(v) if v.__class__ is dict else v for v in value]
+    obj = _new(Parameter)
+    obj.__dict__ = raw
+    return obj
+
+
+def _decode_text(text):
+    return [decode_parameter(i) if i.__class__ is dict else i for i in text]
+
+
+def decode_action(raw: dict) -> Action:
+    """
+    Turn a decoded action dictionary into an Action.
+
+    Args:
+        raw (dict): Decoded action object.
+
+    Returns:
+        Action: The typed action.
+    """
+    text = raw.get("text")
+    if text.__class__ is list:
+        raw["text"] = _decode_text(text)
+    obj = _new(Action)
+    obj.__dict__ = raw
+    return obj
+
+
+def decode_event(raw: dict) -> Event:
+    """
+    Turn a decoded event dictionary into an Event, including its actions.
+
+    Args:
+        raw (dict): Decoded event object.
+
+    Returns:
+        Event: The typed event.
+    """
+    text = raw.get("text")
+    if text.__class__ is list:
+        raw["text"] = _decode_text(text)
+    actions = raw.get("actions")
+    if actions.__class__ is list:
+        raw["actions"] = [decode_action(a) if a.__class__ is dict else a for a in actions]
+    overrides = raw.get("variable_overrides")
+    if overrides.__class__ is list:
+        raw["variable_overrides"] = [decode_parameter(p) if p.__class__ is dict else p for p in overrides]
+    obj = _new(Event)
+    obj.__dict__ = raw
+    return obj
+
+
+def decode_script(raw: dict) -> ScriptObject:
+    """
+    Turn a decoded script dictionary into a ScriptObject, including its events.
+
+    Args:
+        raw (dict): Decoded script object.
+
+    Returns:
+        ScriptObject: The typed script.
+
+    Raises:
+        ValueError: If raw is not a JSON object.
+    """
+    if raw.__class__ is not dict:
+        raise ValueError("Script must be an object")
+    content = raw.get("content")
+    if content.__class__ is list:
+        raw["content"] = [decode_event(e) if e.__class__ is dict else e for e in content]
+    obj = _new(ScriptObject)
+    obj.__dict__ = raw
+    return obj
+
+
+class _LazyField:
+    # Data descriptor that decodes one field of a lazy instance on first read.
+    # The decoded value replaces the raw one in the instance dictionary, so the
+    # next read finds it already decoded and serialization is unaffected.
+
+    __slots__ = ("name", "decode", "is_raw", "default")
+
+    def __init__(self, name: str, decode: Callable[[Any], Any], is_raw: Callable[[Any], bool], default: Any = MISSING):
+        self.name = name
+        self.decode = decode
+        self.is_raw = is_raw
+        self.default = default
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        d = obj.__dict__
+        value = d.get(self.name, MISSING)
+        if value is MISSING:
+            if self.default is MISSING:
+                raise AttributeError(f"{owner.__name__} has no value for {self.name!r}")
+            return self.default
+        if self.is_raw(value):
+            value = d[self.name] = self.decode(value)
+        return value
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+
+def _restore(cls: type, state: dict) -> Any:
+    # Unpickle an instance of cls without calling __init__.
+    obj = _new(cls)
+    obj.__dict__ = state
+    return obj
+
+
+def _variant(cls: type, namespace: Dict[str, Any]) -> type:
+    # A subclass of the dataclass cls that serializes and compares exactly like cls.
+    compared = tuple(f.name for f in fields(cls) if f.compare)
+
+    def __reduce__(self):
+        # The subclass poses as cls, so pickle cannot find it by name; it is
+        # pickled as a plain, editable instance of cls instead.
+        return _restore, (cls, dict(self.__dict__))
+
+    def __eq__(self, other):
+        # The generated dataclass __eq__ requires identical classes, so
+        # variants compare field by field with cls and with each other.
+        if getattr(other.__class__, "_variant_of", other.__class__) is not cls:
+            return NotImplemented
+        return tuple(getattr(self, n) for n in compared) == tuple(getattr(other, n) for n in compared)
+
+    # orjson only writes a dataclass from its __dict__ when the class itself
+    # declares the fields, so the subclass serializes exactly like cls.
+    namespace.update(
+        __dataclass_fields__=cls.__dataclass_fields__,
+        __module__=cls.__module__,
+        __qualname__=cls.__qualname__,
+        __doc__=cls.__doc__,
+        __eq__=__eq__,
+        __hash__=None,
+        _variant_of=cls,
+    )
+    namespace.setdefault("__reduce__", __reduce__)
+    return type(cls.__name__, (cls,), namespace)
+
+
+def _lazy_subclass(cls: type, lazy_fields: Dict[str, Tuple[Callable[[Any], Any], Callable[[Any], bool]]]) -> type:
+    defaults = {f.name: f.default for f in fields(cls)}
+    namespace: Dict[str, Any] = {
+        name: _LazyField(name, decode, is_raw, defaults.get(name, MISSING))
+        for name, (decode, is_raw) in lazy_fields.items()
+    }
+
+    def __reduce__(self):
+        # Decode every pending field, so the plain instance of cls is complete.
+        d = self.__dict__
+        for name in lazy_fields:
+            if name in d:
+                getattr(self, name)
+        return _restore, (cls, dict(d))
+
+    namespace["__reduce__"] = __reduce__
+    return _variant(cls, namespace)
+
+
+def _holds_dicts(value: Any) -> bool:
+    # A text, actions or content list that still holds undecoded objects.
+    if value.__class__ is not list:
+        return False
+    for item in value:
+        if item.__class__ is dict:
+            return True
+    return False
+
+
+def _lazy(cls: type, raw: dict) -> Any:
+    obj = _new(cls)
+    obj.__dict__ = raw
+    return obj
+
+
+_LazyAction = _lazy_subclass(Action, {"text": (_decode_text, _holds_dicts)})
+_LazyEvent = _lazy_subclass(Event, {
+    "text": (_decode_text, _holds_dicts),
+    "actions": (lambda v: [_lazy(_LazyAction, a) if a.__class__ is dict else a for a in v], _holds_dicts),
+    "variable_overrides": (_decode_text, _holds_dicts),
+})
+_LazyScriptObject = _lazy_subclass(ScriptObject, {
+    "content": (lambda v: [_lazy(_LazyEvent, e) if e.__class__ is dict else e for e in v], _holds_dicts),
+})
+
+
+def _decode_lazy_script(raw: dict) -> ScriptObject:
+    if raw.__class__ is not dict:
+        raise ValueError("Script must be an object")
+    return _lazy(_LazyScriptObject, raw)
+
+
+def loads(data: JSONInput, lazy: bool = False) -> List[ScriptObject]:
+    """
+    Parse CatWeb script JSON into typed objects.
+
+    In lazy mode, the events of a script, the actions of an event and the
+    parameters of a text array are only turned into typed objects when
+    that attribute is first read. Code that works on instance dictionaries
+    (validate, analyze, the compiler) sees the raw decoded values instead
+    and never triggers decoding. Pickling decodes everything and gives
+    plain objects.
+
+    Args:
+        data (JSONInput): JSON document whose root is an array of scripts.
+        lazy (bool): Decode nested objects on first access.
+
+    Returns:
+        List[ScriptObject]: The decoded scripts.
+
+    Raises:
+        ValueError: If the JSON is malformed or the root is not an array.
+    """
+    root = orjson.loads(data)
+    if root.__class__ is not list:
+        raise ValueError("Root must be an array")
+    decode = _decode_lazy_script if lazy else decode_script
+    return [decode(s) for s in root]
+
+
+def load(fp: IO, lazy: bool = False) -> List[ScriptObject]:
+    """
+    Parse CatWeb script JSON from a file object.
+
+    Args:
+        fp (IO): Binary or text file object.
+        lazy (bool): Decode nested objects on first access, see loads.
+
+    Returns:
+        List[ScriptObject]: The decoded scripts.
+    """
+    return loads(fp.read(), lazy)
+
+
+def _outside_items(gap: bytes, depth: int, state: List[bool]):
+    # Check the bytes between root-level tokens: only whitespace before the
+    # root array, and whitespace with one comma between two scripts.
+    # state holds whether a script has been read and whether a comma followed it.
+    gap = gap.translate(None, b" \t\r\n")
+    if not gap:
+        return
+    if depth == 0:
+        raise ValueError("Root must be an array")
+    for c in gap:
+        if c != 0x2C:
+            raise ValueError("Script must be an object")
+        if not state[0] or state[1]:
+            raise ValueError("Invalid JSON: unexpected comma in the root array")
+        state[1] = True
+
+
+def iter_items(fp: IO, chunk_size: int = 65536) -> Iterator[bytes]:
+    """
+    Yield the raw bytes of each object in the root array of a JSON file.
+
+    Only the current item is buffered, so the whole document never has
+    to be held in memory. The root array is checked like loads does, but
+    the items themselves are only parsed by the caller.
+
+    Args:
+        fp (IO): Binary or text file object.
+        chunk_size (int): Number of bytes or characters read at a time.
+
+    Yields:
+        bytes: Raw JSON of one root-level object.
+
+    Raises:
+        ValueError: If the root is not an array, an item is not an object, or the data ends early or continues after the root.
+    """
+    buf = bytearray()
+    pos = start = depth = 0
+    # Whether a script has been read, and whether a comma has followed it.
+    state = [False, False]
+    search = _TOKEN.search
+    while True:
+        chunk = fp.read(chunk_size)
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        if not chunk:
+            raise ValueError("Unexpected end of JSON data")
+        keep = start if depth >= 2 else pos
+        del buf[:keep]
+        pos -= keep
+        start -= keep
+        buf += chunk
+        while True:
+            m = search(buf, pos)
+            if m is None:
+                if depth <= 1:
+                    _outside_items(bytes(buf[pos:]), depth, state)
+                pos = len(buf)
+                break
+            c = buf[m.start()]
+            if depth <= 1:
+                _outside_items(bytes(buf[pos:m.start()]), depth, state)
+            if c == 0x22:
+                if m.group(1) is None:
+                    pos = m.start()
+                    break
+                if depth <= 1:
+                    raise ValueError("Root must be an array" if depth == 0 else "Script must be an object")
+            elif c == 0x5B or c == 0x7B:
+                if depth == 0 and c != 0x5B:
+                    raise ValueError("Root must be an array")
+                if depth == 1:
+                    if c != 0x7B:
+                        raise ValueError("Script must be an object")
+                    if state[0] and not state[1]:
+                        raise ValueError("Invalid JSON: expected a comma between scripts")
+                depth += 1
+                if depth == 2:
+                    start = m.start()
+            else:
+                if depth == 0:
+                    raise ValueError("Root must be an array")
+                if depth == 1 and (c != 0x5D or state[1]):
+                    raise ValueError("Invalid JSON: unexpected end of the root array")
+                depth -= 1
+                if depth == 1:
+                    state[0], state[1] = True, False
+                    yield bytes(buf[start:m.end()])
+                elif depth == 0:
+                    _after_root(bytes(buf[m.end():]), fp, chunk_size)
+                    return
+            pos = m.end()
+
+
+def _after_root(rest: bytes, fp: IO, chunk_size: int):
+    # Only whitespace may follow the root array.
+    while True:
+        if rest.strip(b" \t\r\n"):
+            raise ValueError("Invalid JSON: unexpected data after the root array")
+        rest = fp.read(chunk_size)
+        if not rest:
+            return
+        if isinstance(rest, str):
+            rest = rest.encode()
+
+
+def iterload(fp: IO, chunk_size: int = 65536, lazy: bool = False) -> Iterator[ScriptObject]:
+    """
+    Incrementally parse CatWeb script JSON, one script at a time.
+
+    Args:
+        fp (IO): Binary or text file object.
+        chunk_size (int): Number of bytes or characters read at a time.
+        lazy (bool): Decode nested objects on first access, see loads.
+
+    Yields:
+        ScriptObject: Each decoded script in document order.
+
+    Raises:
+        ValueError: On the documents loads rejects, once the stream reaches the problem.
+    """
+    decode = _decode_lazy_script if lazy else decode_script
+    for item in iter_items(fp, chunk_size):
+        yield decode(orjson.loads(item))
+
+
+def iterevents(fp: IO, chunk_size: int = 65536) -> Iterator[Tuple[ScriptObject, Event]]:
+    """
+    Incrementally parse CatWeb script JSON, one event at a time.
+
+    Each script is released once all of its events have been yielded.
+
+    Args:
+        fp (IO): Binary or text file object.
+        chunk_size (int): Number of bytes or characters read at a time.
+
+    Yields:
+        Tuple[ScriptObject, Event]: The owning script and one of its events.
+    """
+    for script in iterload(fp, chunk_size):
+        for event in script.content:
+            yield script, event
+
+
+def _size2(v) -> Size2:
+    return Size2(ScaleOffset(*v[0]), ScaleOffset(*v[1]))
+
+
+_VALUE_DECODERS: Dict[Any, Callable[[Any], Any]] = {
+    HexColor: partial(INTERN_CACHE.get, HexColor),
+    Range01: partial(INTERN_CACHE.get, Range01),
+    Rotation: Rotation,
+    Vector2: lambda v: Vector2(ScaleOffset(*v[0]), ScaleOffset(*v[1])),
+    Size2: _size2,
+    Vec2: lambda v: Vec2(*v),
+    Tuple2: tuple,
+    CanvasSize: lambda v: v if isinstance(v, str) else _size2(v),
+    MaxSize: lambda v: v if isinstance(v, str) else tuple(v),
+    TransparencyGradient: lambda v: TransparencyGradient([GradientStop(p, x) for p, x in v]),
+    ColorGradient: lambda v: ColorGradient([GradientStop(p, x) for p, x in v]),
+}
+
+# Fields typed as plain str that repeat across a site and are worth sharing.
+_INTERNED_FIELDS = {"font": partial(INTERN_CACHE.get, str)}
+
+# Raw JSON types of each value class; anything else has already been decoded.
+_RAW_TYPES: Dict[Any, Tuple[type, ...]] = {HexColor: (str,), Range01: (int, float), Rotation: (int, float)}
+
+_element_plans: Dict[type, List[Tuple[str, Callable[[Any], Any]]]] = {}
+_lazy_elements: Dict[type, type] = {}
+
+
+def _lazy_element_class(cls: type) -> type:
+    lazy_cls = _lazy_elements.get(cls)
+    if lazy_cls is None:
+        lazy_fields = {}
+        for f in fields(cls):
+            decode = _VALUE_DECODERS.get(f.type)
+            if decode is not None:
+                raw_types = _RAW_TYPES.get(f.type, (list,))
+                lazy_fields[f.name] = (decode, lambda v, raw_types=raw_types: v.__class__ in raw_types)
+        lazy_cls = _lazy_elements[cls] = _lazy_subclass(cls, lazy_fields)
+    return lazy_cls
+
+
+def decode_element(cls: Type[T], raw: dict, lazy: bool = False) -> T:
+    """
+    Turn a decoded element dictionary back into an element dataclass.
+
+    This is the inverse of serializer.dumps for the classes in elements.py.
+    Colors, transparencies and fonts are shared through the process-wide
+    intern cache in classes.py. raw itself is left unchanged.
+
+    In lazy mode, raw is adopted as the instance dictionary of a subclass
+    of cls instead, so it is consumed, and colors, vectors, sizes, ranges,
+    rotations and gradients are only built when their attribute is first
+    read. Missing keys are not reported until they are read, and fonts are
+    not interned.
+
+    Args:
+        cls (Type[T]): Element class, e.g. Frame or Button.
+        raw (dict): Decoded element object.
+        lazy (bool): Build value objects on first access.
+
+    Returns:
+        T: The element instance.
+    """
+    if lazy:
+        return _lazy(_lazy_element_class(cls), raw)
+    plan = _element_plans.get(cls)
+    if plan is None:
+        plan = _element_plans[cls] = [
+            (f.name, _VALUE_DECODERS.get(f.type) or _INTERNED_FIELDS[f.name])
+            for f in fields(cls) if f.type in _VALUE_DECODERS or f.name in _INTERNED_FIELDS
+        ]
+    kwargs = dict(raw)
+    for name, decode in plan:
+        if name in kwargs:
+            kwargs[name] = decode(kwargs[name])
+    return cls(**kwargs)
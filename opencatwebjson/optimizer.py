@@ -0,0 +1,299 @@
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+from .blocks import BlockTable, action_id, match_blocks
+from .compiler import CONST, compile_operand
+from .ids import ACTIONS, BREAK, COMMENT, CONDITIONALS, MAX_ACTIONS, RETURN
+from .loader import decode_action, decode_parameter
+from .runtime import _lua_round, to_number, to_string
+from .validator import _as_dict
+
+SET = 11
+"""Action ID of "Set <variable> to <any>"."""
+
+# Variable updates with a literal operand, as the runtime evaluates them.
+_FOLDS: Dict[int, Callable[[float, float], float]] = {
+    12: lambda a, b: a + b,
+    13: lambda a, b: a - b,
+    14: lambda a, b: a * b,
+    15: lambda a, b: a / b,
+    16: lambda a, b: float(_lua_round(a)),
+    17: lambda a, b: float(math.floor(a)),
+    40: lambda a, b: a ** b,
+    41: lambda a, b: a % b,
+    78: lambda a, b: float(math.ceil(a)),
+}
+
+# Conditions whose negation is another action with the same operands.
+_INVERSE = {18: 19, 19: 18, 37: 38, 38: 37, 45: 46, 46: 45, 92: 93, 93: 92}
+
+_PLACEHOLDER = re.compile(r"<[^>]+>")
+
+
+class EventReport(NamedTuple):
+    """Slot usage of one event before and after optimization."""
+    script: int
+    event: int
+    globalid: Optional[str]
+    before: int
+    after: int
+
+    @property
+    def saved(self) -> int:
+        """Number of action slots freed."""
+        return self.before - self.after
+
+    @property
+    def fits(self) -> bool:
+        """True if the event is within the action limit after optimization."""
+        return self.after <= MAX_ACTIONS
+
+
+@dataclass
+class OptimizationReport:
+    """
+    Result of an optimization pass.
+
+    Attributes:
+        events (List[EventReport]): One entry per event, in document order.
+    """
+    events: List[EventReport] = field(default_factory=list)
+
+    @property
+    def before(self) -> int:
+        """Total number of actions before optimization."""
+        return sum(e.before for e in self.events)
+
+    @property
+    def after(self) -> int:
+        """Total number of actions after optimization."""
+        return sum(e.after for e in self.events)
+
+
+def _params(action: dict) -> List[Any]:
+    return [p for p in action.get("text") or () if p.__class__ is not str]
+
+
+def _rebuild(original: Any, d: dict) -> Any:
+    # Keep the representation of the input: dictionaries stay dictionaries.
+    return d if original.__class__ is dict else decode_action(d)
+
+
+def _with_value(action: Any, index: int, value: str) -> Any:
+    # Copy of an action whose index-th parameter has a new value.
+    d = dict(_as_dict(action))
+    text = list(d["text"])
+    seen = -1
+    for i, item in enumerate(text):
+        if item.__class__ is not str:
+            seen += 1
+            if seen == index:
+                p = dict(_as_dict(item))
+                p["value"] = value
+                text[i] = p if item.__class__ is dict else decode_parameter(p)
+                break
+    d["text"] = text
+    return _rebuild(action, d)
+
+
+def _inverted(action: Any, aid: int) -> Any:
+    # Copy of a condition with the negated ID and a matching descriptor.
+    d = dict(_as_dict(action))
+    params = _params(d)
+    literals = _PLACEHOLDER.split(ACTIONS[aid])
+    text: List[Any] = []
+    for k, literal in enumerate(literals):
+        literal = literal.strip()
+        if literal:
+            text.append(literal)
+        if k < len(params):
+            text.append(params[k])
+    d["id"] = str(aid)
+    d["text"] = text
+    return _rebuild(action, d)
+
+
+def _constant(p: Any) -> Any:
+    # The literal value of a parameter, or None if it reads variables.
+    o = compile_operand(p)
+    return o.data if o.kind == CONST and o.data.__class__ is not list else None
+
+
+def fold_constants(actions: List[Any]) -> List[Any]:
+    """
+    Merge a Set with a literal and the updates of the same variable right after it.
+
+    "Set x to 5", "Increase x by 2", "Multiply x by 3" becomes "Set x to 21".
+    Results are computed exactly as the runtime would, and written back as
+    the text the runtime would display them as. A chain stops before any
+    update that would produce NaN, infinity or a complex number.
+
+    Args:
+        actions (List[Any]): Action dictionaries or Action objects of one event.
+
+    Returns:
+        List[Any]: The folded actions; unchanged actions are the same objects.
+    """
+    out: List[Any] = []
+    n = len(actions)
+    i = 0
+    while i < n:
+        action = actions[i]
+        d = _as_dict(action)
+        if action_id(d) == SET:
+            params = _params(d)
+            value = _constant(params[1]) if len(params) > 1 else None
+            slot = compile_operand(params[0]).slot if params else None
+            if value is not None and slot is not None:
+                current = to_number(value)
+                j = i + 1
+                while j < n:
+                    nd = _as_dict(actions[j])
+                    fold = _FOLDS.get(action_id(nd))
+                    if fold is None:
+                        break
+                    nparams = _params(nd)
+                    if not nparams or compile_operand(nparams[0]).slot != slot:
+                        break
+                    operand = _constant(nparams[1]) if len(nparams) > 1 else 0
+                    if operand is None:
+                        break
+                    try:
+                        result = fold(to_number(current), to_number(operand))
+                    except (ZeroDivisionError, OverflowError, ValueError):
+                        break
+                    if result.__class__ not in (int, float) or not math.isfinite(result):
+                        break
+                    current = result
+                    j += 1
+                if j > i + 1:
+                    out.append(_with_value(action, 1, to_string(current)))
+                    i = j
+                    continue
+        out.append(action)
+        i += 1
+    return out
+
+
+def remove_dead_code(actions: List[Any], table: BlockTable) -> List[Any]:
+    """
+    Drop the actions after a Break or Return up to the end of its block.
+
+    Nested blocks in the unreachable part are dropped whole, so the result
+    stays balanced.
+
+    Args:
+        actions (List[Any]): Action dictionaries or Action objects of one event.
+        table (BlockTable): match_blocks result for actions, without errors.
+
+    Returns:
+        List[Any]: The remaining actions.
+    """
+    out: List[Any] = []
+    depth, ids = table.depth, table.ids
+    dead = -1
+    for pc, action in enumerate(actions):
+        if dead >= 0:
+            if depth[pc] >= dead:
+                continue
+            dead = -1
+        out.append(action)
+        if ids[pc] == BREAK or ids[pc] == RETURN:
+            dead = depth[pc]
+    return out
+
+
+def simplify_blocks(actions: List[Any], table: BlockTable) -> List[Any]:
+    """
+    Remove empty conditionals and empty else branches.
+
+    An if whose both branches are empty is removed with its else and end,
+    an empty else branch loses the else, and an empty true branch with a
+    non-empty else is turned into the negated condition where one exists
+    (equal/not equal, contains/doesn't contain, OR/NOR, exists/doesn't
+    exist), which frees the else slot. Conditions have no side effects, so
+    behavior is unchanged. Run repeatedly to also remove ifs that became
+    empty.
+
+    Args:
+        actions (List[Any]): Action dictionaries or Action objects of one event.
+        table (BlockTable): match_blocks result for actions, without errors.
+
+    Returns:
+        List[Any]: The simplified actions.
+    """
+    removed: Set[int] = set()
+    replaced: Dict[int, Any] = {}
+    for pc, op in enumerate(table.ids):
+        if op not in CONDITIONALS:
+            continue
+        e, end = table.else_of[pc], table.end_of[pc]
+        true_empty = (e if e != -1 else end) == pc + 1
+        if e == -1:
+            if true_empty:
+                removed.update((pc, end))
+        elif end == e + 1:
+            removed.update((pc, e, end) if true_empty else (e,))
+        elif true_empty and op in _INVERSE:
+            removed.add(e)
+            replaced[pc] = _inverted(actions[pc], _INVERSE[op])
+    return [replaced.get(pc, a) for pc, a in enumerate(actions) if pc not in removed]
+
+
+def optimize_actions(actions: Iterable[Any], release: bool = False) -> List[Any]:
+    """
+    Run every optimization on the actions of one event.
+
+    Args:
+        actions (Iterable[Any]): Action dictionaries or Action objects.
+        release (bool): Also remove comments (ID: 124).
+
+    Returns:
+        List[Any]: A new list of actions. Events with unbalanced blocks only get comment removal and folding.
+    """
+    actions = list(actions)
+    if release:
+        actions = [a for a in actions if action_id(a) != COMMENT]
+    actions = fold_constants(actions)
+    while True:
+        table = match_blocks(actions)
+        if table.errors:
+            return actions
+        reduced = remove_dead_code(actions, table)
+        if len(reduced) == len(actions):
+            reduced = simplify_blocks(actions, table)
+        if len(reduced) == len(actions):
+            return reduced
+        actions = reduced
+
+
+def optimize(scripts: Iterable[Any], release: bool = False) -> OptimizationReport:
+    """
+    Optimize every event of a document in place and report the slots used.
+
+    Each event whose actions change gets a new actions list; the old list
+    is left as it was.
+
+    Args:
+        scripts (Iterable[Any]): ScriptObject instances or decoded script dictionaries.
+        release (bool): Also remove comments (ID: 124).
+
+    Returns:
+        OptimizationReport: Action counts per event before and after.
+    """
+    report = OptimizationReport()
+    for si, script in enumerate(scripts):
+        for ei, event in enumerate((_as_dict(script) or {}).get("content") or ()):
+            ed = _as_dict(event)
+            if ed is None:
+                continue
+            actions = ed.get("actions")
+            if actions.__class__ is not list:
+                continue
+            optimized = optimize_actions(actions, release)
+            if len(optimized) != len(actions) or any(a is not b for a, b in zip(optimized, actions)):
+                ed["actions"] = optimized
+            report.events.append(EventReport(si, ei, ed.get("globalid"), len(actions), len(optimized)))
+    return report
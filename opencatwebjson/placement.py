@@ -0,0 +1,207 @@
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .ids import CANVAS_SIZE, FUNCTION_EVENT
+from .validator import _as_dict
+
+EVENT_WIDTH = 350
+"""Default editor width of an event."""
+
+FUNCTION_WIDTH = 722
+"""Default editor width of a function definition (ID: 6)."""
+
+HEADER_HEIGHT = 60
+"""Estimated height of an event's header row."""
+
+ACTION_HEIGHT = 40
+"""Estimated height of one action row."""
+
+
+def _number(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def event_size(event: Any) -> Tuple[float, float]:
+    """
+    Estimate the size of an event block in the editor.
+
+    Args:
+        event (Any): Event instance or dictionary.
+
+    Returns:
+        Tuple[float, float]: Width from the event's width key, height from its number of actions.
+    """
+    d = _as_dict(event)
+    default = FUNCTION_WIDTH if str(d.get("id")) == str(FUNCTION_EVENT) else EVENT_WIDTH
+    width = _number(d.get("width"), default)
+    return width, HEADER_HEIGHT + ACTION_HEIGHT * len(d.get("actions") or ())
+
+
+class CanvasPlacer:
+    """
+    Places events on the scripting canvas as close to its center as possible without overlaps.
+
+    The canvas is divided into square cells, and each row of cells is kept
+    as an integer bitmask. For a candidate row, the rows the block would
+    cover are ORed together and dilated by the block width plus the gap,
+    which yields every free column of that row in a handful of integer
+    operations. The nearest free column is then found with bit tricks.
+    Rows are visited outward from the centered position, and the search
+    stops once no remaining row can beat the best position found.
+
+    Occupancy only grows, so the distance of a row's nearest free column
+    never shrinks for a given block size. Those distances are remembered
+    per block size as lower bounds, and rows that cannot beat the current
+    best are skipped without being scanned. This keeps placement close to
+    constant time per event as the canvas fills up.
+
+    Event heights are estimated from the number of actions (see event_size).
+    """
+
+    def __init__(self, events: Iterable[Any] = (), cell: int = 25, gap: int = 50):
+        """
+        Args:
+            events (Iterable[Any]): Events already on the canvas, whose space is reserved.
+            cell (int): Cell size in pixels; positions are multiples of it.
+            gap (int): Minimum free space between events in pixels.
+        """
+        self.cell = cell
+        self.gap = -(-gap // cell)
+        self.cells = CANVAS_SIZE // cell
+        self.rows: List[int] = [0] * self.cells
+        self._bounds: Dict[Tuple[int, int], array] = {}
+        for event in events:
+            d = _as_dict(event)
+            width, height = event_size(d)
+            self.reserve(_number(d.get("x"), 0), _number(d.get("y"), 0), width, height)
+
+    def _span(self, size: float) -> int:
+        return max(1, -(-int(size) // self.cell))
+
+    def reserve(self, x: float, y: float, width: float, height: float):
+        """
+        Mark a rectangle of the canvas as taken.
+
+        Args:
+            x (float): Left edge in pixels.
+            y (float): Top edge in pixels.
+            width (float): Width in pixels.
+            height (float): Height in pixels.
+        """
+        cell = self.cell
+        x0, y0 = max(int(x) // cell, 0), max(int(y) // cell, 0)
+        x1 = min(-(-int(x + width) // cell), self.cells)
+        y1 = min(-(-int(y + height) // cell), self.cells)
+        if x1 <= x0:
+            return
+        mask = ((1 << (x1 - x0)) - 1) << x0
+        rows = self.rows
+        for r in range(y0, y1):
+            rows[r] |= mask
+
+    def _nearest(self, row: int, w: int, h: int, ox: int) -> Optional[int]:
+        # Nearest free column to ox for a block with its top edge on row.
+        g, n = self.gap, self.cells
+        band = 0
+        for r in range(max(row - g, 0), min(row + h + g, n)):
+            band |= self.rows[r]
+        # bad bit x is set if any occupied cell lies in [x - g, x + w + g).
+        bad = band << g
+        length, covered = w + 2 * g, 1
+        while covered < length:
+            step = min(covered, length - covered)
+            bad |= bad >> step
+            covered += step
+        free = ~bad & ((1 << (n - w + 1)) - 1)
+        if not free:
+            return None
+        above = free >> ox
+        right = ox + (above & -above).bit_length() - 1 if above else None
+        left = (free & ((1 << ox) - 1)).bit_length() - 1
+        if left < 0:
+            return right
+        if right is None or ox - left <= right - ox:
+            return left
+        return right
+
+    def find(self, width: float, height: float) -> Tuple[int, int]:
+        """
+        Find and reserve the free position nearest the center for a block.
+
+        Args:
+            width (float): Block width in pixels.
+            height (float): Block height in pixels.
+
+        Returns:
+            Tuple[int, int]: Top-left corner in pixels.
+
+        Raises:
+            ValueError: If the block does not fit anywhere on the canvas.
+        """
+        w, h = self._span(width), self._span(height)
+        n = self.cells
+        if w > n or h > n:
+            raise ValueError(f"A {width}x{height} block does not fit on the canvas")
+        ox, oy = (n - w) // 2, (n - h) // 2
+        bounds = self._bounds.get((w, h))
+        if bounds is None:
+            bounds = self._bounds[w, h] = array("q", bytes(8 * n))
+        full = 2 * n * n
+        best = None
+        best_distance = full
+        for dy in range(max(oy + 1, n - h - oy + 1)):
+            dy2 = dy * dy
+            if dy2 >= best_distance:
+                break
+            for row in ((oy - dy, oy + dy) if dy else (oy,)):
+                if not 0 <= row <= n - h or dy2 + bounds[row] >= best_distance:
+                    continue
+                x = self._nearest(row, w, h, ox)
+                dx2 = full if x is None else (x - ox) ** 2
+                bounds[row] = dx2
+                if dx2 + dy2 < best_distance:
+                    best, best_distance = (x, row), dx2 + dy2
+        if best is None:
+            raise ValueError("The canvas is full")
+        cx, cy = best
+        mask = ((1 << w) - 1) << cx
+        rows = self.rows
+        for r in range(cy, cy + h):
+            rows[r] |= mask
+        return cx * self.cell, cy * self.cell
+
+    def place(self, event: Any) -> Tuple[str, str]:
+        """
+        Place an event and write its string-encoded x, y and width.
+
+        Args:
+            event (Any): Event instance or dictionary.
+
+        Returns:
+            Tuple[str, str]: The new (x, y).
+        """
+        d = _as_dict(event)
+        width, height = event_size(d)
+        x, y = self.find(width, height)
+        d["x"], d["y"] = str(x), str(y)
+        d["width"] = str(int(width)) if float(width).is_integer() else str(width)
+        return d["x"], d["y"]
+
+
+def place_events(events: Iterable[Any], existing: Iterable[Any] = (), **kwargs) -> List[Tuple[str, str]]:
+    """
+    Place events on the canvas in order, so earlier events end up closer to the center.
+
+    Args:
+        events (Iterable[Any]): Events to place; their x, y and width are overwritten.
+        existing (Iterable[Any]): Events that keep their position.
+        **kwargs: cell and gap, passed to CanvasPlacer.
+
+    Returns:
+        List[Tuple[str, str]]: The (x, y) of each placed event.
+    """
+    placer = CanvasPlacer(existing, **kwargs)
+    return [placer.place(event) for event in events]
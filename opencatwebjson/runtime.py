@@ -0,0 +1,863 @@
+import copy
+import math
+import re
+from heapq import heappop, heappush
+from itertools import count
+from random import Random
+from typing import Any, Callable, Dict, Generator, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .compiler import CONST, PROGRAM_CACHE, REF, TEMPLATE, TUPLE, Operand, Program, ProgramCache, Slot, resolve_slot
+from .ids import BREAK, CANVAS_SIZE, CONDITIONALS, ELSE, END, FUNCTION_EVENT, LOOPS, RETURN
+from .tree import ElementTree
+from .validator import _as_dict
+
+CANVAS_CENTER = CANVAS_SIZE / 2
+"""Center of the scripting canvas; events closer to it run first."""
+
+WAIT = 3
+RUN_IN_BACKGROUND = 63
+RUN_FUNCTION = 87
+RUN_MATH_FUNCTION = 114
+
+MAX_CALL_DEPTH = 200
+"""Deepest chain of nested Run function calls; a deeper call is a stack overflow, as in Luau."""
+
+MATH_FUNCTIONS: Dict[str, Callable[..., float]] = {
+    "abs": abs, "acos": math.acos, "asin": math.asin, "atan": math.atan, "atan2": math.atan2,
+    "ceil": math.ceil, "cos": math.cos, "cosh": math.cosh, "deg": math.degrees, "exp": math.exp,
+    "floor": math.floor, "fmod": math.fmod, "log": math.log, "log10": math.log10, "max": max,
+    "min": min, "pow": math.pow, "rad": math.radians, "sin": math.sin, "sinh": math.sinh,
+    "sqrt": math.sqrt, "tan": math.tan, "tanh": math.tanh,
+}
+"""Functions available to "Run math function" (ID: 114), named as in Luau's math library."""
+
+
+class ScriptError(Exception):
+    """Raised when a script cannot be run, e.g. unbalanced blocks or a runaway loop."""
+
+
+class LogEntry(NamedTuple):
+    """A line written by Log, Warn or Error."""
+    time: float
+    level: str
+    message: str
+
+
+class _Stop(Exception):
+    # Raised by Error (ID: 2), by calls to unknown functions and by stack overflows to end the current task.
+    pass
+
+
+class Context:
+    """
+    Variables visible to one running event or function call.
+
+    Attributes:
+        script (int): Index of the script the event belongs to.
+        locals (Dict[str, Any]): l! variables, stored without the prefix.
+        stores (Tuple[dict, dict, dict]): Global, object and local variables, indexed by Slot scope.
+        depth (int): Number of nested function calls the task is in.
+        steps (List[int]): Actions executed so far by the triggered event, shared with the functions it calls.
+    """
+
+    __slots__ = ("script", "locals", "stores", "depth", "steps")
+
+    def __init__(self, runtime: "Runtime", script: int, local: Optional[Dict[str, Any]] = None, depth: int = 0,
+                 steps: Optional[List[int]] = None):
+        self.script = script
+        self.locals = local if local is not None else {}
+        self.depth = depth
+        self.steps = steps if steps is not None else [0]
+        self.stores = (runtime.globals, runtime.object_vars[script], self.locals)
+
+
+class _Event(NamedTuple):
+    script: int
+    event: dict
+    program: Program
+    target: Optional[str]
+    priority: float
+
+
+def to_string(value: Any) -> str:
+    """
+    Convert a runtime value to text the way CatWeb displays it.
+
+    Args:
+        value (Any): Any runtime value.
+
+    Returns:
+        str: "nil" for missing values, "true"/"false" for booleans and integral numbers without a decimal point.
+    """
+    if value is None:
+        return "nil"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value.__class__ is float and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def to_number(value: Any) -> float:
+    """
+    Convert a runtime value to a number; non-numeric values become 0.
+
+    Args:
+        value (Any): Any runtime value.
+
+    Returns:
+        float: The number.
+    """
+    if value.__class__ in (int, float):
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0
+    return number if math.isfinite(number) else 0
+
+
+def truthy(value: Any) -> bool:
+    """Check a value with Luau truthiness: only nil and false are false."""
+    return value is not None and value is not False
+
+
+def _event_priority(event: dict) -> float:
+    x = to_number(event.get("x"))
+    y = to_number(event.get("y"))
+    return math.hypot(x - CANVAS_CENTER, y - CANVAS_CENTER)
+
+
+def _event_target(event: dict) -> Optional[str]:
+    for p in event.get("text") or ():
+        if p.__class__ is not str:
+            return (_as_dict(p) or {}).get("value")
+    return None
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _array_length(table: dict) -> int:
+    n = 0
+    while str(n + 1) in table:
+        n += 1
+    return n
+
+
+class Runtime:
+    """
+    Runs CatWeb scripts headlessly against an in-memory set of elements.
+
+    Each running event is a generator that yields the number of seconds it
+    wants to wait. Waits advance a virtual clock instead of sleeping, so a
+    script that waits for minutes finishes in milliseconds.
+
+    Events are compiled to instruction arrays once (see compiler) and the
+    programs are shared between runs through a ProgramCache.
+
+    Hierarchy actions (ID: 97-105) need the elements as an ElementTree.
+    Audio, tweens and date formatting are not simulated; those actions are
+    skipped and their IDs collected in skipped.
+    """
+
+    def __init__(self, scripts: Iterable[Any], elements: Iterable[Any] = (), *, seed: int = 0,
+                 start_time: float = 0.0, max_steps: int = 1_000_000, cache: ProgramCache = PROGRAM_CACHE):
+        """
+        Args:
+            scripts (Iterable[Any]): ScriptObject instances or decoded script dictionaries.
+            elements (Iterable[Any] | ElementTree): Page elements, looked up by name.
+            seed (int): Seed for "Set to random" (ID: 27).
+            start_time (float): Unix time at clock 0.
+            max_steps (int): Maximum number of actions one triggered event may execute, counting the functions
+                it calls and starts in the background, before ScriptError is raised.
+            cache (ProgramCache): Where compiled events are looked up and stored.
+
+        Raises:
+            ScriptError: If an event has unbalanced blocks.
+        """
+        self.tree: Optional[ElementTree] = None
+        if isinstance(elements, ElementTree):
+            self.tree, elements = elements, elements.elements
+        self.objects: Dict[str, Any] = {}
+        for element in elements:
+            self.objects.setdefault(element.name, element)
+        self.clock = 0.0
+        self.start_time = start_time
+        self.max_steps = max_steps
+        self.random = Random(seed)
+        self.globals: Dict[str, Any] = {}
+        self.log: List[LogEntry] = []
+        self.skipped: set = set()
+        self.url = ""
+        self.query: Dict[str, str] = {}
+        self.user = {"username": "Player", "user_id": 1, "display_name": "Player"}
+        self.dark_theme = False
+        self.keys_down: set = set()
+        self.mouse_buttons: set = set()
+        self.viewport = (1920, 1080)
+        self.cursor = (0, 0)
+
+        self.scheduler = None
+        self._queue: List[Tuple[float, int, Generator]] = []
+        self._seq = count()
+        self._handlers: Dict[int, List[_Event]] = {}
+        self._functions: Dict[str, _Event] = {}
+
+        scripts = list(scripts)
+        self.object_vars: List[Dict[str, Any]] = [{} for _ in scripts]
+        for si, script in enumerate(scripts):
+            for event in (_as_dict(script) or {}).get("content") or ():
+                event = _as_dict(event)
+                program = cache.get(event)
+                if program.errors:
+                    raise ScriptError(f"Event {event.get('globalid')!r}: {program.errors[0].message}")
+                target = _event_target(event)
+                compiled = _Event(si, event, program, target, _event_priority(event))
+                eid = int(to_number(event.get("id")))
+                if eid == FUNCTION_EVENT:
+                    self._functions.setdefault(target, compiled)
+                else:
+                    self._handlers.setdefault(eid, []).append(compiled)
+        for handlers in self._handlers.values():
+            handlers.sort(key=lambda e: e.priority)
+
+    # Scheduling
+
+    def _spawn(self, task: Generator, delay: float = 0.0):
+        if self.scheduler is not None:
+            self.scheduler.spawn(self, task, delay)
+        else:
+            heappush(self._queue, (self.clock + delay, next(self._seq), task))
+
+    def start(self):
+        """Start every "When website loaded" (ID: 0) event."""
+        self.fire(0)
+
+    def fire(self, event_id: int, target: Optional[str] = None):
+        """
+        Start every event of a type, optionally only those for one target.
+
+        Args:
+            event_id (int): Event ID, e.g. 1 for "When button pressed".
+            target (str | None): Value of the event's first parameter, e.g. a button name or key.
+        """
+        for event in self._handlers.get(event_id, ()):
+            if target is None or event.target is None or event.target == target:
+                self._spawn(self._execute(event, Context(self, event.script)))
+
+    def broadcast(self, message: str):
+        """Start every "When message received" (ID: 9) event listening for message."""
+        self.fire(9, message)
+
+    def run(self, until: Optional[float] = None) -> float:
+        """
+        Run tasks until none are left or the clock would pass until.
+
+        Args:
+            until (float | None): Virtual time in seconds to stop at.
+
+        Returns:
+            float: The virtual clock after running.
+
+        Raises:
+            ScriptError: If a triggered event executes more than max_steps actions.
+        """
+        queue = self._queue
+        while queue:
+            when, _, task = queue[0]
+            if until is not None and when > until:
+                break
+            heappop(queue)
+            self.clock = max(self.clock, when)
+            try:
+                delay = next(task)
+            except (StopIteration, _Stop):
+                continue
+            self._spawn(task, delay)
+        if until is not None:
+            self.clock = max(self.clock, until)
+        return self.clock
+
+    # Variables and operands
+
+    def get_variable(self, name: str, ctx: Context) -> Any:
+        """Read a global, o! or l! variable."""
+        scope, key = resolve_slot(name)
+        return ctx.stores[scope].get(key)
+
+    def set_variable(self, name: str, value: Any, ctx: Context):
+        """Write a global, o! or l! variable."""
+        scope, key = resolve_slot(name)
+        ctx.stores[scope][key] = value
+
+    def delete_variable(self, name: str, ctx: Context):
+        """Remove a global, o! or l! variable."""
+        scope, key = resolve_slot(name)
+        ctx.stores[scope].pop(key, None)
+
+    def _value(self, o: Optional[Operand], ctx: Context) -> Any:
+        if o is None:
+            return None
+        kind = o.kind
+        if kind == CONST:
+            return o.data
+        if kind == REF:
+            scope, key = o.data
+            return ctx.stores[scope].get(key)
+        if kind == TEMPLATE:
+            stores = ctx.stores
+            return "".join([part if part.__class__ is str else to_string(stores[part[0]].get(part[1]))
+                            for part in o.data])
+        return [self._value(item, ctx) for item in o.data]
+
+    def _get(self, slot: Optional[Slot], ctx: Context) -> Any:
+        return ctx.stores[slot[0]].get(slot[1]) if slot is not None else None
+
+    def _set(self, slot: Optional[Slot], value: Any, ctx: Context):
+        if slot is not None:
+            ctx.stores[slot[0]][slot[1]] = value
+
+    def _object(self, o: Optional[Operand], ctx: Context) -> Any:
+        value = self._value(o, ctx)
+        if value.__class__ is str:
+            return self.objects.get(value)
+        return value
+
+    def _table(self, o: Optional[Operand], ctx: Context) -> Optional[dict]:
+        value = self._get(o.slot, ctx) if o is not None else None
+        return value if isinstance(value, dict) else None
+
+    # Execution
+
+    def _execute(self, event: _Event, ctx: Context) -> Generator[float, None, Any]:
+        program = event.program
+        ops, jumps, args, outputs = program.ops, program.jumps, program.args, program.outputs
+        loops: Dict[int, list] = {}
+        steps = ctx.steps
+        n = len(ops)
+        pc = 0
+        while pc < n:
+            steps[0] += 1
+            if steps[0] > self.max_steps:
+                raise ScriptError(f"Exceeded {self.max_steps} steps")
+            op = ops[pc]
+            if op == END:
+                loop = jumps[pc]
+                if loop != -1 and self._next_iteration(loops[loop], ctx):
+                    pc = loop + 1
+                else:
+                    pc += 1
+                continue
+            if op == ELSE or op == BREAK:
+                pc = jumps[pc]
+                continue
+            a = args[pc]
+            if op in CONDITIONALS:
+                pc = pc + 1 if self._condition(op, a, ctx) else jumps[pc]
+                continue
+            if op in LOOPS:
+                loop = self._start_loop(op, a, ctx)
+                if loop is None:
+                    pc = jumps[pc]
+                else:
+                    loops[pc] = loop
+                    pc += 1
+                continue
+            if op == RETURN:
+                return self._value(a[0] if a else None, ctx)
+            if op == WAIT:
+                yield max(to_number(self._value(a[0] if a else None, ctx)), 0)
+            elif op == RUN_FUNCTION:
+                result = yield from self._call(a, ctx, ctx.depth + 1)
+                self._set(outputs[pc], result, ctx)
+            elif op == RUN_IN_BACKGROUND:
+                self._spawn(self._call(a, ctx))
+            else:
+                handler = _ACTIONS.get(op)
+                if handler is None or len(a) < _ARITY.get(op, 0):
+                    self.skipped.add(op)
+                else:
+                    handler(self, a, outputs[pc], ctx)
+            pc += 1
+        return None
+
+    def _call(self, a: Tuple[Operand, ...], ctx: Context, depth: int = 1) -> Generator[float, None, Any]:
+        # The name and arguments are evaluated now; only the body runs in the returned generator.
+        # Background calls start a new task, so their depth starts over; the step count carries on.
+        name = self._value(a[0], ctx) if a else None
+        function = self._functions.get(name)
+        if function is None:
+            self.write_log("error", f"Unknown function {name!r}")
+            raise _Stop
+        if depth > MAX_CALL_DEPTH:
+            self.write_log("error", f"Stack overflow calling {name!r}")
+            raise _Stop
+        values: List[Any] = next((self._value(o, ctx) for o in a[1:] if o.kind == TUPLE), [])
+        local = {}
+        for i, override in enumerate(function.event.get("variable_overrides") or ()):
+            local[_as_dict(override).get("value")] = values[i] if i < len(values) else None
+        return self._execute(function, Context(self, function.script, local, depth, ctx.steps))
+
+    def _start_loop(self, op: int, a: Tuple[Operand, ...], ctx: Context) -> Optional[list]:
+        if op == 22:
+            times = int(to_number(self._value(a[0] if a else None, ctx)))
+            return [times - 1] if times > 0 else None
+        if op == 23:
+            return [math.inf]
+        table = self._table(a[0] if a else None, ctx)
+        loop = [iter(list(table.items())) if table else iter(())]
+        return loop if self._next_iteration(loop, ctx) else None
+
+    def _next_iteration(self, loop: list, ctx: Context) -> bool:
+        state = loop[0]
+        if state.__class__ is int or state.__class__ is float:
+            if state <= 0:
+                return False
+            loop[0] = state - 1
+            return True
+        item = next(state, None)
+        if item is None:
+            return False
+        ctx.locals["index"], ctx.locals["value"] = item
+        return True
+
+    def _condition(self, op: int, a: Tuple[Operand, ...], ctx: Context) -> bool:
+        condition = _CONDITIONS.get(op)
+        if condition is None or len(a) < _ARITY.get(op, 0):
+            self.skipped.add(op)
+            return False
+        return condition(self, a, ctx)
+
+    def _changed(self, element: Any):
+        self.fire(10, getattr(element, "name", None))
+
+    def write_log(self, level: str, message: str):
+        """Append a line to log at the current virtual time."""
+        self.log.append(LogEntry(self.clock, level, message))
+
+
+# Action handlers. Each takes the runtime, the instruction's operands, its
+# output slot and the calling context.
+
+def _log(level: str):
+    def handler(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+        rt.write_log(level, to_string(rt._value(a[0] if a else None, ctx)))
+        if level == "error":
+            raise _Stop
+    return handler
+
+
+def _math(op: Callable[[float, float], float]):
+    def handler(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+        slot = a[0].slot
+        operand = to_number(rt._value(a[1], ctx)) if len(a) > 1 else 0
+        try:
+            result = op(to_number(rt._get(slot, ctx)), operand)
+        except (ZeroDivisionError, OverflowError, ValueError):
+            result = math.nan
+        rt._set(slot, result, ctx)
+    return handler
+
+
+def _string_output(op: Callable[..., Any], inputs: int = 1):
+    def handler(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+        rt._set(out, op(*(rt._value(o, ctx) for o in a[:inputs])), ctx)
+    return handler
+
+
+def _visible(visible: bool):
+    def handler(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+        element = rt._object(a[0], ctx)
+        if element is not None:
+            element.visible = visible
+            rt._changed(element)
+    return handler
+
+
+def _set_text(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    element = rt._object(a[0], ctx)
+    if element is not None:
+        element.text = to_string(rt._value(a[1], ctx))
+        rt._changed(element)
+
+
+def _set_property(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    prop = _snake_case(to_string(rt._value(a[0], ctx)))
+    element = rt._object(a[1], ctx)
+    if element is None or not hasattr(element, prop):
+        return
+    value = rt._value(a[2], ctx)
+    current = getattr(element, prop)
+    if isinstance(current, bool):
+        value = value is True or to_string(value) == "true"
+    elif isinstance(current, (int, float)):
+        value = to_number(value)
+    elif isinstance(current, str):
+        value = to_string(value)
+    else:
+        try:
+            value = type(current)(value)
+        except (TypeError, ValueError):
+            return
+    setattr(element, prop, value)
+    rt._changed(element)
+
+
+def _get_property(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    prop = _snake_case(to_string(rt._value(a[0], ctx)))
+    element = rt._object(a[1], ctx)
+    value = getattr(element, prop, None) if element is not None else None
+    if value is not None and not isinstance(value, (bool, int, float, str)):
+        value = str(value)
+    rt._set(out, value, ctx)
+
+
+def _set_variable(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    rt._set(a[0].slot, rt._value(a[1], ctx) if len(a) > 1 else None, ctx)
+
+
+def _round(op: Callable[[float], float]):
+    def handler(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+        slot = a[0].slot
+        value = to_number(rt._get(slot, ctx))
+        # NaN and infinity have no integer to round to; keep them as they are.
+        rt._set(slot, float(op(value)) if math.isfinite(value) else value, ctx)
+    return handler
+
+
+def _random(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    low = int(to_number(rt._value(a[1], ctx)))
+    high = int(to_number(rt._value(a[2], ctx)))
+    rt._set(a[0].slot, float(rt.random.randint(min(low, high), max(low, high))), ctx)
+
+
+def _get_input_text(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    element = rt._object(a[0], ctx)
+    rt._set(out, getattr(element, "text", None), ctx)
+
+
+def _broadcast(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    rt.broadcast(to_string(rt._value(a[0], ctx)))
+
+
+def _sub(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    slot = a[0].slot
+    start = int(to_number(rt._value(a[1], ctx)))
+    end = int(to_number(rt._value(a[2], ctx)))
+    rt._set(slot, to_string(rt._get(slot, ctx))[max(start, 1) - 1:end], ctx)
+
+
+def _replace(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    old = to_string(rt._value(a[0], ctx))
+    slot = a[1].slot
+    new = to_string(rt._value(a[2], ctx))
+    if old:
+        rt._set(slot, to_string(rt._get(slot, ctx)).replace(old, new), ctx)
+
+
+def _duplicate(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    element = rt._object(a[0], ctx)
+    rt._set(out, copy.copy(element) if element is not None else None, ctx)
+
+
+def _delete_object(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    element = rt._object(a[0], ctx)
+    if element is not None and rt.objects.get(element.name) is element:
+        del rt.objects[element.name]
+
+
+def _user(key: str):
+    def handler(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+        rt._set(out, rt.user[key], ctx)
+    return handler
+
+
+def _create_table(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    rt._set(a[0].slot, {}, ctx)
+
+
+def _set_entry(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    table = rt._table(a[1], ctx)
+    if table is not None:
+        table[to_string(rt._value(a[0], ctx))] = rt._value(a[2], ctx)
+
+
+def _get_entry(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    table = rt._table(a[1], ctx)
+    key = to_string(rt._value(a[0], ctx))
+    rt._set(out, table.get(key) if table is not None else None, ctx)
+
+
+def _split(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    text = to_string(rt._value(a[0], ctx))
+    sep = to_string(rt._value(a[1], ctx))
+    parts = text.split(sep) if sep else list(text)
+    rt._set(out, {str(i + 1): part for i, part in enumerate(parts)}, ctx)
+
+
+def _array_length_handler(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    table = rt._table(a[0], ctx)
+    rt._set(out, float(_array_length(table)) if table is not None else 0.0, ctx)
+
+
+def _query(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    rt._set(out, rt.query.get(to_string(rt._value(a[0], ctx))), ctx)
+
+
+def _timestamp(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    rt._set(out, float(int(rt.start_time + rt.clock)), ctx)
+
+
+def _tick(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    rt._set(out, rt.start_time + rt.clock, ctx)
+
+
+def _pair_output(values: Callable[[Runtime], Tuple[float, float]]):
+    def handler(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+        for o, value in zip(a[-2:], values(rt)):
+            rt._set(o.slot, float(value), ctx)
+    return handler
+
+
+def _insert(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    table = rt._table(a[-1], ctx)
+    if table is None:
+        return
+    n = _array_length(table)
+    position = rt._value(a[1], ctx) if len(a) > 2 else None
+    index = int(to_number(position)) if position not in (None, "") else n + 1
+    index = min(max(index, 1), n + 1)
+    for k in range(n, index - 1, -1):
+        table[str(k + 1)] = table[str(k)]
+    table[str(index)] = rt._value(a[0], ctx)
+
+
+def _delete_entry(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    table = rt._table(a[1], ctx)
+    if table is not None:
+        table.pop(to_string(rt._value(a[0], ctx)), None)
+
+
+def _remove_at(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    table = rt._table(a[-1], ctx)
+    if table is None:
+        return
+    n = _array_length(table)
+    position = rt._value(a[0], ctx) if len(a) > 1 else None
+    index = int(to_number(position)) if position not in (None, "") else n
+    if not 1 <= index <= n:
+        return
+    for k in range(index, n):
+        table[str(k)] = table[str(k + 1)]
+    del table[str(n)]
+
+
+def _delete_variable(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    slot = a[0].slot
+    if slot is not None:
+        ctx.stores[slot[0]].pop(slot[1], None)
+
+
+def _join(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    table = rt._table(a[0], ctx)
+    sep = to_string(rt._value(a[1], ctx))
+    items = [to_string(table[str(k)]) for k in range(1, _array_length(table) + 1)] if table else []
+    rt._set(out, sep.join(items), ctx)
+
+
+def _math_function(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    name = to_string(rt._value(a[0], ctx))
+    function = MATH_FUNCTIONS.get(name)
+    if function is None:
+        rt.write_log("error", f"Unknown math function {name!r}")
+        raise _Stop
+    values = next((rt._value(o, ctx) for o in a[1:] if o.kind == TUPLE), [])
+    try:
+        result = float(function(*(to_number(v) for v in values)))
+    except (TypeError, ValueError, OverflowError, ZeroDivisionError):
+        result = math.nan
+    rt._set(out, result, ctx)
+
+
+def _get_url(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    rt._set(out, rt.url, ctx)
+
+
+def _redirect(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    rt.url = to_string(rt._value(a[0], ctx))
+
+
+def _node(rt: Runtime, o: Operand, ctx: Context) -> int:
+    element = rt._object(o, ctx)
+    return rt.tree.index(element) if element is not None else -1
+
+
+def _get_parent(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+    if rt.tree is None:
+        rt.skipped.add(97)
+        return
+    i = _node(rt, a[0], ctx)
+    rt._set(out, rt.tree.element(rt.tree.parent(i)) if i >= 0 else None, ctx)
+
+
+def _find(aid: int, method: str):
+    def handler(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+        if rt.tree is None:
+            rt.skipped.add(aid)
+            return
+        name = to_string(rt._value(a[0], ctx))
+        i = _node(rt, a[1], ctx)
+        rt._set(out, rt.tree.element(getattr(rt.tree, method)(i, name)) if i >= 0 else None, ctx)
+    return handler
+
+
+def _list_nodes(aid: int, nodes_of: Callable[[ElementTree, int], Sequence[int]]):
+    def handler(rt: Runtime, a: Tuple[Operand, ...], out: Optional[Slot], ctx: Context):
+        if rt.tree is None:
+            rt.skipped.add(aid)
+            return
+        i = _node(rt, a[0], ctx)
+        nodes = nodes_of(rt.tree, i) if i >= 0 else ()
+        elements = rt.tree.elements
+        rt._set(out, {str(k + 1): elements[c] for k, c in enumerate(nodes)}, ctx)
+    return handler
+
+
+def _relation(aid: int, method: str):
+    def condition(rt: Runtime, a: Tuple[Operand, ...], ctx: Context) -> bool:
+        if rt.tree is None:
+            rt.skipped.add(aid)
+            return False
+        x, y = _node(rt, a[0], ctx), _node(rt, a[1], ctx)
+        return x >= 0 and y >= 0 and getattr(rt.tree, method)(x, y)
+    return condition
+
+
+def _lua_round(x: float) -> float:
+    return math.floor(x + 0.5)
+
+
+def _compare(test: Callable[[Any, Any], bool]):
+    def condition(rt: Runtime, a: Tuple[Operand, ...], ctx: Context) -> bool:
+        return test(rt._value(a[0], ctx), rt._value(a[1], ctx))
+    return condition
+
+
+def _logic(test: Callable[[bool, bool], bool]):
+    def condition(rt: Runtime, a: Tuple[Operand, ...], ctx: Context) -> bool:
+        x = truthy(rt._get(a[0].slot, ctx)) if a else False
+        y = truthy(rt._get(a[1].slot, ctx)) if len(a) > 1 else False
+        return test(x, y)
+    return condition
+
+
+def _exists(expected: bool):
+    # A variable exists when it holds any value, false included.
+    def condition(rt: Runtime, a: Tuple[Operand, ...], ctx: Context) -> bool:
+        return (rt._get(a[0].slot, ctx) is not None) is expected
+    return condition
+
+
+def _mouse_down(button: str):
+    return lambda rt, a, ctx: button in rt.mouse_buttons
+
+
+_CONDITIONS: Dict[int, Callable[[Runtime, Tuple[Operand, ...], Context], bool]] = {
+    18: _compare(lambda x, y: to_string(x) == to_string(y)),
+    19: _compare(lambda x, y: to_string(x) != to_string(y)),
+    20: _compare(lambda x, y: to_number(x) > to_number(y)),
+    21: _compare(lambda x, y: to_number(x) < to_number(y)),
+    37: _compare(lambda x, y: to_string(y) in to_string(x)),
+    38: _compare(lambda x, y: to_string(y) not in to_string(x)),
+    44: _logic(lambda x, y: x and y),
+    45: _logic(lambda x, y: x or y),
+    46: _logic(lambda x, y: not (x or y)),
+    47: _logic(lambda x, y: x != y),
+    79: _mouse_down("left"),
+    80: _mouse_down("middle"),
+    81: _mouse_down("right"),
+    82: lambda rt, a, ctx: rt._value(a[0], ctx) in rt.keys_down,
+    92: _exists(True),
+    93: _exists(False),
+    103: _relation(103, "is_ancestor"),
+    104: _relation(104, "is_child"),
+    105: _relation(105, "is_descendant"),
+    108: lambda rt, a, ctx: rt.dark_theme,
+}
+
+# Minimum operand count of conditions and actions that index their operands directly.
+_ARITY = {
+    18: 2, 19: 2, 20: 2, 21: 2, 37: 2, 38: 2, 82: 1, 92: 1, 93: 1, 103: 2, 104: 2, 105: 2,
+    11: 1, 12: 1, 13: 1, 14: 1, 15: 1, 16: 1, 17: 1, 27: 3, 40: 1, 41: 1, 78: 1, 114: 1,
+    4: 1, 8: 1, 9: 1, 10: 2, 30: 1, 31: 3, 32: 1, 33: 1, 39: 2, 42: 3, 43: 3, 48: 1, 49: 1, 50: 1,
+    54: 1, 55: 3, 56: 2, 57: 2, 59: 1, 66: 3, 67: 1, 69: 1, 70: 1, 89: 2, 90: 2, 91: 1, 96: 1,
+    97: 1, 98: 2, 99: 2, 100: 2, 101: 1, 102: 1, 109: 2, 110: 2,
+}
+
+
+_ACTIONS: Dict[int, Callable[[Runtime, Tuple[Operand, ...], Optional[Slot], Context], None]] = {
+    0: _log("info"),
+    1: _log("warning"),
+    2: _log("error"),
+    4: _redirect,
+    8: _visible(False),
+    9: _visible(True),
+    10: _set_text,
+    11: _set_variable,
+    12: _math(lambda a, b: a + b),
+    13: _math(lambda a, b: a - b),
+    14: _math(lambda a, b: a * b),
+    15: _math(lambda a, b: a / b),
+    16: _round(_lua_round),
+    17: _round(math.floor),
+    27: _random,
+    30: _get_input_text,
+    31: _set_property,
+    32: _broadcast,
+    33: _broadcast,
+    39: _get_property,
+    40: _math(math.pow),
+    41: _math(lambda a, b: a % b),
+    42: _sub,
+    43: _replace,
+    48: _string_output(lambda s: float(len(to_string(s)))),
+    49: _duplicate,
+    50: _delete_object,
+    51: _user("username"),
+    52: _user("user_id"),
+    53: _user("display_name"),
+    54: _create_table,
+    55: _set_entry,
+    56: _get_entry,
+    57: _split,
+    59: _array_length_handler,
+    66: _set_entry,
+    67: _query,
+    68: _timestamp,
+    69: _string_output(lambda s: to_string(s).lower()),
+    70: _string_output(lambda s: to_string(s).upper()),
+    78: _round(math.ceil),
+    83: _tick,
+    84: _pair_output(lambda rt: rt.viewport),
+    85: _pair_output(lambda rt: rt.cursor),
+    89: _insert,
+    90: _delete_entry,
+    91: _remove_at,
+    96: _delete_variable,
+    97: _get_parent,
+    98: _find(98, "find_ancestor"),
+    99: _find(99, "find_child"),
+    100: _find(100, "find_descendant"),
+    101: _list_nodes(101, lambda tree, i: tree.children[i]),
+    102: _list_nodes(102, ElementTree.descendants),
+    109: _string_output(lambda a, b: to_string(a) + to_string(b), 2),
+    110: _join,
+    114: _math_function,
+    116: _timestamp,
+    117: _get_url,
+    124: lambda rt, a, out, ctx: None,
+}
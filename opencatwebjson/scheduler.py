@@ -0,0 +1,199 @@
+import asyncio
+from heapq import heapify, heappop, heappush
+from itertools import count
+from typing import Dict, Generator, List, Optional, Tuple
+
+from .runtime import Runtime, ScriptError, _Stop
+
+
+class AsyncScheduler:
+    """
+    Runs the events of any number of Runtimes as asyncio tasks on one event loop.
+
+    Every running event, background function (ID: 63) and message handler
+    started by a broadcast (ID: 32/33) becomes its own task. Tasks only
+    suspend at Wait (ID: 3), so one loop can host thousands of sites.
+
+    Wake-ups are ordered by time and then by the order tasks were started.
+    Runtime.fire starts events by their distance from the canvas center,
+    so with the default virtual clock runs are fully deterministic. With a
+    time_scale the scheduler sleeps for real between wake-ups, and events
+    can be fired from other coroutines while it runs.
+
+    A runtime whose event raises ScriptError is stopped on its own: its
+    tasks and timers are dropped, the error is appended to errors, and
+    the other runtimes keep running.
+    """
+
+    def __init__(self, time_scale: Optional[float] = None):
+        """
+        Args:
+            time_scale (float | None): Real seconds per virtual second. None runs on a virtual clock without sleeping.
+        """
+        self.time_scale = time_scale
+        self.clock = 0.0
+        self.runtimes: List[Runtime] = []
+        self.errors: List[Tuple[Runtime, ScriptError]] = []
+        self._timers: List[Tuple[float, int, Runtime, Generator, Optional[asyncio.Future]]] = []
+        self._seq = count()
+        self._tasks: Dict[asyncio.Task, Runtime] = {}
+        self._ready = 0
+        self._error: Optional[BaseException] = None
+        self._failed: List[Runtime] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._origin = 0.0
+
+    def add(self, runtime: Runtime) -> Runtime:
+        """
+        Let the scheduler drive a runtime. Work already queued on the runtime is moved over.
+
+        Args:
+            runtime (Runtime): The runtime to drive.
+
+        Returns:
+            Runtime: The same runtime.
+        """
+        runtime.scheduler = self
+        self.runtimes.append(runtime)
+        queue, runtime._queue = sorted(runtime._queue, key=lambda entry: entry[:2]), []
+        for when, _, task in queue:
+            self.spawn(runtime, task, when - runtime.clock)
+        return runtime
+
+    def spawn(self, runtime: Runtime, task: Generator, delay: float = 0.0):
+        """
+        Schedule an event generator to start after delay virtual seconds.
+
+        Args:
+            runtime (Runtime): Runtime the event belongs to.
+            task (Generator): Generator returned by the runtime for the event.
+            delay (float): Virtual seconds to wait before starting.
+        """
+        heappush(self._timers, (self.clock + delay, next(self._seq), runtime, task, None))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _sleep(self, runtime: Runtime, task: Generator, delay: float):
+        future = asyncio.get_running_loop().create_future()
+        heappush(self._timers, (self.clock + delay, next(self._seq), runtime, task, future))
+        self._ready -= 1
+        await future
+
+    async def _run_task(self, runtime: Runtime, task: Generator):
+        try:
+            while True:
+                runtime.clock = self.clock
+                try:
+                    delay = next(task)
+                except (StopIteration, _Stop):
+                    return
+                await self._sleep(runtime, task, delay)
+        except asyncio.CancelledError:
+            # Cancelled while asleep, e.g. when the loop of an earlier run()
+            # closed. The sleep already left _ready, and the timer still holds
+            # the generator (unless its runtime failed), so the next run()
+            # starts it as a new task.
+            self._ready += 1
+            raise
+        except ScriptError as e:
+            self.errors.append((runtime, e))
+            self._failed.append(runtime)
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+        finally:
+            self._ready -= 1
+
+    def _release(self, runtime: Runtime, task: Generator, future: Optional[asyncio.Future]):
+        self._ready += 1
+        if future is not None and not future.cancelled():
+            future.set_result(None)
+            return
+        t = asyncio.get_running_loop().create_task(self._run_task(runtime, task))
+        self._tasks[t] = runtime
+        t.add_done_callback(self._tasks.pop)
+
+    async def _stop_failed(self):
+        # Drop the timers and cancel the sleeping tasks of runtimes that raised ScriptError.
+        failed, self._failed = set(self._failed), []
+        self._timers[:] = [timer for timer in self._timers if timer[2] not in failed]
+        heapify(self._timers)
+        tasks = [t for t, runtime in self._tasks.items() if runtime in failed]
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _settle(self):
+        # Released tasks run in FIFO order; yield until each reached its next Wait.
+        while self._ready > 0:
+            await asyncio.sleep(0)
+
+    async def _wait_until(self, when: float) -> bool:
+        # Sleep in real time until when; returns False if woken early by spawn.
+        loop = asyncio.get_running_loop()
+        self._wakeup.clear()
+        timeout = self._origin + when * self.time_scale - loop.time()
+        if timeout > 0:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                return True
+            self.clock = max(self.clock, (loop.time() - self._origin) / self.time_scale)
+            return False
+        return True
+
+    async def run(self, until: Optional[float] = None) -> float:
+        """
+        Run every task until none are left or the clock would pass until.
+
+        Args:
+            until (float | None): Virtual time in seconds to stop at.
+
+        Returns:
+            float: The clock after running.
+
+        Raises:
+            Exception: Any error other than ScriptError raised by a task; every other task is cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        if self.time_scale:
+            self._origin = loop.time() - self.clock * self.time_scale
+        timers = self._timers
+        try:
+            while True:
+                await self._settle()
+                if self._error is not None:
+                    raise self._error
+                if self._failed:
+                    await self._stop_failed()
+                if not timers:
+                    break
+                when = timers[0][0]
+                if until is not None and when > until:
+                    if not self.time_scale or await self._wait_until(until):
+                        break
+                    continue
+                if self.time_scale and when > self.clock and not await self._wait_until(when):
+                    continue
+                self.clock = max(self.clock, when)
+                while timers and timers[0][0] <= self.clock:
+                    _, _, runtime, task, future = heappop(timers)
+                    self._release(runtime, task, future)
+        except BaseException:
+            tasks = list(self._tasks)
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._ready = 0
+            timers.clear()
+            raise
+        finally:
+            self._error = None
+            self._failed = []
+            self._wakeup = None
+        if until is not None:
+            self.clock = max(self.clock, until)
+        for runtime in self.runtimes:
+            runtime.clock = self.clock
+        return self.clock
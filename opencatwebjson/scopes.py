@@ -0,0 +1,233 @@
+import re
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, NamedTuple, Set
+
+from .blocks import action_id
+from .ids import COMMENT, FUNCTION_EVENT
+from .validator import Violation, _as_dict, format_path
+
+GLOBAL, OBJECT, LOCAL = 0, 1, 2
+
+# A single scanner for every {name}, {o!name} and {l!name} reference.
+_find_refs = re.compile(r"\{((?:[lo]!)?[^{}]+)\}").findall
+
+_VARIABLE_LABELS = frozenset({"variable", "variable?", "table"})
+
+_ASSIGNS = frozenset({11, 27, 54})
+"""Actions whose first variable parameter is overwritten (Set, random, Create table)."""
+
+_UPDATES = frozenset({12, 13, 14, 15, 16, 17, 40, 41, 42, 43, 78})
+"""Actions whose first variable parameter is read and written back."""
+
+_ITERATE = 113
+_ITERATE_LOCALS = ("l!index", "l!value")
+
+READ, WRITE, IMPLICIT = 0, 1, 2
+
+
+class SymbolTable:
+    """Interns variable names so references can be stored as small integers."""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.kinds = array("b")
+        self._index: Dict[str, int] = {}
+
+    def intern(self, name: str) -> int:
+        """
+        Get the symbol number of a variable name, adding it if new.
+
+        Args:
+            name (str): Variable name including any "o!" or "l!" prefix.
+
+        Returns:
+            int: The symbol number.
+        """
+        sym = self._index.get(name)
+        if sym is None:
+            sym = self._index[name] = len(self.names)
+            self.names.append(name)
+            self.kinds.append(LOCAL if name.startswith("l!") else OBJECT if name.startswith("o!") else GLOBAL)
+        return sym
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, sym: int) -> str:
+        return self.names[sym]
+
+
+class Reference(NamedTuple):
+    """A read or write of a variable. action is -1 for function parameters."""
+    symbol: int
+    script: int
+    event: int
+    action: int
+    mode: int
+
+
+@dataclass
+class ScopeReport:
+    """
+    Result of a scope analysis.
+
+    Attributes:
+        symbols (SymbolTable): Every variable name seen in the document.
+        references (List[Reference]): Reads and writes in document order.
+        violations (List[Violation]): Undefined, unused and out-of-scope variables.
+    """
+    symbols: SymbolTable
+    references: List[Reference] = field(default_factory=list)
+    violations: List[Violation] = field(default_factory=list)
+
+
+def _variable_name(value: str) -> str:
+    if value.startswith("{") and value.endswith("}"):
+        return value[1:-1]
+    return value
+
+
+def _scan_value(value: Any, out: List[str]):
+    if value.__class__ is str:
+        if "{" in value:
+            out.extend(_find_refs(value))
+    elif value.__class__ is list:
+        for item in value:
+            p = _as_dict(item)
+            if p is not None:
+                _scan_value(p.get("value"), out)
+
+
+def _scan_action(d: dict, aid: int, reads: List[str], writes: List[str]):
+    after_arrow = False
+    first = True
+    for item in d.get("text") or ():
+        if item.__class__ is str:
+            if "→" in item:
+                after_arrow = True
+            continue
+        p = _as_dict(item)
+        if p is None:
+            continue
+        value = p.get("value")
+        if p.get("l") in _VARIABLE_LABELS and value.__class__ is str and value:
+            name = _variable_name(value)
+            if after_arrow or (first and aid in _ASSIGNS):
+                writes.append(name)
+            elif first and aid in _UPDATES:
+                reads.append(name)
+                writes.append(name)
+            else:
+                reads.append(name)
+            first = False
+        else:
+            _scan_value(value, reads)
+
+
+def analyze(scripts: Iterable[Any]) -> ScopeReport:
+    """
+    Find variable references and check them against CatWeb's scoping rules.
+
+    Global variables are visible in every script, o! variables within one
+    script and l! variables within one event. Function parameters and the
+    Iterate locals count as definitions at the start of their scope.
+
+    Args:
+        scripts (Iterable[Any]): ScriptObject instances or decoded script dictionaries.
+
+    Returns:
+        ScopeReport: Symbol table, references and violations.
+    """
+    symbols = SymbolTable()
+    intern = symbols.intern
+    report = ScopeReport(symbols)
+    refs = report.references
+
+    for si, script in enumerate(scripts):
+        sd = _as_dict(script) or {}
+        for ei, event in enumerate(sd.get("content") or ()):
+            ed = _as_dict(event)
+            if ed is None:
+                continue
+            if str(ed.get("id")) == str(FUNCTION_EVENT):
+                for p in ed.get("variable_overrides") or ():
+                    name = (_as_dict(p) or {}).get("value")
+                    if name.__class__ is str and name:
+                        refs.append(Reference(intern("l!" + name), si, ei, -1, IMPLICIT))
+            reads: List[str] = []
+            writes: List[str] = []
+            for ai, action in enumerate(ed.get("actions") or ()):
+                ad = _as_dict(action)
+                if ad is None:
+                    continue
+                aid = action_id(ad)
+                if aid == COMMENT:
+                    continue
+                _scan_action(ad, aid, reads, writes)
+                for name in reads:
+                    refs.append(Reference(intern(name), si, ei, ai, READ))
+                for name in writes:
+                    refs.append(Reference(intern(name), si, ei, ai, WRITE))
+                if aid == _ITERATE:
+                    for name in _ITERATE_LOCALS:
+                        refs.append(Reference(intern(name), si, ei, ai, IMPLICIT))
+                reads.clear()
+                writes.clear()
+
+    _check(report)
+    return report
+
+
+def _scope(kind: int, r: Reference) -> tuple:
+    if kind == GLOBAL:
+        return (r.symbol,)
+    if kind == OBJECT:
+        return (r.symbol, r.script)
+    return (r.symbol, r.script, r.event)
+
+
+def _check(report: ScopeReport):
+    symbols = report.symbols
+    kinds = symbols.kinds
+    violations = report.violations
+
+    defined: Set[tuple] = set()
+    read: Set[tuple] = set()
+    local_in_script: Set[tuple] = set()
+    for r in report.references:
+        kind = kinds[r.symbol]
+        if r.mode == READ:
+            read.add(_scope(kind, r))
+        else:
+            defined.add(_scope(kind, r))
+            if kind == LOCAL:
+                local_in_script.add((r.symbol, r.script))
+
+    seen: Set[tuple] = set()
+    for r in report.references:
+        kind = kinds[r.symbol]
+        scope = _scope(kind, r)
+        if r.mode != READ:
+            if scope not in seen and scope not in read and (r.mode == WRITE or r.action == -1):
+                message = "Variable '{}' is never used"
+            else:
+                message = None
+            seen.add(scope)
+        elif kind != LOCAL:
+            if scope in defined:
+                continue
+            message = "Variable '{}' is never defined " + ("in this script" if kind == OBJECT else "anywhere")
+        elif scope in seen:
+            continue
+        elif scope not in defined and (r.symbol, r.script) in local_in_script:
+            message = "Local variable '{}' is only defined in another event"
+        else:
+            message = "Variable '{}' is used before it is defined"
+        if message is None:
+            continue
+        if r.action == -1:
+            path = format_path((r.script, r.event), "variable_overrides")
+        else:
+            path = format_path((r.script, r.event, r.action))
+        violations.append(Violation(path, message.format(symbols[r.symbol])))
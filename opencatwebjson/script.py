@@ -0,0 +1,109 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Union
+
+# The instances below keep the decoded JSON object as their ``__dict__``.
+# orjson serializes a dataclass by walking its ``__dict__`` in insertion order,
+# so objects produced by the loader keep the key order and the exact set of
+# keys of the source document, while optional fields that were absent fall
+# back to the class-level defaults on attribute access.
+
+def _drop_unset(obj, *names):
+    # Optional keys left as None are removed so they are not written as null.
+    d = obj.__dict__
+    for name in names:
+        if d.get(name, 0) is None:
+            del d[name]
+
+
+@dataclass
+class Parameter:
+    """
+    A parameter object inside the ``text`` array of an event or action.
+
+    Attributes:
+        value (str | List[Parameter] | None): Parameter value. Tuples hold a list of parameters.
+        t (str | None): Parameter type (e.g. "string", "number", "object", "tuple").
+        l (str | None): Parameter label (e.g. "any", "variable", "function").
+    """
+    value: Union[str, List["Parameter"], None] = None
+    t: Optional[str] = None
+    l: Optional[str] = None  # noqa: E741
+
+    def __post_init__(self):
+        _drop_unset(self, "t", "l")
+
+
+TextItem = Union[str, Parameter]
+"""An entry of a ``text`` array, either a literal string or a parameter."""
+
+
+@dataclass
+class Action:
+    """
+    A single action block inside an event.
+
+    Attributes:
+        id (str): String-encoded action type identifier.
+        text (List[TextItem]): Descriptor with literal strings and parameters.
+        globalid (str): Unique identifier across the whole JSON.
+        help (str | None): Help text, only valid for comment actions (ID: 124).
+    """
+    id: str
+    text: List[TextItem]
+    globalid: str
+    help: Optional[str] = None
+
+    def __post_init__(self):
+        self.id = str(self.id)
+        _drop_unset(self, "help")
+
+
+@dataclass
+class Event:
+    """
+    An event block holding a sequence of actions.
+
+    Attributes:
+        y (str): String-encoded vertical position on the scripting canvas.
+        x (str): String-encoded horizontal position on the scripting canvas.
+        globalid (str): Unique identifier across the whole JSON.
+        id (str): String-encoded event type identifier.
+        text (List[TextItem]): Descriptor with literal strings and parameters.
+        actions (List[Action]): Sequential actions of the event.
+        width (str): String-encoded width in the editor.
+        variable_overrides (List[Parameter] | None): Parameter names, only for function definitions (ID: 6).
+    """
+    y: str
+    x: str
+    globalid: str
+    id: str
+    text: List[TextItem]
+    actions: List[Action]
+    width: str
+    variable_overrides: Optional[List[Parameter]] = None
+
+    def __post_init__(self):
+        self.y = str(self.y)
+        self.x = str(self.x)
+        self.id = str(self.id)
+        self.width = str(self.width)
+        _drop_unset(self, "variable_overrides")
+
+
+@dataclass
+class ScriptObject:
+    """
+    A script object at the root level of the JSON array.
+
+    The fixed ``"class": "script"`` key is kept in the instance dictionary
+    since ``class`` cannot be used as a field name.
+
+    Attributes:
+        content (List[Event]): Event blocks of the script.
+        globalid (str): Unique identifier across the whole JSON.
+    """
+    content: List[Event] = field(default_factory=list)
+    globalid: str = ""
+
+    def __post_init__(self):
+        self.__dict__ = {"class": "script", "content": self.content, "globalid": self.globalid}
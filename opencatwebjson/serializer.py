@@ -0,0 +1,69 @@
+from typing import IO, Any
+
+import orjson
+
+from .classes import ColorGradient, GradientStop, HexColor, Range01, Rotation, ScaleOffset, Size2, TransparencyGradient, Vector2
+from .literals import Vec2
+
+
+def _default(obj: Any) -> Any:
+    # Dataclasses (elements, scripts) are handled natively by orjson;
+    # only the value classes from classes.py end up here.
+    cls = obj.__class__
+    if cls is HexColor:
+        return obj.hex
+    if cls is Range01:
+        return obj.value
+    if cls is Vector2:
+        return [[obj.x.scale, obj.x.offset], [obj.y.scale, obj.y.offset]]
+    if cls is Size2:
+        return [[obj.width.scale, obj.width.offset], [obj.height.scale, obj.height.offset]]
+    if cls is Rotation:
+        return obj.degrees
+    if cls is ScaleOffset:
+        return [obj.scale, obj.offset]
+    if cls is TransparencyGradient or cls is ColorGradient:
+        return [[s.position, s.value] for s in obj.stops]
+    if cls is GradientStop:
+        return [obj.position, obj.value]
+    if cls is Vec2:
+        return tuple(obj)
+    raise TypeError(f"Type is not JSON serializable: {cls.__name__}")
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize scripts or elements to CatWeb JSON.
+
+    Dataclasses are written by orjson directly from their instance
+    dictionaries, so objects returned by the loader are written back with
+    their original keys in their original order. Compact input therefore
+    round-trips byte for byte.
+
+    Args:
+        obj (Any): A list of ScriptObject, a single script, event, action or element.
+        indent (bool): Pretty-print with two spaces of indentation.
+
+    Returns:
+        bytes: UTF-8 encoded JSON.
+
+    Raises:
+        TypeError: If obj contains a value that cannot be serialized.
+    """
+    option = orjson.OPT_INDENT_2 if indent else 0
+    try:
+        return orjson.dumps(obj, default=_default, option=option)
+    except orjson.JSONEncodeError as e:
+        raise TypeError(str(e)) from None
+
+
+def dump(obj: Any, fp: IO[bytes], indent: bool = False) -> None:
+    """
+    Serialize scripts or elements to CatWeb JSON and write them to a binary file.
+
+    Args:
+        obj (Any): Object accepted by dumps.
+        fp (IO[bytes]): Binary file object.
+        indent (bool): Pretty-print with two spaces of indentation.
+    """
+    fp.write(dumps(obj, indent))
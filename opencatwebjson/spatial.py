@@ -0,0 +1,308 @@
+import math
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .layout import INF, Layout
+from .literals import Number
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the resolved rectangles of a Layout, for hit-testing and overlap queries.
+
+    Each element is indexed under the grid cells covered by its bounding box.
+    That box is the element's rectangle, rotated about its center by its
+    own Rotation, then clipped by every ancestor with clip_descendants.
+    Elements hidden directly or through an ancestor are left out. Elements
+    covering more than max_cells cells are kept in a short list that every
+    query checks, so one full-screen frame does not fill the whole grid.
+
+    Stacking follows CatWeb: children draw above their parent, and siblings
+    with a higher layer draw above lower ones, ties going to the later
+    sibling. As in Layout, a rotation only affects the element itself, not
+    its descendants.
+    """
+
+    def __init__(self, layout: Layout, cell_size: Number = 128, max_cells: int = 256):
+        """
+        Args:
+            layout (Layout): A layout that has been resolved.
+            cell_size (Number): Grid cell size in pixels.
+            max_cells (int): Elements covering more cells than this are not put in the grid.
+
+        Raises:
+            ValueError: If the layout has not been resolved yet.
+        """
+        if layout.rects is None:
+            raise ValueError("Layout must be resolved before it is indexed")
+        n = len(layout)
+        self.layout = layout
+        self.cell_size = float(cell_size)
+        self.max_cells = max_cells
+        self.shown = bytearray(n)
+        self.visible = bytearray(n)
+        # Bounding box (x0, y0, x1, y1) after rotation and clipping.
+        self.bounds = [array("d", bytes(8 * n)) for _ in range(4)]
+        # Clip rectangle inherited from ancestors.
+        self.clip = [array("d", [-INF]) * n, array("d", [-INF]) * n, array("d", [INF]) * n, array("d", [INF]) * n]
+        self.angle = array("d", bytes(8 * n))
+        self.rank = array("i", bytes(4 * n))
+        self._layers = array("q", bytes(8 * n))
+
+        self._cells: Dict[Tuple[int, int], Set[int]] = {}
+        self._large: Set[int] = set()
+        self._spans: List[Optional[Tuple[int, int, int, int]]] = [None] * n
+
+        self._rank_paint_order()
+        for i in range(n):
+            self._compute(i)
+            self._insert(i)
+
+    def __len__(self):
+        return sum(self.shown)
+
+    def _rank_paint_order(self):
+        layout = self.layout
+        elements = layout.elements
+
+        layers = self._layers
+        for i, element in enumerate(elements):
+            layer = getattr(element, "layer", 0)
+            layers[i] = layer if layer.__class__ is int else 0
+
+        def z(i: int) -> Tuple[int, int]:
+            return layers[i], i
+
+        roots = [i for i, p in enumerate(layout.parents) if p < 0]
+        stack = sorted(roots, key=z, reverse=True)
+        rank = 0
+        while stack:
+            i = stack.pop()
+            self.rank[i] = rank
+            rank += 1
+            stack.extend(sorted(layout.children[i], key=z, reverse=True))
+
+    def _compute(self, i: int):
+        # Read visibility, clip and bounds of one element; its parent must be up to date.
+        layout = self.layout
+        element = layout.elements[i]
+        p = layout.parents[i]
+        clip = self.clip
+        if p >= 0:
+            cx0, cy0, cx1, cy1 = clip[0][p], clip[1][p], clip[2][p], clip[3][p]
+            if layout.box[p] and getattr(layout.elements[p], "clip_descendants", False):
+                x, y, w, h = layout.rects.rect(p)
+                cx0, cy0, cx1, cy1 = max(cx0, x), max(cy0, y), min(cx1, x + w), min(cy1, y + h)
+        else:
+            cx0 = cy0 = -INF
+            cx1 = cy1 = INF
+        clip[0][i], clip[1][i], clip[2][i], clip[3][i] = cx0, cy0, cx1, cy1
+        visible = getattr(element, "visible", True) is not False and (p < 0 or self.visible[p])
+        self.visible[i] = visible
+        if not layout.box[i]:
+            self.shown[i] = 0
+            return
+        x, y, w, h = layout.rects.rect(i)
+        rotation = getattr(element, "rotation", None)
+        angle = math.radians(getattr(rotation, "degrees", 0.0) or 0.0)
+        self.angle[i] = angle
+        if angle:
+            c, s = abs(math.cos(angle)), abs(math.sin(angle))
+            hw, hh = (w * c + h * s) / 2, (w * s + h * c) / 2
+            mx, my = x + w / 2, y + h / 2
+            x0, y0, x1, y1 = mx - hw, my - hh, mx + hw, my + hh
+        else:
+            x0, y0, x1, y1 = x, y, x + w, y + h
+        x0, y0, x1, y1 = max(x0, cx0), max(y0, cy0), min(x1, cx1), min(y1, cy1)
+        b = self.bounds
+        b[0][i], b[1][i], b[2][i], b[3][i] = x0, y0, x1, y1
+        self.shown[i] = visible and x0 < x1 and y0 < y1
+
+    def _span(self, i: int) -> Tuple[int, int, int, int]:
+        size = self.cell_size
+        b = self.bounds
+        return (math.floor(b[0][i] / size), math.floor(b[1][i] / size),
+                math.floor(b[2][i] / size), math.floor(b[3][i] / size))
+
+    def _insert(self, i: int):
+        if not self.shown[i]:
+            return
+        span = self._span(i)
+        gx0, gy0, gx1, gy1 = span
+        if (gx1 - gx0 + 1) * (gy1 - gy0 + 1) > self.max_cells:
+            self._large.add(i)
+            return
+        self._spans[i] = span
+        cells = self._cells
+        for gx in range(gx0, gx1 + 1):
+            for gy in range(gy0, gy1 + 1):
+                cell = cells.get((gx, gy))
+                if cell is None:
+                    cell = cells[gx, gy] = set()
+                cell.add(i)
+
+    def _remove(self, i: int):
+        self._large.discard(i)
+        span = self._spans[i]
+        if span is None:
+            return
+        self._spans[i] = None
+        cells = self._cells
+        gx0, gy0, gx1, gy1 = span
+        for gx in range(gx0, gx1 + 1):
+            for gy in range(gy0, gy1 + 1):
+                cell = cells[gx, gy]
+                cell.discard(i)
+                if not cell:
+                    del cells[gx, gy]
+
+    def update(self, indices: Iterable[int]):
+        """
+        Re-index elements after they moved, resized or changed visibility.
+
+        Pass the set returned by Layout.relayout() after moving elements, or the
+        indices of elements whose visible, rotation, layer or clip_descendants
+        changed. Descendants are refreshed as well, since they inherit clipping
+        and visibility.
+
+        Args:
+            indices (Iterable[int]): Changed elements.
+        """
+        layout = self.layout
+        pending = set()
+        stack = list(indices)
+        while stack:
+            i = stack.pop()
+            if i not in pending:
+                pending.add(i)
+                stack.extend(layout.children[i])
+        layers = self._layers
+        if any(getattr(layout.elements[i], "layer", 0) != layers[i] for i in pending):
+            self._rank_paint_order()
+        for i in sorted(pending):
+            self._remove(i)
+            self._compute(i)
+            self._insert(i)
+
+    def _candidates(self, x0: float, y0: float, x1: float, y1: float) -> Set[int]:
+        size = self.cell_size
+        gx0, gy0 = math.floor(x0 / size), math.floor(y0 / size)
+        gx1, gy1 = math.floor(x1 / size), math.floor(y1 / size)
+        cells = self._cells
+        found = set(self._large)
+        if (gx1 - gx0 + 1) * (gy1 - gy0 + 1) > len(cells):
+            for (gx, gy), cell in cells.items():
+                if gx0 <= gx <= gx1 and gy0 <= gy <= gy1:
+                    found.update(cell)
+            return found
+        for gx in range(gx0, gx1 + 1):
+            for gy in range(gy0, gy1 + 1):
+                cell = cells.get((gx, gy))
+                if cell is not None:
+                    found.update(cell)
+        return found
+
+    def contains(self, index: int, x: float, y: float) -> bool:
+        """
+        Check whether a point lies on a shown element, honoring rotation and clipping.
+
+        Args:
+            index (int): Element index.
+            x (float): Point x in pixels.
+            y (float): Point y in pixels.
+
+        Returns:
+            bool: True if the point hits the element.
+        """
+        if not self.shown[index]:
+            return False
+        b = self.bounds
+        if not (b[0][index] <= x < b[2][index] and b[1][index] <= y < b[3][index]):
+            return False
+        angle = self.angle[index]
+        if not angle:
+            return True
+        rx, ry, w, h = self.layout.rects.rect(index)
+        mx, my = rx + w / 2, ry + h / 2
+        c, s = math.cos(-angle), math.sin(-angle)
+        dx, dy = x - mx, y - my
+        lx, ly = dx * c - dy * s, dx * s + dy * c
+        return -w / 2 <= lx < w / 2 and -h / 2 <= ly < h / 2
+
+    def hit(self, x: float, y: float, predicate: Optional[Callable[[Any], bool]] = None) -> List[int]:
+        """
+        Find the elements under a point.
+
+        Args:
+            x (float): Point x in pixels.
+            y (float): Point y in pixels.
+            predicate (Callable[[Any], bool] | None): Only return elements it accepts, e.g. buttons and links.
+
+        Returns:
+            List[int]: Element indices, topmost first.
+        """
+        elements = self.layout.elements
+        found = [i for i in self._candidates(x, y, x, y)
+                 if self.contains(i, x, y) and (predicate is None or predicate(elements[i]))]
+        found.sort(key=self.rank.__getitem__, reverse=True)
+        return found
+
+    def top(self, x: float, y: float, predicate: Optional[Callable[[Any], bool]] = None) -> int:
+        """
+        Find the topmost element under a point.
+
+        Args:
+            x (float): Point x in pixels.
+            y (float): Point y in pixels.
+            predicate (Callable[[Any], bool] | None): Only consider elements it accepts.
+
+        Returns:
+            int: Element index, or -1 if nothing is hit.
+        """
+        elements = self.layout.elements
+        best, best_rank = -1, -1
+        rank = self.rank
+        for i in self._candidates(x, y, x, y):
+            if rank[i] > best_rank and self.contains(i, x, y) and (predicate is None or predicate(elements[i])):
+                best, best_rank = i, rank[i]
+        return best
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> List[int]:
+        """
+        Find shown elements whose bounding box overlaps a rectangle.
+
+        Args:
+            x0 (float): Left edge in pixels.
+            y0 (float): Top edge in pixels.
+            x1 (float): Right edge in pixels.
+            y1 (float): Bottom edge in pixels.
+
+        Returns:
+            List[int]: Element indices in ascending order.
+        """
+        b0, b1, b2, b3 = self.bounds
+        return sorted(i for i in self._candidates(x0, y0, x1, y1)
+                      if b0[i] < x1 and x0 < b2[i] and b1[i] < y1 and y0 < b3[i])
+
+    def overlaps(self) -> Iterator[Tuple[int, int]]:
+        """
+        Find pairs of shown elements whose bounding boxes overlap.
+
+        An element overlapping its own ancestor is expected and not reported.
+        Parents come before their children, so b is never an ancestor of a.
+
+        Yields:
+            Tuple[int, int]: Index pairs (a, b) with a < b.
+        """
+        parents = self.layout.parents
+        b0, b1, b2, b3 = self.bounds
+        for a in range(len(parents)):
+            if not self.shown[a]:
+                continue
+            for b in self._candidates(b0[a], b1[a], b2[a], b3[a]):
+                if b > a and b0[b] < b2[a] and b0[a] < b2[b] and b1[b] < b3[a] and b1[a] < b3[b]:
+                    p = parents[b]
+                    while p >= 0 and p != a:
+                        p = parents[p]
+                    if p != a:
+                        yield a, b
@@ -0,0 +1,187 @@
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+
+class ElementTree:
+    """
+    Parent/child structure over a flat list of elements.
+
+    Elements are numbered in depth-first order when the tree is built:
+    enter[i] is the position of element i in that order and exit[i] the
+    position just past its last descendant. So ancestry is two integer
+    comparisons, and the descendants of i are the contiguous slice
+    order[enter[i] + 1:exit[i]].
+
+    Names are indexed to the depth-first positions of every element with
+    that name. Descendant searches are a binary search in that list.
+
+    The tree is immutable; build a new one after adding, removing or
+    reparenting elements.
+    """
+
+    def __init__(self, elements: Sequence[Any], parents: Sequence[int]):
+        """
+        Args:
+            elements (Sequence[Any]): Element dataclasses, each parent before its children.
+            parents (Sequence[int]): Index of each element's parent, or -1 for top-level elements.
+
+        Raises:
+            ValueError: If the lengths differ or a parent comes after its child.
+        """
+        n = len(elements)
+        if len(parents) != n:
+            raise ValueError("elements and parents must have the same length")
+        self.elements = elements
+        self.parents = array("i", parents)
+        self.children: List[List[int]] = [[] for _ in range(n)]
+        roots: List[int] = []
+        for i, p in enumerate(self.parents):
+            if p >= i:
+                raise ValueError(f"Parent of element {i} must come before it")
+            (self.children[p] if p >= 0 else roots).append(i)
+
+        self.order = array("i", bytes(4 * n))
+        self.enter = array("i", bytes(4 * n))
+        self.exit = array("i", bytes(4 * n))
+        self.depth = array("i", bytes(4 * n))
+        position = 0
+        stack = [(i, False) for i in reversed(roots)]
+        while stack:
+            i, done = stack.pop()
+            if done:
+                self.exit[i] = position
+                continue
+            self.order[position] = i
+            self.enter[i] = position
+            position += 1
+            p = self.parents[i]
+            self.depth[i] = self.depth[p] + 1 if p >= 0 else 0
+            stack.append((i, True))
+            stack.extend((c, False) for c in reversed(self.children[i]))
+
+        self._names: Dict[str, array] = {}
+        for i in self.order:
+            name = getattr(elements[i], "name", None)
+            if name is not None:
+                self._names.setdefault(name, array("i")).append(self.enter[i])
+        self._index = {id(e): i for i, e in enumerate(elements)}
+
+    def __len__(self):
+        return len(self.parents)
+
+    def index(self, element: Any) -> int:
+        """
+        Get the index of an element object in the tree.
+
+        Args:
+            element (Any): An element from elements.
+
+        Returns:
+            int: Its index, or -1 if it is not part of the tree.
+        """
+        return self._index.get(id(element), -1)
+
+    def find(self, name: str) -> List[int]:
+        """Get every element with a name, in depth-first order."""
+        order = self.order
+        return [order[pos] for pos in self._names.get(name, ())]
+
+    def parent(self, index: int) -> int:
+        """Get the parent index of an element, or -1 for top-level elements."""
+        return self.parents[index]
+
+    def ancestors(self, index: int) -> Iterator[int]:
+        """Iterate over the ancestors of an element, nearest first."""
+        p = self.parents[index]
+        while p >= 0:
+            yield p
+            p = self.parents[p]
+
+    def descendants(self, index: int) -> array:
+        """Get the descendants of an element in depth-first order."""
+        return self.order[self.enter[index] + 1:self.exit[index]]
+
+    def is_ancestor(self, ancestor: int, index: int) -> bool:
+        """Check whether ancestor is a proper ancestor of index."""
+        return self.enter[ancestor] < self.enter[index] and self.exit[index] <= self.exit[ancestor]
+
+    def is_child(self, child: int, index: int) -> bool:
+        """Check whether child is a direct child of index."""
+        return self.parents[child] == index
+
+    def is_descendant(self, descendant: int, index: int) -> bool:
+        """Check whether descendant is a proper descendant of index."""
+        return self.is_ancestor(index, descendant)
+
+    def find_ancestor(self, index: int, name: str) -> int:
+        """
+        Find the nearest ancestor with a name.
+
+        Args:
+            index (int): Element to start from.
+            name (str): Name to look for.
+
+        Returns:
+            int: The ancestor's index, or -1 if there is none.
+        """
+        if name not in self._names:
+            return -1
+        elements = self.elements
+        for p in self.ancestors(index):
+            if getattr(elements[p], "name", None) == name:
+                return p
+        return -1
+
+    def find_child(self, index: int, name: str) -> int:
+        """
+        Find the first direct child with a name.
+
+        Args:
+            index (int): Parent element.
+            name (str): Name to look for.
+
+        Returns:
+            int: The child's index, or -1 if there is none.
+        """
+        positions = self._names.get(name)
+        if positions is None:
+            return -1
+        children = self.children[index]
+        if len(positions) < len(children):
+            end = self.exit[index]
+            for pos in positions[bisect_left(positions, self.enter[index] + 1):]:
+                if pos >= end:
+                    break
+                i = self.order[pos]
+                if self.parents[i] == index:
+                    return i
+            return -1
+        elements = self.elements
+        for c in children:
+            if getattr(elements[c], "name", None) == name:
+                return c
+        return -1
+
+    def find_descendant(self, index: int, name: str) -> int:
+        """
+        Find the first descendant with a name, in depth-first order.
+
+        Args:
+            index (int): Element to search under.
+            name (str): Name to look for.
+
+        Returns:
+            int: The descendant's index, or -1 if there is none.
+        """
+        positions = self._names.get(name)
+        if positions is None:
+            return -1
+        k = bisect_left(positions, self.enter[index] + 1)
+        if k < len(positions) and positions[k] < self.exit[index]:
+            return self.order[positions[k]]
+        return -1
+
+    def element(self, index: int) -> Optional[Any]:
+        """Get the element at an index, or None for -1."""
+        return self.elements[index] if index >= 0 else None
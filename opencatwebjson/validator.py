@@ -0,0 +1,211 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import orjson
+
+from .ids import ACTIONS, COMMENT, EVENTS, FUNCTION_EVENT, MAX_ACTIONS, MAX_TUPLE
+
+_is_number = re.compile(r"-?\d+(?:\.\d+)?").fullmatch
+
+_SCRIPT_REQUIRED = frozenset(("class", "content", "globalid"))
+_EVENT_REQUIRED = frozenset(("y", "x", "globalid", "id", "text", "actions", "width"))
+_ACTION_REQUIRED = frozenset(("id", "text", "globalid"))
+
+# Allowed keys per string ID, built once so each object costs one subset test.
+_EVENT_KEYS: Dict[str, FrozenSet[str]] = {
+    str(i): _EVENT_REQUIRED | ({"variable_overrides"} if i == FUNCTION_EVENT else set())
+    for i in EVENTS
+}
+_ACTION_KEYS: Dict[str, FrozenSet[str]] = {
+    str(i): _ACTION_REQUIRED | ({"help"} if i == COMMENT else set())
+    for i in ACTIONS
+}
+
+_EXTRA_KEY_MESSAGES = {
+    "warning": "warning key is not allowed",
+    "help": "help key is only allowed on comment actions (ID: 124)",
+    "variable_overrides": "variable_overrides is only allowed on function definitions (ID: 6)",
+}
+
+Location = Tuple[int, ...]
+
+
+@dataclass
+class Violation:
+    """
+    A single rule violation found by the validator.
+
+    Attributes:
+        path (str): JSON path of the offending object or key, e.g. "$[0].content[1].actions[2].id".
+        message (str): Description of the violation.
+    """
+    path: str
+    message: str
+
+
+def format_path(loc: Location, key: Optional[str] = None) -> str:
+    """
+    Build a JSON path from a (script, event, action) index tuple.
+
+    Args:
+        loc (Location): Up to three indices: script, event and action.
+        key (str | None): Optional key appended to the path.
+
+    Returns:
+        str: The JSON path.
+    """
+    path = "$"
+    for name, index in zip(("", ".content", ".actions"), loc):
+        path += f"{name}[{index}]"
+    if key is not None:
+        path += f".{key}"
+    return path
+
+
+def _as_dict(obj: Any) -> Optional[dict]:
+    if obj.__class__ is dict:
+        return obj
+    d = getattr(obj, "__dict__", None)
+    if d is None and isinstance(obj, dict):
+        # The read-only instance dictionary of a cached script (see cache).
+        return obj
+    return d
+
+
+class _Validator:
+    def __init__(self):
+        self.violations: List[Violation] = []
+        self.globalids: Dict[str, Location] = {}
+
+    def report(self, loc: Location, message: str, key: Optional[str] = None):
+        self.violations.append(Violation(format_path(loc, key), message))
+
+    def check_keys(self, d: dict, loc: Location, required: FrozenSet[str], allowed: FrozenSet[str]):
+        keys = d.keys()
+        if not required <= keys:
+            for key in sorted(required - keys):
+                self.report(loc, f"Missing required key '{key}'")
+        if not keys <= allowed:
+            for key in sorted(keys - allowed):
+                self.report(loc, _EXTRA_KEY_MESSAGES.get(key, f"Unknown key '{key}'"), key)
+        gid = d.get("globalid")
+        if gid is None:
+            return
+        if gid.__class__ is not str:
+            self.report(loc, "globalid must be a string", "globalid")
+            return
+        first = self.globalids.setdefault(gid, loc)
+        if first is not loc:
+            self.report(loc, f"Duplicate globalid '{gid}' (first used at {format_path(first)})", "globalid")
+
+    def check_text(self, text: Any, loc: Location):
+        if text.__class__ is not list:
+            if text is not None:
+                self.report(loc, "text must be an array", "text")
+            return
+        for i, item in enumerate(text):
+            if item.__class__ is str:
+                continue
+            p = _as_dict(item)
+            if p is None:
+                self.report(loc, "text entries must be strings or parameter objects", f"text[{i}]")
+            elif p.get("t") == "tuple":
+                value = p.get("value")
+                if value.__class__ is not list:
+                    self.report(loc, "tuple value must be an array", f"text[{i}].value")
+                elif len(value) > MAX_TUPLE:
+                    self.report(loc, f"Tuple has {len(value)} parameters, maximum is {MAX_TUPLE}", f"text[{i}].value")
+
+    def check_action(self, obj: Any, loc: Location):
+        d = _as_dict(obj)
+        if d is None:
+            self.report(loc, "Action must be an object")
+            return
+        aid = d.get("id")
+        allowed = _ACTION_KEYS.get(aid) if aid.__class__ is str else None
+        if allowed is None:
+            allowed = _ACTION_KEYS["0"]
+            if aid.__class__ is str:
+                self.report(loc, f"Unknown action ID {aid!r}", "id")
+            elif "id" in d:
+                self.report(loc, "id must be a string", "id")
+        self.check_keys(d, loc, _ACTION_REQUIRED, allowed)
+        self.check_text(d.get("text"), loc)
+
+    def check_event(self, obj: Any, loc: Location):
+        d = _as_dict(obj)
+        if d is None:
+            self.report(loc, "Event must be an object")
+            return
+        eid = d.get("id")
+        allowed = _EVENT_KEYS.get(eid) if eid.__class__ is str else None
+        if allowed is None:
+            allowed = _EVENT_KEYS["0"]
+            if eid.__class__ is str:
+                self.report(loc, f"Unknown event ID {eid!r}", "id")
+            elif "id" in d:
+                self.report(loc, "id must be a string", "id")
+        self.check_keys(d, loc, _EVENT_REQUIRED, allowed)
+        for key in ("x", "y", "width"):
+            value = d.get(key)
+            if value is not None and (value.__class__ is not str or not _is_number(value)):
+                self.report(loc, f"{key} must be a string-encoded number", key)
+        self.check_text(d.get("text"), loc)
+        overrides = d.get("variable_overrides")
+        if overrides is not None and overrides.__class__ is not list:
+            self.report(loc, "variable_overrides must be an array", "variable_overrides")
+        actions = d.get("actions")
+        if actions.__class__ is not list:
+            if actions is not None:
+                self.report(loc, "actions must be an array", "actions")
+            return
+        if len(actions) > MAX_ACTIONS:
+            self.report(loc, f"Event has {len(actions)} actions, maximum is {MAX_ACTIONS}", "actions")
+        check_action = self.check_action
+        for i, action in enumerate(actions):
+            check_action(action, loc + (i,))
+
+    def check_script(self, obj: Any, loc: Location):
+        d = _as_dict(obj)
+        if d is None:
+            self.report(loc, "Script must be an object")
+            return
+        self.check_keys(d, loc, _SCRIPT_REQUIRED, _SCRIPT_REQUIRED)
+        if "class" in d and d["class"] != "script":
+            self.report(loc, "class must be 'script'", "class")
+        content = d.get("content")
+        if content.__class__ is not list:
+            if content is not None:
+                self.report(loc, "content must be an array", "content")
+            return
+        for i, event in enumerate(content):
+            self.check_event(event, loc + (i,))
+
+
+def validate(data: Any) -> List[Violation]:
+    """
+    Check CatWeb script JSON against the rules in the format documentation.
+
+    All rules are checked in a single pass. globalid uniqueness is tracked
+    in a hash index, and the allowed keys for each event and action ID are
+    precomputed.
+
+    Args:
+        data (Any): Raw JSON (bytes or str), the decoded root array, or a list of ScriptObject.
+
+    Returns:
+        List[Violation]: Every violation found, in document order. Empty if valid.
+
+    Raises:
+        ValueError: If data is raw JSON that cannot be parsed.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview, str)):
+        data = orjson.loads(data)
+    v = _Validator()
+    if data.__class__ is not list:
+        v.violations.append(Violation("$", "Root must be an array"))
+        return v.violations
+    for i, script in enumerate(data):
+        v.check_script(script, (i,))
+    return v.violations
@@ -0,0 +1,83 @@
+import os
+from typing import Any, List, Optional
+
+from opencatwebjson.classes import HexColor, Range01, Rotation, ScaleOffset, Size2, Vector2
+from opencatwebjson.elements import Frame
+from opencatwebjson.literals import Vec2
+
+SAMPLE_PATH = os.path.join(os.path.dirname(__file__), "data", "sample.json")
+
+with open(SAMPLE_PATH, "rb") as _fp:
+    SAMPLE = _fp.read().strip()
+"""Compact export with a loaded event, a function "add" and a message handler."""
+
+
+def param(value: Any, l: Optional[str] = "any", t: Optional[str] = "string") -> dict:  # noqa: E741
+    """Build a parameter dictionary."""
+    d = {"value": value}
+    if t is not None:
+        d["t"] = t
+    if l is not None:
+        d["l"] = l
+    return d
+
+
+def var(name: str) -> dict:
+    """Build a variable parameter."""
+    return param(name, "variable")
+
+
+def tup(*values: Any) -> dict:
+    """Build a tuple parameter from literal values or parameter dictionaries."""
+    return {"value": [v if v.__class__ is dict else param(v) for v in values], "t": "tuple"}
+
+
+def action(aid: int, *text: Any, globalid: Optional[str] = None) -> dict:
+    """Build an action dictionary."""
+    return {"id": str(aid), "text": list(text), "globalid": globalid}
+
+
+def event(eid: int, actions: List[dict], *text: Any, globalid: str = "e", x: str = "0", y: str = "0",
+          overrides: Optional[List[str]] = None) -> dict:
+    """Build an event dictionary."""
+    d = {"id": str(eid), "text": list(text) or ["When website loaded..."], "actions": actions,
+         "globalid": globalid, "x": x, "y": y, "width": "350"}
+    if overrides is not None:
+        d["variable_overrides"] = [{"value": name} for name in overrides]
+    return d
+
+
+def function(name: str, parameters: List[str], actions: List[dict], globalid: Optional[str] = None) -> dict:
+    """Build a Define function event."""
+    return event(6, actions, "Define function", param(name, "function"),
+                 globalid=globalid or "f_" + name, overrides=parameters)
+
+
+def script(*events: dict, globalid: str = "s") -> dict:
+    """Build a script dictionary."""
+    return {"class": "script", "content": list(events), "globalid": globalid}
+
+
+def number_ids(doc: List[dict]) -> List[dict]:
+    """Give every event and action without a globalid a unique one, in place."""
+    n = 0
+    for s in doc:
+        for e in s["content"]:
+            for a in e["actions"]:
+                if a.get("globalid") is None:
+                    n += 1
+                    a["globalid"] = f"g{n}"
+    return doc
+
+
+def frame(name: str = "f", x: float = 0, y: float = 10) -> Frame:
+    """Build a Frame with every field set."""
+    return Frame(name, Range01(0.5), HexColor("#fff"), Vector2(ScaleOffset(x, 10), ScaleOffset(0.5, y - 14)),
+                 Size2(ScaleOffset(1, 0), ScaleOffset(0, 30)), Rotation(45), Vec2(0.5, 0.5), 2, "tip", False, True)
+
+
+def box(x=(0, 0), y=(0, 0), w=(0, 0), h=(0, 0), anchor=(0, 0), name: str = "f", layer: int = 1,
+        rotation: float = 0, clip: bool = False, visible: bool = True) -> Frame:
+    """Build a Frame from (scale, offset) pairs for its position and size."""
+    return Frame(name, Range01(0), HexColor("#000"), Vector2(ScaleOffset(*x), ScaleOffset(*y)),
+                 Size2(ScaleOffset(*w), ScaleOffset(*h)), Rotation(rotation), Vec2(*anchor), layer, "", clip, visible)
@@ -0,0 +1,66 @@
+import io
+
+import orjson
+import pytest
+
+from opencatwebjson import dumps, loads
+from opencatwebjson.binary import MAGIC, dump_bytes, from_bytes, load_bytes, to_bytes
+
+from .helpers import SAMPLE, frame
+
+VALUES = [
+    None, True, False, 0, -1, 2 ** 40, -(2 ** 40), 1.5, -0.0, "", "x", "0", "127", "128", "-2", "007", "-0", "1.0",
+    "é\U0001F600", [], {}, [1, [2, [3]]], {"a": {"b": None}}, ["s"] * 100,
+    [{"k": i} for i in range(3)], [{f"k{i}": i} for i in range(60)], [f"s{i}" for i in range(100)],
+]
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_plain_values_round_trip(value):
+    decoded = from_bytes(to_bytes(value), raw=True)
+    assert orjson.dumps(decoded) == orjson.dumps(value)
+
+
+def test_scripts_round_trip():
+    data = to_bytes(loads(SAMPLE))
+    assert data.startswith(MAGIC)
+    assert dumps(from_bytes(data)) == SAMPLE
+    assert from_bytes(data) == loads(SAMPLE)
+    assert to_bytes(orjson.loads(SAMPLE)) == data
+
+
+def test_binary_is_smaller_than_json():
+    assert len(to_bytes(loads(SAMPLE))) < len(SAMPLE) * 0.6
+
+
+def test_elements_encode_as_their_json():
+    assert from_bytes(to_bytes([frame()]), raw=True) == orjson.loads(dumps([frame()]))
+
+
+def test_file_helpers():
+    fp = io.BytesIO()
+    dump_bytes(loads(SAMPLE), fp)
+    fp.seek(0)
+    assert load_bytes(fp) == loads(SAMPLE)
+
+
+def test_every_truncation_raises_value_error():
+    data = to_bytes([1.5, loads(SAMPLE)])
+    for n in range(len(data)):
+        with pytest.raises(ValueError):
+            from_bytes(data[:n], raw=True)
+
+
+def test_bad_documents():
+    with pytest.raises(ValueError, match="Not a binary"):
+        from_bytes(b"[1]")
+    with pytest.raises(ValueError, match="Trailing"):
+        from_bytes(to_bytes([]) + b"\x00")
+    with pytest.raises(ValueError, match="Unknown tag"):
+        from_bytes(MAGIC + b"\x00\x00\x0f")
+    with pytest.raises(ValueError, match="Root"):
+        from_bytes(to_bytes({}))
+    with pytest.raises(TypeError):
+        from_bytes(SAMPLE.decode())
+    with pytest.raises(TypeError):
+        to_bytes([object()])
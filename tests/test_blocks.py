@@ -0,0 +1,64 @@
+from opencatwebjson import loads
+from opencatwebjson.blocks import action_id, match_blocks
+from opencatwebjson.cli import lint
+from opencatwebjson.runtime import Runtime
+
+from .helpers import SAMPLE, action, event, param, script
+
+
+def table(*ids):
+    return match_blocks([action(i) for i in ids], (0, 0))
+
+
+def test_action_id_accepts_dicts_and_objects():
+    assert action_id(action(18)) == 18
+    assert action_id(loads(SAMPLE)[0].content[0].actions[1]) == 22
+    assert action_id({"id": "x"}) == action_id({}) == -1
+
+
+def test_out_of_range_ids_are_unknown():
+    assert action_id({"id": "99999999999"}) == action_id({"id": "-99999999999"}) == action_id({"id": 1e300}) == -1
+    assert action_id({"id": float("inf")}) == -1
+    assert action_id({"id": str(2 ** 31 - 1)}) == 2 ** 31 - 1
+    t = match_blocks([action(99999999999), action(22), action(25)])
+    assert t.balanced and list(t.ids) == [-1, 22, 25]
+    doc = [script(event(0, [action(99999999999), action(0, "Log", param("after"))]))]
+    assert lint(doc) == []
+    rt = Runtime(doc)
+    rt.start()
+    rt.run()
+    assert [entry.message for entry in rt.log] == ["after"] and -1 in rt.skipped
+
+
+def test_sample_jump_tables():
+    t = match_blocks(loads(SAMPLE)[0].content[0].actions)
+    assert t.balanced
+    assert t.end_of[1] == 3 and t.opener_of[3] == 1
+    assert t.else_of[4] == 6 and t.end_of[4] == t.end_of[6] == 8
+    assert t.opener_of[6] == t.opener_of[8] == 4
+    assert list(t.depth) == [0, 0, 1, 0, 0, 1, 0, 1, 0, 0, 0, 0]
+    assert t.body(4) == range(5, 8)
+
+
+def test_nested_blocks():
+    # If, Repeat, end, else, end
+    t = table(18, 22, 0, 25, 112, 25)
+    assert t.balanced
+    assert list(t.end_of) == [5, 3, -1, -1, 5, -1]
+    assert list(t.opener_of) == [-1, -1, -1, 1, 0, 0]
+    assert list(t.depth) == [0, 1, 2, 1, 0, 0]
+
+
+def test_unbalanced_blocks_are_reported():
+    assert [(e.path, e.message) for e in table(25, 112).errors] == [
+        ("$[0].content[0].actions[0]", "end without a matching block"),
+        ("$[0].content[0].actions[1]", "else without a matching block"),
+    ]
+    t = table(18, 0)
+    assert [e.message for e in t.errors] == ["Block opened by action ID 18 is never closed"]
+    assert t.body(0) == range(1, 2)
+
+
+def test_else_rules():
+    assert [e.message for e in table(22, 112, 25).errors] == ["else inside a non-conditional block (action ID 22)"]
+    assert [e.message for e in table(18, 112, 112, 25).errors] == ["Block already has an else"]
@@ -0,0 +1,89 @@
+import orjson
+import pytest
+
+from opencatwebjson import dumps, loads
+from opencatwebjson.bundle import Bundle, ScriptEntry
+
+from .helpers import SAMPLE, action, event, param, script
+
+# A string that looks like the end of a site followed by the next one.
+TRICKY = orjson.dumps([script(event(0, [action(0, "Log", param("] ["))], globalid="t"), globalid="s2")])
+SPACED = orjson.dumps(orjson.loads(SAMPLE), option=orjson.OPT_INDENT_2)
+
+
+def write(tmp_path, data):
+    path = tmp_path / "bundle.json"
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    with Bundle(write(tmp_path, b"  " + SAMPLE + b"\n" + TRICKY + b"\n\n" + SPACED + b"\n")) as b:
+        yield b
+
+
+def test_sites_and_scripts_are_indexed(bundle):
+    assert len(bundle) == 3
+    assert list(bundle.first_script) == [0, 2, 3, 5]
+    assert [bundle.scripts_of(i) for i in range(3)] == [range(0, 2), range(2, 3), range(3, 5)]
+    assert bundle.globalids == ["script_main", "s2", "s2", "script_main", "s2"]
+    assert bundle.entry(0) == ScriptEntry(0, 3, len(orjson.dumps(orjson.loads(SAMPLE)[0])), "script_main")
+
+
+def test_raw_slices_match_the_file(bundle):
+    assert bytes(bundle.raw_site(0)) == SAMPLE
+    assert bytes(bundle.raw_site(1)) == TRICKY
+    assert bytes(bundle.raw_site(2)) == SPACED
+    for i, expected in enumerate(orjson.loads(SAMPLE)):
+        assert orjson.loads(bundle.raw_script(3 + i)) == expected
+        assert bytes(bundle.raw_script(i)) == orjson.dumps(expected)
+
+
+def test_decoding(bundle):
+    assert bundle.site(0) == bundle.site(2) == loads(SAMPLE)
+    assert bundle.site_data(1) == orjson.loads(TRICKY)
+    assert [dumps(site) for site in bundle.sites()] == [SAMPLE, TRICKY, SAMPLE]
+    assert bundle.script(4) == loads(SAMPLE)[1]
+
+
+def test_find(bundle):
+    assert bundle.find("s2") == [1, 2, 4]
+    assert bundle.find("script_main") == [0, 3]
+    assert bundle.find("missing") == []
+    bundle.find("s2").clear()
+    assert bundle.find("s2") == [1, 2, 4]
+
+
+def test_scripts_without_a_string_globalid(tmp_path):
+    with Bundle(write(tmp_path, b'[{"class":"script","content":[]},{"class":"script","globalid":1,"content":[]}]')) as b:
+        assert b.globalids == [None, None] and b.find("1") == []
+
+
+@pytest.mark.parametrize("data", [b"", b" \n "])
+def test_empty_bundles(tmp_path, data):
+    with Bundle(write(tmp_path, data)) as b:
+        assert len(b) == 0 and list(b.first_script) == [0] and list(b.sites()) == []
+
+
+@pytest.mark.parametrize("data, message", [
+    (b'{"a":1}', "Expected a site array at offset 0"),
+    (SAMPLE + b"\n x", "Expected a site array at offset %d" % (len(SAMPLE) + 2)),
+    (SAMPLE + b"\n x[]", "Expected a site array at offset %d" % (len(SAMPLE) + 2)),
+    (SAMPLE + b"[1]", "Expected a script object in the site at offset %d" % len(SAMPLE)),
+    (b'[{"a":}]', "Invalid JSON at offset 6"),
+    (SAMPLE + b' [{"a":tru}]', "Invalid JSON at offset %d" % (len(SAMPLE) + 7)),
+    (b'[{"a":1}', "Invalid JSON at offset 8"),
+], ids=["object", "trailing", "garbage", "scalar", "bad", "bad-second", "unterminated"])
+def test_errors_report_file_offsets(tmp_path, data, message):
+    with pytest.raises(ValueError, match=message):
+        Bundle(write(tmp_path, data))
+
+
+def test_close_with_live_slices(tmp_path):
+    b = Bundle(write(tmp_path, SAMPLE))
+    raw = b.raw_site(0)
+    with pytest.raises(BufferError):
+        b.close()
+    raw.release()
+    b.close()
@@ -0,0 +1,141 @@
+import copy
+import io
+import os
+import pickle
+import threading
+from dataclasses import FrozenInstanceError
+
+import orjson
+import pytest
+
+from opencatwebjson import dumps, loads, validate
+from opencatwebjson.cache import ParseCache, script_key
+from opencatwebjson.diff import apply_patch
+from opencatwebjson.runtime import Runtime
+from opencatwebjson.script import Action, ScriptObject
+
+from .helpers import SAMPLE
+
+
+def test_repeated_scripts_are_shared():
+    cache = ParseCache()
+    first = cache.loads(SAMPLE)
+    # Whitespace does not change the key.
+    second = cache.load(io.BytesIO(orjson.dumps(orjson.loads(SAMPLE), option=orjson.OPT_INDENT_2)))
+    assert first is not second
+    assert all(a is b for a, b in zip(first, second))
+    assert (cache.hits, cache.misses, len(cache)) == (2, 2, 2)
+    assert script_key(orjson.dumps(orjson.loads(SAMPLE)[0])) in cache
+
+
+def test_cached_scripts_match_loads():
+    cache = ParseCache()
+    for _ in range(2):
+        scripts = cache.loads(SAMPLE)
+        assert scripts == loads(SAMPLE)
+        assert dumps(scripts) == SAMPLE
+        assert isinstance(scripts[0], ScriptObject) and isinstance(scripts[0].content[0].actions[0], Action)
+        assert validate(scripts) == []
+
+
+def test_cached_scripts_are_frozen():
+    script = ParseCache().loads(SAMPLE)[0]
+    action = script.content[0].actions[0]
+    with pytest.raises(FrozenInstanceError):
+        action.id = "1"
+    with pytest.raises(FrozenInstanceError):
+        del script.globalid
+    with pytest.raises(TypeError):
+        action.__dict__["id"] = "1"
+    with pytest.raises(TypeError):
+        action.text[1].__dict__.update(value="x")
+    with pytest.raises(TypeError):
+        apply_patch([script], [{"op": "set", "globalid": "a1", "key": "id", "value": "1"}])
+    assert action.id == "11"
+
+
+def test_copies_are_editable_and_independent():
+    cache = ParseCache()
+    script = cache.loads(SAMPLE)[0]
+    private = copy.deepcopy(script)
+    assert private == script and private.__class__ is ScriptObject
+    private.content[0].actions[0].text[1].value = "changed"
+    assert cache.loads(SAMPLE)[0].content[0].actions[0].text[1].value == "count"
+    shallow = copy.copy(script)
+    shallow.globalid = "other"
+    assert script.globalid == "script_main"
+
+
+def test_pickled_scripts_are_editable():
+    cache = ParseCache()
+    scripts = pickle.loads(pickle.dumps(cache.loads(SAMPLE)))
+    assert scripts == loads(SAMPLE) and dumps(scripts) == SAMPLE
+    action = scripts[0].content[0].actions[0]
+    assert action.__class__ is Action and action.__dict__.__class__ is dict
+    action.text[1].value = "changed"
+    scripts[0].globalid = "other"
+    assert cache.loads(SAMPLE)[0].content[0].actions[0].text[1].value == "count"
+
+
+def test_runtime_runs_cached_scripts():
+    rt = Runtime(ParseCache().loads(SAMPLE))
+    rt.start()
+    rt.run()
+    assert [entry.message for entry in rt.log] == ["ok 10", "res=13"]
+
+
+def test_least_recently_used_scripts_are_evicted():
+    scripts = orjson.loads(SAMPLE)
+    sizes = [len(orjson.dumps(s)) for s in scripts]
+    cache = ParseCache(max_bytes=max(sizes))
+    first = cache.get(orjson.dumps(scripts[0]))
+    cache.get(orjson.dumps(scripts[1]))
+    assert len(cache) == 1 and cache.size == sizes[1]
+    assert cache.get(orjson.dumps(scripts[0])) is not first
+    cache.clear()
+    assert (len(cache), cache.size, cache.hits, cache.misses) == (0, 0, 0, 0)
+
+
+def test_bad_input():
+    with pytest.raises(ValueError):
+        ParseCache().loads(b"{}")
+    with pytest.raises(ValueError):
+        ParseCache().get(b"[]")
+
+
+def test_scripts_persist_in_the_directory(tmp_path):
+    ParseCache(directory=str(tmp_path)).loads(SAMPLE)
+    files = sorted(os.listdir(tmp_path))
+    assert len(files) == 2 and all(f.endswith(ParseCache.SUFFIX) for f in files)
+    cache = ParseCache(directory=str(tmp_path))
+    scripts = cache.loads(SAMPLE)
+    assert (cache.misses, cache.disk_hits) == (2, 2)
+    assert dumps(scripts) == SAMPLE
+    with pytest.raises(FrozenInstanceError):
+        scripts[0].globalid = "x"
+
+
+def test_damaged_files_are_reparsed(tmp_path):
+    ParseCache(directory=str(tmp_path)).loads(SAMPLE)
+    for name in os.listdir(tmp_path):
+        (tmp_path / name).write_bytes(b"garbage")
+    cache = ParseCache(directory=str(tmp_path))
+    assert dumps(cache.loads(SAMPLE)) == SAMPLE
+    assert cache.disk_hits == 0
+    assert ParseCache(directory=str(tmp_path)).loads(SAMPLE) and all(
+        (tmp_path / name).read_bytes() != b"garbage" for name in os.listdir(tmp_path))
+
+
+def test_threads_share_one_copy():
+    cache = ParseCache()
+    results = []
+
+    def work():
+        results.append(cache.loads(SAMPLE)[0])
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(r is results[0] for r in results) and len(cache) == 2
@@ -0,0 +1,195 @@
+import copy
+
+import orjson
+import pytest
+
+from opencatwebjson import dumps, loads, validate
+from opencatwebjson.blocks import action_id
+from opencatwebjson.callgraph import CallSite, call_graph, inline_functions
+from opencatwebjson.globalids import iter_globalids
+from opencatwebjson.runtime import Runtime, to_string
+
+from .helpers import SAMPLE, action, event, function, number_ids, param, script, tup, var
+
+
+def call(name, *arguments, into=None, aid=87):
+    text = ["Run function", param(name, "function"), tup(*arguments)]
+    if into is not None:
+        text += ["→", var(into)]
+    return action(aid, *text)
+
+
+def log(text):
+    return action(0, "Log", param(text))
+
+
+def set_(name, value):
+    return action(11, "Set", var(name), "to", param(value))
+
+
+def ret(value):
+    return action(115, "Return", param(value))
+
+
+def messages(graph):
+    return [(v.path, v.message) for v in graph.violations]
+
+
+def outcome(doc):
+    rt = Runtime(doc)
+    rt.start()
+    rt.run()
+    return [(e.level, e.message) for e in rt.log], {k: to_string(v) for k, v in rt.globals.items()}
+
+
+def test_sample_graph():
+    graph = call_graph(loads(SAMPLE))
+    assert graph.functions == {"add": (0, 1)}
+    assert graph.calls == [CallSite(0, 0, 9, None, "add", 2, False)]
+    assert graph.edges == {"add": set()}
+    assert graph.recursive == set() and graph.unused == [] and graph.violations == []
+    assert call_graph(orjson.loads(SAMPLE)) == graph
+
+
+def test_recursion_and_callers():
+    doc = [script(
+        event(0, [call("a")]),
+        function("a", [], [call("b")]),
+        function("b", [], [call("a"), call("c")]),
+        function("c", [], [call("c")]),
+        function("d", [], [log("x")]),
+    )]
+    graph = call_graph(doc)
+    assert graph.edges == {"a": {"b"}, "b": {"a", "c"}, "c": {"c"}, "d": set()}
+    assert graph.recursive == {"a", "b", "c"}
+    assert graph.callers("c") == {"b", "c"} and graph.callers("d") == set()
+    assert graph.unused == ["d"]
+    assert messages(graph) == [
+        ("$[0].content[1]", "Function 'a' is recursive"),
+        ("$[0].content[2]", "Function 'b' is recursive"),
+        ("$[0].content[3]", "Function 'c' is recursive"),
+        ("$[0].content[4]", "Function 'd' is never called"),
+    ]
+
+
+def test_long_call_chains_do_not_hit_the_recursion_limit():
+    n = 3000
+    functions = [function(f"f{i}", [], [call(f"f{i + 1}")] if i + 1 < n else []) for i in range(n)]
+    graph = call_graph([script(event(0, [call("f0")]), *functions)])
+    assert graph.recursive == set() and graph.unused == []
+
+
+def test_arity_unknown_and_duplicate_functions():
+    doc = [script(
+        event(0, [call("f", "1"), call("f", "1", "2"), call("g"),
+                  action(114, "Run math function", param("nope"), tup()),
+                  action(114, "Run math function", param("sqrt"), tup("4"))]),
+        function("f", ["x", "y"], []),
+        function("f", ["x"], []),
+    )]
+    assert messages(call_graph(doc)) == [
+        ("$[0].content[2]", "Function 'f' is already defined; the first definition is used"),
+        ("$[0].content[0].actions[0]", "Function 'f' takes 2 arguments, got 1"),
+        ("$[0].content[0].actions[2]", "Unknown function 'g'"),
+        ("$[0].content[0].actions[3]", "Unknown math function 'nope'"),
+    ]
+
+
+def test_computed_calls_disable_unused():
+    doc = [script(event(0, [call("{name}")]), function("f", [], []))]
+    graph = call_graph(doc)
+    assert graph.calls[0].callee is None and graph.unused == [] and graph.violations == []
+
+
+def test_background_calls_are_edges_but_not_inlined():
+    doc = number_ids([script(event(0, [call("f", aid=63)]), function("f", [], [log("x")]))])
+    graph = call_graph(doc)
+    assert graph.calls[0].background and graph.unused == []
+    assert inline_functions(doc) == []
+
+
+def test_inlining_the_sample_keeps_its_behavior():
+    doc = loads(SAMPLE)
+    before = outcome(loads(SAMPLE))
+    assert inline_functions(doc) == [CallSite(0, 0, 9, None, "add", 2, False)]
+    actions = doc[0].content[0].actions
+    assert 87 not in [action_id(a) for a in actions]
+    assert outcome(doc) == before
+    assert before[0] == [("info", "ok 10"), ("info", "res=13")]
+    assert validate(doc) == []
+    ids = list(iter_globalids(doc))
+    assert len(ids) == len(set(ids))
+    assert call_graph(doc).unused == ["add"]
+    assert loads(dumps(doc)) == doc
+
+
+def run_inlined(*events, max_actions=8):
+    doc = number_ids([script(*copy.deepcopy(events))])
+    expected = outcome(number_ids([script(*copy.deepcopy(events))]))
+    inlined = inline_functions(doc, max_actions)
+    assert outcome(doc) == expected
+    return inlined, doc
+
+
+def test_inlined_locals_do_not_clash_with_the_caller():
+    f = function("f", ["a"], [set_("l!t", "{l!a}"), action(12, "Increase", var("l!t"), "by", param("1")),
+                              ret("{l!t}")])
+    main = event(0, [set_("l!t", "100"), set_("l!a", "50"), call("f", "{l!t}", into="r"),
+                     log("{r} {l!t} {l!a}")])
+    inlined, doc = run_inlined(main, f)
+    assert len(inlined) == 1
+    assert outcome(doc)[0] == [("info", "101 100 50")]
+
+
+def test_literal_arguments_are_substituted():
+    f = function("f", ["a", "b"], [log("{l!a}-{l!b}")])
+    inlined, doc = run_inlined(event(0, [call("f", "x", "{y}")]), f)
+    actions = doc[0]["content"][0]["actions"]
+    assert len(inlined) == 1 and len(actions) == 2
+    assert actions[1]["text"][1]["value"].startswith("x-{l!")
+
+
+def test_calls_in_loops_and_repeated_calls():
+    f = function("f", ["a"], [action(12, "Increase", var("total"), "by", param("{l!a}")), ret("{total}")])
+    loop = event(0, [action(22, "Repeat", param("3", t="number"), "times"), call("f", "2", into="r"),
+                     action(25, "end"), call("f", "10", into="s"), log("{r} {s} {total}")])
+    inlined, doc = run_inlined(loop, f)
+    assert len(inlined) == 2
+    assert outcome(doc)[0] == [("info", "6 16 16")]
+
+
+@pytest.mark.parametrize("body", [
+    [action(18, "If", param("1"), "is equal to", param("1")), ret("a"), action(25, "end"), ret("b")],
+    [action(24, "Break"), log("x")],
+    [action(113, "Iterate through", var("list")), action(25, "end")],
+    [log("{l!unset}")],
+    [log("x")] * 9,
+])
+def test_functions_that_depend_on_being_called_are_kept(body):
+    inlined, doc = run_inlined(event(0, [call("f", "1")]), function("f", ["a"], body))
+    assert inlined == []
+
+
+def test_unbalanced_functions_are_kept():
+    doc = number_ids([script(event(0, [call("f")]), function("f", [], [action(25, "end")]))])
+    assert inline_functions(doc) == []
+
+
+def test_recursive_and_mismatched_calls_are_kept():
+    f = function("f", ["a"], [call("f", "{l!a}")])
+    g = function("g", ["a"], [log("{l!a}")])
+    inlined, _ = run_inlined(event(0, [call("g", "1", "2"), call("f", "1")]), f, g)
+    assert inlined == []
+
+
+def test_object_variables_only_inline_within_their_script():
+    f = function("f", [], [set_("o!x", "1")])
+    doc = number_ids([script(event(0, [call("f")], globalid="same"), f, globalid="s1"),
+                      script(event(0, [call("f")], globalid="other"), globalid="s2")])
+    assert [site.script for site in inline_functions(doc)] == [0]
+
+
+def test_inlining_respects_the_action_limit():
+    f = function("f", [], [log("x")] * 8)
+    inlined, doc = run_inlined(event(0, [log("y")] * 110 + [call("f"), call("f")]), f)
+    assert len(inlined) == 1 and len(doc[0]["content"][0]["actions"]) == 119
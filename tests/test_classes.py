@@ -0,0 +1,85 @@
+import copy
+import pickle
+
+import pytest
+
+from opencatwebjson.classes import GeometryBuffer, HexColor, Range01, Rotation, ScaleOffset, Size2, Vector2
+
+
+def position(x: float = 0.5, y: float = 10) -> Vector2:
+    return Vector2(ScaleOffset(x, 4), ScaleOffset(0, y))
+
+
+def size() -> Size2:
+    return Size2(ScaleOffset(1, -8), ScaleOffset(0.25, 0))
+
+
+@pytest.mark.parametrize("value", [HexColor("#abc"), Range01(0.3), ScaleOffset(0.5, 2), position(), size()])
+def test_value_classes_are_slotted_and_immutable(value):
+    assert not hasattr(value, "__dict__")
+    with pytest.raises(AttributeError):
+        value.x = 1
+    with pytest.raises(AttributeError):
+        del value.__slots__
+
+
+def test_equality_and_hashing_use_the_slot_values():
+    assert HexColor("#abc") == HexColor("#ABC")
+    assert position() == position() and position() != position(y=11)
+    assert len({position(), position(), size()}) == 2
+    assert ScaleOffset(0.5, 2) != Range01(0.5)
+
+
+@pytest.mark.parametrize("value", [HexColor("#abc"), Range01(0.3), position(), size()])
+def test_value_classes_pickle_and_copy(value):
+    assert pickle.loads(pickle.dumps(value)) == value
+    assert copy.deepcopy(value) == value
+
+
+def test_key_follows_init_order():
+    assert ScaleOffset(0.5, 2)._key() == (0.5, 2)
+    assert position()._key() == (ScaleOffset(0.5, 4), ScaleOffset(0, 10))
+
+
+def test_validation_still_applies():
+    with pytest.raises(ValueError):
+        HexColor("abc")
+    with pytest.raises(ValueError):
+        Range01(2)
+    with pytest.raises(ValueError):
+        ScaleOffset(-0.1, 0)
+
+
+def test_to_pixels():
+    assert position().to_pixels(200, 100) == (104, 10)
+    assert size().to_pixels(200, 100) == (192, 25)
+
+
+def test_rotation_stays_mutable_and_unhashable():
+    r = Rotation(350)
+    r.add(20)
+    assert r == Rotation(370) and r.normalized_360() == 10
+    r.set(270)
+    assert r.normalized_180() == -90
+    with pytest.raises(TypeError):
+        hash(r)
+
+
+def test_geometry_buffer_round_trips_entries():
+    buf = GeometryBuffer([(position(), size()), (position(0, 1), size())])
+    assert len(buf) == 2
+    assert buf.position(0) == position() and buf.size(1) == size()
+    assert buf.append(position(1, 2), size()) == 2
+    buf.set_position(0, position(0.25, 3))
+    assert buf.position(0) == position(0.25, 3)
+    buf.set_size(1, Size2(ScaleOffset(0, 5), ScaleOffset(0, 6)))
+    assert buf.size(1).to_pixels(10, 10) == (5, 6)
+
+
+def test_geometry_buffer_to_pixels_matches_value_classes():
+    items = [(position(0.1 * i, i), size()) for i in range(5)]
+    xs, ys, ws, hs = GeometryBuffer(items).to_pixels(300, 150)
+    for i, (p, s) in enumerate(items):
+        assert (xs[i], ys[i]) == p.to_pixels(300, 150)
+        assert (ws[i], hs[i]) == s.to_pixels(300, 150)
+
@@ -0,0 +1,101 @@
+import orjson
+import pytest
+
+from opencatwebjson import cli, loads
+from opencatwebjson.binary import from_bytes
+from opencatwebjson.cli import check_file, find_files, lint, main, run
+
+from .helpers import SAMPLE, action, event, script
+
+UNBALANCED = orjson.dumps([script(event(0, [action(25, globalid="a")], globalid="e"))])
+INVALID = orjson.dumps([script(event(0, [{"id": "0", "globalid": "a"}], globalid="e"))])
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "sub" / "deep").mkdir(parents=True)
+    (tmp_path / "a.json").write_bytes(SAMPLE)
+    (tmp_path / "sub" / "b.json").write_bytes(SAMPLE + b"\n")
+    (tmp_path / "sub" / "deep" / "c.json").write_bytes(UNBALANCED)
+    (tmp_path / "sub" / "notes.txt").write_text("not a site")
+    return tmp_path
+
+
+def test_lint_reports_blocks_and_scopes():
+    assert lint(loads(SAMPLE)) == []
+    assert [(v.path, v.message) for v in lint(loads(UNBALANCED))] == [
+        ("$[0].content[0].actions[0]", "end without a matching block")]
+
+
+def test_check_file_writes_json_and_binary(tmp_path):
+    path = tmp_path / "site.json"
+    path.write_bytes(SAMPLE)
+    result = check_file(str(path), str(tmp_path / "out" / "site.json"), indent=True)
+    assert result == {"path": str(path), "ok": True, "violations": [], "lint": [], "roundtrip": True,
+                      "output": str(tmp_path / "out" / "site.json")}
+    assert loads((tmp_path / "out" / "site.json").read_bytes()) == loads(SAMPLE)
+    assert b"\n" in (tmp_path / "out" / "site.json").read_bytes()
+    check_file(str(path), str(tmp_path / "site.cwb"), fmt="binary")
+    assert from_bytes((tmp_path / "site.cwb").read_bytes()) == loads(SAMPLE)
+
+
+def test_check_file_failures(tmp_path):
+    missing = check_file(str(tmp_path / "missing.json"))
+    assert not missing["ok"] and missing["error"].startswith("FileNotFoundError")
+    (tmp_path / "broken.json").write_bytes(b"[{")
+    assert check_file(str(tmp_path / "broken.json"))["error"].startswith("JSONDecodeError")
+    (tmp_path / "invalid.json").write_bytes(INVALID)
+    result = check_file(str(tmp_path / "invalid.json"))
+    assert not result["ok"] and "error" not in result
+    assert result["violations"] == [{"path": "$[0].content[0].actions[0]", "message": "Missing required key 'text'"}]
+    (tmp_path / "spaced.json").write_bytes(orjson.dumps(orjson.loads(SAMPLE), option=orjson.OPT_INDENT_2))
+    assert check_file(str(tmp_path / "spaced.json"))["roundtrip"] is False
+
+
+def test_unexpected_errors_only_fail_their_file(tree, monkeypatch):
+    def crash(scripts):
+        if len(scripts) == 1:
+            raise RecursionError("too deep")
+        return []
+
+    monkeypatch.setattr(cli, "lint", crash)
+    results = list(run([str(tree)], 1, chunk_size=3))
+    assert [r["ok"] for r in results] == [True, True, False]
+    assert results[2]["error"] == "RecursionError: too deep"
+
+
+def test_find_files(tree):
+    found = list(find_files([str(tree)]))
+    assert [p for p, _ in found] == [str(tree / "a.json"), str(tree / "sub" / "b.json"),
+                                     str(tree / "sub" / "deep" / "c.json")]
+    assert all(base == str(tree) for _, base in found)
+    assert list(find_files([str(tree / "sub" / "**" / "*.json")])) == [
+        (str(tree / "sub" / "b.json"), str(tree / "sub")), (str(tree / "sub" / "deep" / "c.json"), str(tree / "sub"))]
+    assert list(find_files([str(tree / "a.json")])) == [(str(tree / "a.json"), str(tree))]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_mirrors_the_input_layout(tree, tmp_path_factory, workers):
+    out = tmp_path_factory.mktemp("out")
+    results = sorted(run([str(tree)], workers, chunk_size=2, output_dir=str(out), fmt="binary"),
+                     key=lambda r: r["path"])
+    assert [r["path"] for r in results] == [p for p, _ in find_files([str(tree)])]
+    assert all(r["ok"] for r in results)
+    assert [bool(r["lint"]) for r in results] == [False, False, True]
+    assert sorted(p.relative_to(out).as_posix() for p in out.rglob("*.cwb")) == [
+        "a.cwb", "sub/b.cwb", "sub/deep/c.cwb"]
+    assert from_bytes((out / "sub" / "b.cwb").read_bytes()) == loads(SAMPLE)
+
+
+def test_main_exit_codes(tree, capsysbinary):
+    assert main([str(tree), "-j", "1"]) == 0
+    out, err = capsysbinary.readouterr()
+    assert [orjson.loads(line)["ok"] for line in out.splitlines()] == [True, True, True]
+    assert err == b"3 files, 0 failed\n"
+    assert main([str(tree), "-j", "1", "--strict"]) == 1
+    assert capsysbinary.readouterr()[1] == b"3 files, 1 failed\n"
+    (tree / "invalid.json").write_bytes(INVALID)
+    assert main([str(tree / "invalid.json"), "-j", "1"]) == 1
+    assert main([str(tree / "nothing" / "*.json")]) == 2
+    with pytest.raises(SystemExit):
+        main([str(tree), "--chunk-size", "0"])
@@ -0,0 +1,105 @@
+from unittest import mock
+
+import orjson
+import pytest
+
+from opencatwebjson import compiler, loads
+from opencatwebjson.cache import ParseCache
+from opencatwebjson.compiler import (CONST, REF, TEMPLATE, TUPLE, ProgramCache, compile_event, compile_operand,
+                                     resolve_slot)
+from opencatwebjson.runtime import Runtime
+from opencatwebjson.scopes import GLOBAL, LOCAL, OBJECT
+
+from .helpers import SAMPLE, action, event, param, script, tup, var
+
+
+def test_resolve_slot():
+    assert resolve_slot("x") == (GLOBAL, "x")
+    assert resolve_slot("o!x") == (OBJECT, "x")
+    assert resolve_slot("l!x") == (LOCAL, "x")
+
+
+def test_operand_kinds():
+    assert compile_operand(param("5")).kind == CONST
+    ref = compile_operand(param("{l!a}"))
+    assert (ref.kind, ref.data) == (REF, (LOCAL, "a"))
+    template = compile_operand(param("a {x} b {o!y}"))
+    assert (template.kind, template.data) == (TEMPLATE, ("a ", (GLOBAL, "x"), " b ", (OBJECT, "y")))
+    t = compile_operand(tup("{x}", "2"))
+    assert t.kind == TUPLE and [o.kind for o in t.data] == [REF, CONST]
+    assert compile_operand(var("o!v")).slot == (OBJECT, "v")
+
+
+def test_sample_program():
+    program = compile_event(orjson.loads(SAMPLE)[0]["content"][0])
+    assert program.globalid == "+!"
+    assert list(program.ops) == [11, 22, 12, 25, 18, 0, 112, 2, 25, 87, 0, 124]
+    # Repeat skips past its end, the loop's end jumps back, If jumps past else, else past end.
+    assert list(program.jumps[:9]) == [-1, 4, -1, 1, 7, -1, 9, -1, -1]
+    assert program.outputs[0] == (GLOBAL, "count") and program.outputs[9] == (GLOBAL, "res")
+    assert program.errors == []
+
+
+def test_break_jumps_past_the_innermost_loop():
+    actions = [action(22, param("2")), action(24), action(25), action(24)]
+    assert list(compile_event(event(0, actions)).jumps) == [3, 3, 0, 4]
+
+
+def test_unbalanced_events_carry_errors():
+    assert compile_event(event(0, [action(25)])).errors
+
+
+def test_cache_hits_until_actions_change():
+    cache = ProgramCache()
+    doc = orjson.loads(SAMPLE)
+    e = doc[0]["content"][0]
+    first = cache.get(e)
+    assert cache.get(e) is first and cache.get(loads(SAMPLE)[0].content[0]) is first
+    assert (cache.hits, cache.misses, len(cache)) == (2, 1, 1)
+    e["actions"][5]["text"][1]["value"] = "changed {total}"
+    second = cache.get(e)
+    assert second is not first and second.args[5][0].data[0] == "changed "
+    cache.invalidate("+!")
+    assert len(cache) == 0
+    cache.get(e)
+    assert list(cache) and cache.misses == 3
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses) == (0, 0, 0)
+
+
+def test_cache_evicts_least_recently_used_programs():
+    cache = ProgramCache(max_entries=2)
+    events = [event(0, [action(0, "Log", param(str(i)))], globalid=f"e{i}") for i in range(3)]
+    first = cache.get(events[0])
+    cache.get(events[1])
+    cache.get(events[0])
+    cache.get(events[2])
+    assert len(cache) == 2 and cache.get(events[0]) is first
+    cache.get(events[1])
+    assert cache.misses == 4 and "source" not in first._fields
+
+
+def test_read_only_events_are_not_hashed_again():
+    cache = ProgramCache()
+    e = ParseCache().loads(SAMPLE)[0].content[0]
+    first = cache.get(e)
+    assert cache.get(e) is first
+    with mock.patch.object(compiler, "blake2b", side_effect=AssertionError):
+        assert cache.get(e) is first and cache.get(e) is first
+    assert (cache.hits, cache.misses) == (3, 1)
+    # Editable events are hashed on every lookup.
+    with mock.patch.object(compiler, "blake2b", side_effect=AssertionError):
+        with pytest.raises(AssertionError):
+            cache.get(orjson.loads(SAMPLE)[0]["content"][0])
+
+
+def test_runtime_sees_in_place_edits_through_the_shared_cache():
+    doc = [script(event(0, [action(0, "Log", param("one"))], globalid="edited"))]
+    rt = Runtime(doc)
+    rt.start()
+    rt.run()
+    doc[0]["content"][0]["actions"][0]["text"][1]["value"] = "two"
+    rt = Runtime(doc)
+    rt.start()
+    rt.run()
+    assert rt.log[0].message == "two"
@@ -0,0 +1,136 @@
+import copy
+import random
+
+import orjson
+import pytest
+
+from opencatwebjson import dumps, loads
+from opencatwebjson.diff import apply_patch, diff
+from opencatwebjson.runtime import Runtime
+
+from .helpers import SAMPLE, action, event, param
+
+
+def edited():
+    doc = orjson.loads(SAMPLE)
+    main = doc[0]["content"][0]
+    actions = main["actions"]
+    actions[0], actions[2] = actions[2], actions[0]
+    actions[5]["text"][1]["value"] = "great {total}"
+    actions.insert(1, action(0, "Log", param("new"), globalid="n1"))
+    del actions[-1]
+    main["width"] = "400"
+    del doc[0]["content"][1]["variable_overrides"]
+    doc[1]["content"][0]["actions"].append(doc[0]["content"][1]["actions"].pop())
+    doc[1]["content"].insert(0, event(0, [action(0, "Log", param("x"), globalid="n2")], globalid="n3"))
+    doc.reverse()
+    return doc
+
+
+def test_identical_documents_have_an_empty_patch():
+    assert diff(orjson.loads(SAMPLE), orjson.loads(SAMPLE)) == []
+    assert diff(loads(SAMPLE), orjson.loads(SAMPLE)) == []
+    assert diff(loads(SAMPLE), edited()) == diff(orjson.loads(SAMPLE), edited())
+
+
+@pytest.mark.parametrize("typed", [False, True])
+def test_apply_patch_reproduces_the_new_document(typed):
+    new = edited()
+    patch = diff(orjson.loads(SAMPLE), new)
+    assert orjson.loads(orjson.dumps(patch)) == patch
+    doc = loads(SAMPLE) if typed else orjson.loads(SAMPLE)
+    assert apply_patch(doc, patch) is doc
+    assert dumps(doc) == dumps(new)
+    if typed:
+        assert doc == loads(dumps(new))
+
+
+def test_patch_operations():
+    old = orjson.loads(SAMPLE)
+    new = copy.deepcopy(old)
+    actions = new[0]["content"][0]["actions"]
+    actions[5]["text"][1]["value"] = "x"
+    actions[0]["id"] = "12"
+    del actions[11]["help"]
+    actions.append(actions.pop(3))
+    ops = diff(old, new)
+    assert {"op": "param", "globalid": "a6", "index": 1, "value": {"value": "x", "t": "string", "l": "any"}} in ops
+    assert {"op": "set", "globalid": "a1", "key": "id", "value": "12"} in ops
+    assert {"op": "unset", "globalid": "a12", "key": "help"} in ops
+    assert [op for op in ops if op["op"] == "move"] == [{"op": "move", "globalid": "a4", "parent": "+!", "index": 11}]
+
+
+def test_inserted_subtrees_delete_what_they_replace():
+    old = orjson.loads(SAMPLE)
+    new = copy.deepcopy(old)
+    moved = new[0]["content"][1]["actions"].pop()
+    new.append({"class": "script", "content": [event(0, [moved], globalid="brand_new")], "globalid": "s3"})
+    ops = diff(old, new)
+    assert {"op": "delete", "globalid": "b3"} in ops
+    assert not any(op["op"] == "move" for op in ops)
+    assert dumps(apply_patch(orjson.loads(SAMPLE), ops)) == dumps(new)
+
+
+def test_patched_events_get_new_lists_and_run_the_new_actions():
+    doc = orjson.loads(SAMPLE)
+    old_actions = doc[0]["content"][0]["actions"]
+    apply_patch(doc, diff(orjson.loads(SAMPLE), edited()))
+    assert doc[1]["content"][0]["actions"] is not old_actions
+    assert len(old_actions) == 12
+    rt = Runtime(doc)
+    rt.start()
+    rt.run()
+    assert {"x", "new"} <= {entry.message for entry in rt.log}
+
+
+def test_runtime_sees_patched_parameters():
+    doc = orjson.loads(SAMPLE)
+    Runtime(doc)
+    new = orjson.loads(SAMPLE)
+    new[0]["content"][0]["actions"][5]["text"][1]["value"] = "patched {total}"
+    actions = doc[0]["content"][0]["actions"]
+    apply_patch(doc, diff(orjson.loads(SAMPLE), new))
+    assert doc[0]["content"][0]["actions"] is actions
+    rt = Runtime(doc)
+    rt.start()
+    rt.run()
+    assert rt.log[0].message == "patched 10"
+
+
+def test_unknown_globalids_raise():
+    with pytest.raises(KeyError):
+        apply_patch(orjson.loads(SAMPLE), [{"op": "delete", "globalid": "missing"}])
+
+
+def mutate(doc, rng, counter):
+    for _ in range(rng.randrange(1, 8)):
+        events = [e for s in doc for e in s["content"]]
+        choice = rng.randrange(6)
+        e = rng.choice(events)
+        acts = e["actions"]
+        if choice == 0 and acts:
+            acts.insert(rng.randrange(len(acts) + 1), acts.pop(rng.randrange(len(acts))))
+        elif choice == 1:
+            counter[0] += 1
+            acts.insert(rng.randrange(len(acts) + 1), action(0, "Log", param("r"), globalid=f"r{counter[0]}"))
+        elif choice == 2 and acts:
+            del acts[rng.randrange(len(acts))]
+        elif choice == 3 and acts:
+            rng.choice(events)["actions"].append(acts.pop(rng.randrange(len(acts))))
+        elif choice == 4:
+            for s in doc:
+                if any(item is e for item in s["content"]):
+                    s["content"].remove(e)
+            rng.choice(doc)["content"].append(e)
+        else:
+            e["x"] = str(rng.randrange(10000))
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_random_edits_round_trip(seed):
+    rng = random.Random(seed)
+    new = orjson.loads(SAMPLE)
+    mutate(new, rng, [0])
+    doc = orjson.loads(SAMPLE)
+    apply_patch(doc, diff(orjson.loads(SAMPLE), new))
+    assert dumps(doc) == dumps(new)
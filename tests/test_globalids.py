@@ -0,0 +1,83 @@
+import threading
+
+import orjson
+import pytest
+
+from opencatwebjson import loads, validate
+from opencatwebjson.globalids import CHARSET, GlobalIdAllocator, encode, iter_globalids
+
+from .helpers import SAMPLE, action, event, script
+
+
+def test_encode_is_bijective():
+    base = len(CHARSET)
+    assert [encode(n) for n in (0, 1, base - 1, base, base + 1)] == ["a", "b", CHARSET[-1], "aa", "ab"]
+    assert encode(base + base * base) == "aaa"
+    assert len({encode(n, "ab") for n in range(200)}) == 200
+
+
+def test_charset_has_no_json_or_template_specials():
+    assert not set('"\\{}') & set(CHARSET)
+
+
+def test_iter_globalids():
+    ids = list(iter_globalids(loads(SAMPLE)))
+    assert ids[:3] == ["script_main", "+!", "a1"]
+    assert ids == list(iter_globalids(orjson.loads(SAMPLE)))
+    assert len(ids) == 22
+
+
+def test_allocation_skips_used_ids():
+    alloc = GlobalIdAllocator(["a", "c"], prefix="")
+    assert alloc.allocate_many(3) == ["b", "d", "e"]
+    assert alloc() == "f"
+    assert "c" in alloc and "b" in alloc and "zz" not in alloc
+
+
+def test_prefix_and_charset():
+    alloc = GlobalIdAllocator(charset="xy", prefix="p")
+    assert alloc.allocate_many(4) == ["px", "py", "pxx", "pxy"]
+    with pytest.raises(ValueError):
+        GlobalIdAllocator(charset="aa")
+
+
+def test_reserve_rejects_taken_and_generated_ids():
+    alloc = GlobalIdAllocator()
+    generated = alloc.allocate()
+    assert not alloc.reserve(generated)
+    assert alloc.reserve("b") and not alloc.reserve("b")
+    assert alloc.allocate() == "c"
+
+
+def test_from_document_avoids_existing_ids():
+    doc = orjson.loads(SAMPLE)
+    alloc = GlobalIdAllocator.from_document(doc)
+    existing = set(iter_globalids(doc))
+    assert not existing & set(alloc.allocate_many(500))
+
+
+def test_assign_fixes_missing_and_repeated_ids():
+    doc = [script(event(0, [action(0, globalid="a"), action(0), action(0, globalid="b")], globalid="a"),
+                  globalid="s"),
+           script(event(0, [action(0, globalid="c")], globalid="b"), globalid="s")]
+    alloc = GlobalIdAllocator()
+    assert alloc.assign(doc) == 4
+    ids = list(iter_globalids(doc))
+    assert len(set(ids)) == len(ids)
+    assert ids[:3] == ["s", "a", ids[2]] and ids[2] not in ("a", "b", "c", "s")
+    assert validate(doc) == []
+
+
+def test_threads_never_share_an_id():
+    alloc = GlobalIdAllocator()
+    results = []
+
+    def work():
+        results.extend(alloc.allocate() for _ in range(2000))
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(results)) == len(results) == 16000
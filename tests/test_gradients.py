@@ -0,0 +1,101 @@
+import copy
+import pickle
+
+import pytest
+
+from opencatwebjson.classes import ColorGradient, GradientStop, TransparencyGradient
+
+
+def transparency() -> TransparencyGradient:
+    # Given out of order; the gradient sorts its stops.
+    return TransparencyGradient([GradientStop(1, 1), GradientStop(0, 0), GradientStop(0.5, 0.2)])
+
+
+def colors() -> ColorGradient:
+    return ColorGradient([GradientStop(0.5, "#00FF00"), GradientStop(0, "#FF0000"), GradientStop(1, "#0000FF")])
+
+
+def test_stops_are_a_sorted_list():
+    g = transparency()
+    assert [s.position for s in g.stops] == [0, 0.5, 1]
+    assert isinstance(g.stops, list)
+
+
+@pytest.mark.parametrize("position, expected", [(0, 0), (0.25, 0.1), (0.5, 0.2), (0.75, 0.6), (1, 1)])
+def test_transparency_interpolates_between_stops(position, expected):
+    assert transparency().get_value_at(position) == pytest.approx(expected)
+
+
+def test_color_steps_at_each_stop():
+    g = colors()
+    assert [g.get_value_at(p) for p in (0, 0.49, 0.5, 0.99, 1)] == ["#FF0000", "#FF0000", "#00FF00", "#00FF00", "#0000FF"]
+
+
+def test_sample_matches_get_value_at():
+    positions = [k / 10 for k in range(11)]
+    for g in (transparency(), colors()):
+        assert list(g.sample(positions)) == [g.get_value_at(p) for p in positions]
+
+
+def test_lut_entries_are_evenly_spaced_samples():
+    g = transparency()
+    table = g.lut(5)
+    assert list(table) == list(g.sample([0, 0.25, 0.5, 0.75, 1]))
+    assert colors().lut(3) == ["#FF0000", "#00FF00", "#0000FF"]
+
+
+@pytest.mark.parametrize("gradient", [transparency, colors])
+def test_lut_returns_a_copy(gradient):
+    g = gradient()
+    table = g.lut(4)
+    table[0] = table[-1]
+    assert g.lut(4)[0] != table[0]
+
+
+def test_assigning_stops_rebuilds_lookups():
+    g = transparency()
+    before = g.lut(3)
+    g.stops = [GradientStop(0, 1), GradientStop(1, 1)]
+    assert g.get_value_at(0.25) == 1
+    assert list(g.lut(3)) == [1, 1, 1] != list(before)
+    c = colors()
+    c.lut(3)
+    c.stops = list(c.stops) + [GradientStop(0.75, "#FFFFFF")]
+    assert c.get_value_at(0.8) == "#FFFFFF"
+    assert c.lut(5)[3] == "#FFFFFF"
+
+
+def test_bad_values_and_positions_are_rejected():
+    with pytest.raises(TypeError):
+        TransparencyGradient([GradientStop(0, "#FFF")])
+    with pytest.raises(TypeError):
+        ColorGradient([GradientStop(0, 1)])
+    with pytest.raises(ValueError):
+        transparency().get_value_at(1.5)
+    with pytest.raises(ValueError):
+        colors().sample([0, -1])
+
+
+def test_editing_stops_in_place_rebuilds_lookups():
+    g = transparency()
+    assert g.lut(3)[1] == pytest.approx(0.2)
+    g.stops.append(GradientStop(0.25, 1))
+    assert g.get_value_at(0.25) == 1 and g.get_value_at(0.5) == pytest.approx(0.2)
+    del g.stops[1:]
+    assert list(g.lut(3)) == [0, 0, 0]
+    c = colors()
+    c.get_value_at(0)
+    c.stops[0] = GradientStop(0, "#FFFFFF")
+    assert c.sample([0, 0.5]) == ["#FFFFFF", "#00FF00"]
+    c.stops.append(GradientStop(0.2, 1))
+    with pytest.raises(TypeError):
+        c.get_value_at(0)
+
+
+@pytest.mark.parametrize("clone", [copy.deepcopy, lambda g: pickle.loads(pickle.dumps(g))])
+def test_copies_track_their_own_edits(clone):
+    g = transparency()
+    g.lut(3)
+    h = clone(g)
+    h.stops.append(GradientStop(0.25, 1))
+    assert h.get_value_at(0.25) == 1 and g.get_value_at(0.25) == pytest.approx(0.1)
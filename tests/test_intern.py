@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import orjson
+
+from opencatwebjson.classes import INTERN_CACHE, HexColor, InternCache, Range01, interned
+from opencatwebjson.elements import Frame
+from opencatwebjson.loader import decode_element
+from opencatwebjson.serializer import dumps
+
+from .helpers import frame
+
+
+def test_get_returns_one_shared_instance():
+    cache = InternCache()
+    a = cache.get(HexColor, "#fff")
+    assert cache.get(HexColor, "#fff") is a
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+
+
+def test_literals_are_keyed_by_type():
+    cache = InternCache()
+    assert cache.get(Range01, 1) is not cache.get(Range01, 1.0)
+    assert dumps(cache.get(Range01, 1)) == b"1"
+    assert dumps(cache.get(Range01, 1.0)) == b"1.0"
+
+
+def test_each_class_is_bounded_separately():
+    cache = InternCache(maxsize=2)
+    first = cache.get(HexColor, "#000")
+    cache.get(HexColor, "#111")
+    cache.get(HexColor, "#222")
+    cache.get(str, "Arial")
+    assert len(cache) == 3
+    assert cache.get(HexColor, "#000") is not first
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = InternCache(maxsize=2)
+    first = cache.get(HexColor, "#000")
+    second = cache.get(HexColor, "#111")
+    assert cache.get(HexColor, "#000") is first
+    cache.get(HexColor, "#222")
+    assert cache.get(HexColor, "#000") is first
+    assert cache.get(HexColor, "#111") is not second
+
+
+def test_threads_share_one_instance_per_literal():
+    cache = InternCache()
+    literals = [f"#{i:03d}" for i in range(100)] * 20
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(partial(cache.get, HexColor), literals))
+    assert len(cache) == 100 and cache.hits + cache.misses == len(literals)
+    assert all(r is cache.get(HexColor, v) for r, v in zip(results, literals))
+
+
+def test_clear_and_disabled():
+    cache = InternCache()
+    a = cache.get(HexColor, "#fff")
+    with cache.disabled():
+        assert cache.get(HexColor, "#fff") is not a
+        assert len(cache) == 1
+    assert cache.enabled
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses) == (0, 0, 0)
+
+
+def test_decoded_elements_share_literals():
+    raw = orjson.loads(dumps(frame()))
+    a = decode_element(Frame, raw)
+    b = decode_element(Frame, raw)
+    assert a.background_color is b.background_color is interned(HexColor, "#FFF")
+    assert a.background_transparency is b.background_transparency
+    assert INTERN_CACHE.get(Range01, 0.5) is a.background_transparency
@@ -0,0 +1,110 @@
+import pytest
+
+from opencatwebjson.elements import AspectRatio, Constraint, Corner, Padding
+from opencatwebjson.layout import Layout, has_box, layout
+
+from .helpers import box
+
+
+def rects(elements, parents, width=1000, height=500):
+    r = layout(elements, parents, width, height)
+    return [r.rect(i) for i in range(len(elements))]
+
+
+def test_has_box():
+    assert has_box(box())
+    assert not has_box(AspectRatio("a", 1))
+
+
+def test_scale_and_offset_resolve_against_the_parent():
+    elements = [box(x=(0.1, 5), y=(0, 20), w=(0.5, 0), h=(0.5, -10)), box(x=(0.5, 0), w=(0.5, 10), h=(0, 40))]
+    assert rects(elements, [-1, 0]) == [(105, 20, 500, 240), (355, 20, 260, 40)]
+
+
+def test_anchor_point_shifts_by_own_size():
+    assert rects([box(x=(0.5, 0), y=(0.5, 0), w=(0, 100), h=(0, 50), anchor=(0.5, 0.5))], [-1]) == \
+        [(450, 225, 100, 50)]
+
+
+def test_modifiers_apply_to_their_parent():
+    elements = [
+        box(w=(0, 400), h=(0, 300)),
+        Padding("p", (0, 10), (0, 10), (0.1, 0), (0, 0)),
+        box(w=(1, 0), h=(1, 0)),
+    ]
+    # Padding: bottom, left, right, top.
+    assert rects(elements, [-1, 0, 0]) == [(0, 0, 400, 300), (10, 0, 350, 290), (10, 0, 350, 290)]
+
+
+def test_constraint_and_aspect_ratio():
+    elements = [box(w=(1, 0), h=(1, 0)), Constraint("c", (0, 0), (600, 400)), AspectRatio("a", 2)]
+    assert rects(elements, [-1, 0, 0])[0] == (0, 0, 600, 300)
+
+
+def test_elements_without_a_box_take_the_parent_content_rect():
+    elements = [box(x=(0, 7), w=(0, 30), h=(0, 20)), Corner("c", (0, 4))]
+    assert rects(elements, [-1, 0])[1] == (7, 0, 30, 20)
+
+
+def test_one_layout_resolves_many_viewports():
+    lay = Layout([box(w=(0.5, 0), h=(1, 0))], [-1])
+    assert lay.resolve(100, 100).rect(0) == (0, 0, 50, 100)
+    assert lay.resolve(300, 10).rect(0) == (0, 0, 150, 10)
+    assert lay.rects.rect(0) == (0, 0, 150, 10)
+
+
+def test_bad_trees_are_rejected():
+    with pytest.raises(ValueError):
+        Layout([box()], [])
+    with pytest.raises(ValueError):
+        Layout([box(), box()], [1, -1])
+
+
+def tree():
+    # Viewport > a > (b > c), d
+    elements = [box(w=(0.5, 0), h=(0.5, 0)), box(x=(0, 10), w=(0.5, 0), h=(0, 20)),
+                box(x=(0.5, 0), w=(0, 5), h=(0, 5)), box(x=(0.5, 0), w=(0, 1), h=(0, 1))]
+    return elements, [-1, 0, 1, -1]
+
+
+def test_relayout_matches_a_full_resolve():
+    elements, parents = tree()
+    lay = Layout(elements, parents)
+    assert lay.relayout(400, 200) == {0, 1, 2, 3}
+    elements[1] = box(x=(0, 30), w=(0.25, 0), h=(0, 20))
+    lay.mark_dirty(1)
+    assert lay.relayout(400, 200) == {1, 2}
+    assert [lay.rects.rect(i) for i in range(4)] == rects(elements, parents, 400, 200)
+
+
+def test_relayout_skips_children_of_unmoved_elements():
+    elements, parents = tree()
+    lay = Layout(elements, parents)
+    lay.resolve(400, 200)
+    lay.mark_dirty(0)
+    assert lay.relayout(400, 200) == set()
+    elements[3] = box(w=(0, 2), h=(0, 1))
+    lay.mark_dirty(3)
+    assert lay.relayout(400, 200) == {3}
+
+
+def test_marking_a_modifier_dirties_its_parent():
+    elements, parents = tree()
+    elements.append(Constraint("c", (0, 0), (50, 50)))
+    parents.append(0)
+    lay = Layout(elements, parents)
+    lay.resolve(400, 200)
+    elements[4] = Constraint("c", (0, 0), (100, 100))
+    lay.mark_dirty(4)
+    assert lay.relayout(400, 200) == {0, 1, 2, 4}
+    assert lay.rects.rect(0) == (0, 0, 100, 100)
+
+
+def test_new_viewport_reports_only_changed_rects():
+    elements, parents = tree()
+    lay = Layout(elements, parents)
+    lay.resolve(400, 200)
+    # Only a's height depends on the viewport height.
+    assert lay.relayout(400, 300) == {0}
+    assert lay.relayout(800, 300) == {0, 1, 2, 3}
+    assert [lay.rects.rect(i) for i in range(4)] == rects(elements, parents, 800, 300)
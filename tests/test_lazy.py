@@ -0,0 +1,107 @@
+import copy
+import io
+import pickle
+
+import orjson
+import pytest
+
+from opencatwebjson import dumps, iterload, load, loads, validate
+from opencatwebjson.classes import HexColor, Vector2
+from opencatwebjson.elements import Frame
+from opencatwebjson.loader import decode_element
+from opencatwebjson.runtime import Runtime
+from opencatwebjson.scopes import analyze
+from opencatwebjson.script import Action, Event, Parameter, ScriptObject
+
+from .helpers import SAMPLE, frame
+
+
+def test_lazy_scripts_equal_eager_ones():
+    lazy, eager = loads(SAMPLE, lazy=True), loads(SAMPLE)
+    assert lazy == eager and eager == lazy
+    assert lazy[0].content[0].actions[9] == eager[0].content[0].actions[9]
+    assert load(io.BytesIO(SAMPLE), lazy=True) == eager
+    assert list(iterload(io.BytesIO(SAMPLE), 16, lazy=True)) == eager
+
+
+def test_lazy_objects_are_instances_of_the_script_classes():
+    script = loads(SAMPLE, lazy=True)[0]
+    event = script.content[0]
+    action = event.actions[0]
+    assert isinstance(script, ScriptObject) and isinstance(event, Event) and isinstance(action, Action)
+    assert action.__class__.__name__ == "Action"
+    assert action.text[1] == Parameter("count", "string", "variable")
+    assert action.help is None and event.actions[11].help == "hi"
+
+
+def test_fields_are_decoded_on_first_read():
+    script = loads(SAMPLE, lazy=True)[0]
+    assert script.__dict__["content"][0].__class__ is dict
+    event = script.content[0]
+    assert script.__dict__["content"][0] is event
+    assert event.__dict__["actions"][0].__class__ is dict
+    call = event.actions[9]
+    assert call.__dict__["text"][2].__class__ is dict
+    arguments = call.text[2]
+    assert arguments.t == "tuple" and [p.value for p in arguments.value] == ["{total}", "3"]
+    assert call.text is call.text
+    assert script.content[1].variable_overrides == [Parameter("a"), Parameter("b")]
+
+
+def test_dumps_is_identical_before_and_after_access():
+    assert dumps(loads(SAMPLE, lazy=True)) == SAMPLE
+    scripts = loads(SAMPLE, lazy=True)
+    scripts[0].content[0].actions[9].text
+    scripts[1].content
+    assert dumps(scripts) == SAMPLE
+    assert dumps(scripts, True) == dumps(loads(SAMPLE), True)
+
+
+def test_dict_consumers_do_not_decode():
+    scripts = loads(SAMPLE, lazy=True)
+    assert validate(scripts) == []
+    assert analyze(scripts).violations == []
+    assert all(e.__class__ is dict for e in scripts[0].__dict__["content"])
+
+
+def test_lazy_scripts_run_and_can_be_edited():
+    scripts = loads(SAMPLE, lazy=True)
+    rt = Runtime(scripts)
+    rt.start()
+    rt.run()
+    assert [entry.message for entry in rt.log] == ["ok 10", "res=13"]
+    scripts[0].content[0].actions[5].text[1].value = "changed"
+    assert b'"changed"' in dumps(scripts)
+    private = copy.deepcopy(scripts[1])
+    assert private == scripts[1]
+
+
+def test_lazy_elements_build_values_on_first_read():
+    raw = orjson.loads(dumps([frame()]))[0]
+    eager = decode_element(Frame, dict(raw))
+    lazy = decode_element(Frame, raw, lazy=True)
+    assert lazy.__dict__ is raw and raw["position"].__class__ is list
+    assert lazy == eager and isinstance(lazy, Frame)
+    assert isinstance(lazy.position, Vector2) and raw["position"] is lazy.position
+    assert isinstance(lazy.background_color, HexColor)
+    assert dumps([lazy]) == dumps([eager]) == dumps([frame()])
+
+
+def test_lazy_elements_report_missing_fields_on_read():
+    raw = orjson.loads(dumps([frame()]))[0]
+    del raw["position"]
+    lazy = decode_element(Frame, raw, lazy=True)
+    with pytest.raises(AttributeError):
+        lazy.position
+    with pytest.raises(TypeError):
+        decode_element(Frame, dict(raw))
+
+
+def test_lazy_objects_pickle_as_plain_objects():
+    scripts = pickle.loads(pickle.dumps(loads(SAMPLE, lazy=True)))
+    assert scripts == loads(SAMPLE) and dumps(scripts) == SAMPLE
+    action = scripts[0].content[0].actions[9]
+    assert action.__class__ is Action and action.__dict__["text"][2].__class__ is Parameter
+    element = pickle.loads(pickle.dumps(decode_element(Frame, orjson.loads(dumps([frame()]))[0], lazy=True)))
+    assert element.__class__ is Frame and element == frame()
+    assert element.__dict__["position"].__class__ is Vector2
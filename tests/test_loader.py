@@ -0,0 +1,106 @@
+import io
+
+import orjson
+import pytest
+
+from opencatwebjson import iterevents, iterload, load, loads
+from opencatwebjson.loader import decode_script, iter_items
+from opencatwebjson.script import Action, Event, Parameter, ScriptObject
+
+from .helpers import SAMPLE
+
+
+def test_loads_builds_typed_objects():
+    scripts = loads(SAMPLE)
+    assert [s.globalid for s in scripts] == ["script_main", "s2"]
+    assert all(isinstance(s, ScriptObject) for s in scripts)
+    loaded = scripts[0].content[0]
+    assert isinstance(loaded, Event)
+    assert loaded.id == "0" and loaded.text == ["When website loaded..."]
+    first = loaded.actions[0]
+    assert isinstance(first, Action)
+    assert first.text[0] == "Set"
+    assert first.text[1] == Parameter("count", "string", "variable")
+
+
+def test_tuple_parameters_hold_parameters():
+    call = loads(SAMPLE)[0].content[0].actions[9]
+    arguments = call.text[2]
+    assert arguments.t == "tuple"
+    assert [p.value for p in arguments.value] == ["{total}", "3"]
+    assert all(isinstance(p, Parameter) for p in arguments.value)
+
+
+def test_absent_optional_fields_use_defaults():
+    action = loads(SAMPLE)[0].content[0].actions[0]
+    assert action.help is None
+    assert "help" not in action.__dict__
+    assert loads(SAMPLE)[0].content[0].actions[11].help == "hi"
+
+
+def test_decoded_dictionaries_are_adopted():
+    raw = orjson.loads(SAMPLE)[0]
+    script = decode_script(raw)
+    assert script.__dict__ is raw
+
+
+def test_load_accepts_binary_and_text_files():
+    assert loads(SAMPLE) == load(io.BytesIO(SAMPLE)) == load(io.StringIO(SAMPLE.decode()))
+
+
+@pytest.mark.parametrize("data", [b"{}", b"[1]", b"[", b""])
+def test_loads_rejects_bad_documents(data):
+    with pytest.raises(ValueError):
+        loads(data)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 65536])
+def test_iterload_matches_loads_for_any_chunk_size(chunk_size):
+    assert list(iterload(io.BytesIO(SAMPLE), chunk_size)) == loads(SAMPLE)
+
+
+def test_iter_items_handles_brackets_and_escapes_in_strings():
+    data = b'[{"a":"]}[{\\"x"},{"b":[1,[2]]}]'
+    assert [orjson.loads(i) for i in iter_items(io.BytesIO(data), 3)] == [{"a": ']}[{"x'}, {"b": [1, [2]]}]
+
+
+@pytest.mark.parametrize("data", [b'{"a":1}', b'[{"a":1}', b'[{"a":"]'])
+def test_iter_items_rejects_bad_documents(data):
+    with pytest.raises(ValueError):
+        list(iter_items(io.BytesIO(data), 4))
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"[1, 2]", "Script must be an object"),
+    (b'[1, {"a": 1}]', "Script must be an object"),
+    (b'[{"a": 1}, "x"]', "Script must be an object"),
+    (b'[{"a": 1}, [2]]', "Script must be an object"),
+    (b'[{"a": 1}, null ]', "Script must be an object"),
+    (b'x[{"a": 1}]', "Root must be an array"),
+    (b'"x"', "Root must be an array"),
+    (b"]", "Root must be an array"),
+    (b'[{"a": 1}] x', "Invalid JSON"),
+    (b'[{"a": 1}] []', "Invalid JSON"),
+    (b'[{"a": 1} {"b": 2}]', "Invalid JSON"),
+    (b'[{"a": 1},, {"b": 2}]', "Invalid JSON"),
+    (b'[, {"b": 2}]', "Invalid JSON"),
+    (b'[{"a": 1},]', "Invalid JSON"),
+    (b'[{"a": 1}}', "Invalid JSON"),
+])
+@pytest.mark.parametrize("chunk_size", [1, 4, 65536])
+def test_iterload_rejects_what_loads_rejects(data, message, chunk_size):
+    with pytest.raises(ValueError):
+        loads(data)
+    with pytest.raises(ValueError, match=message):
+        list(iterload(io.BytesIO(data), chunk_size))
+
+
+def test_iter_items_accepts_whitespace_around_items():
+    data = b' \n[ {"a": 1} ,\n\t{"b": 2} ]\r\n '
+    assert [orjson.loads(i) for i in iter_items(io.BytesIO(data), 2)] == orjson.loads(data)
+    assert list(iter_items(io.BytesIO(b"[ ]"), 1)) == []
+
+
+def test_iterevents_yields_owning_script():
+    pairs = list(iterevents(io.BytesIO(SAMPLE), 16))
+    assert [(s.globalid, e.globalid) for s, e in pairs] == [("script_main", "+!"), ("script_main", "f1"), ("s2", "e9")]
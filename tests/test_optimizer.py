@@ -0,0 +1,175 @@
+import random
+
+import orjson
+import pytest
+
+from opencatwebjson import dumps, loads
+from opencatwebjson.blocks import action_id, match_blocks
+from opencatwebjson.ids import MAX_ACTIONS
+from opencatwebjson.optimizer import (EventReport, fold_constants, optimize, optimize_actions, remove_dead_code,
+                                      simplify_blocks)
+from opencatwebjson.runtime import Runtime, to_string
+
+from .helpers import SAMPLE, action, event, param, script, var
+
+
+def log(text):
+    return action(0, "Log", param(text))
+
+
+def set_(name, value):
+    return action(11, "Set", var(name), "to", param(value))
+
+
+def update(aid, name, value="0"):
+    return action(aid, "Update", var(name), "by", param(value, t="number"))
+
+
+def if_(aid, a, b):
+    return action(aid, "If", param(a), "op", param(b))
+
+
+ELSE, END, BREAK, RETURN, REPEAT = action(112, "else"), action(25, "end"), action(24, "Break"), \
+    action(115, "Return", param("")), action(22, "Repeat", param("2", t="number"), "times")
+
+
+def ids(actions):
+    return [action_id(a) for a in actions]
+
+
+def outcome(actions):
+    rt = Runtime([script(event(0, actions, globalid="e"))])
+    rt.start()
+    rt.run()
+    return [(e.level, e.message) for e in rt.log], {k: to_string(v) for k, v in rt.globals.items()}
+
+
+def test_fold_constants():
+    actions = [set_("x", "5"), update(12, "x", "2"), update(14, "x", "3"), log("{x}")]
+    folded = fold_constants(actions)
+    assert ids(folded) == [11, 0]
+    assert folded[0]["text"][1] == var("x") and folded[0]["text"][3]["value"] == "21"
+    assert folded[1] is actions[3] and actions[0]["text"][3]["value"] == "5"
+
+
+@pytest.mark.parametrize("chain, value", [
+    ([update(15, "x", "4")], "2.5"),
+    ([update(16, "x"), update(13, "x", "0.5")], "9.5"),
+    ([update(17, "x"), update(41, "x", "4")], "2"),
+    ([update(78, "x", ""), update(40, "x", "2")], "100"),
+])
+def test_fold_matches_the_runtime(chain, value):
+    actions = [set_("x", "10"), *chain, log("{x}")]
+    folded = fold_constants(actions)
+    assert len(folded) == 2 and folded[0]["text"][3]["value"] == value
+    assert outcome(folded) == outcome(actions)
+
+
+@pytest.mark.parametrize("actions", [
+    [set_("x", "5"), update(15, "x", "0")],
+    [set_("x", "-8"), update(40, "x", "0.5")],
+    [set_("x", "5"), update(12, "y", "1")],
+    [set_("x", "5"), update(12, "x", "{y}")],
+    [set_("x", "{y}"), update(12, "x", "1")],
+    [set_("x", "5"), log("{x}"), update(12, "x", "1")],
+])
+def test_fold_stops_at_unsafe_updates(actions):
+    assert fold_constants(actions) == actions
+
+
+def test_fold_keeps_action_objects_typed():
+    actions = loads(SAMPLE)[0].content[0].actions
+    folded = fold_constants([actions[0], update(12, "count", "1")])
+    assert folded[0].__class__ is actions[0].__class__ and folded[0].text[3].value == "6"
+    assert actions[0].text[3].value == "5"
+
+
+def test_remove_dead_code():
+    actions = [REPEAT, log("a"), BREAK, log("b"), if_(18, "1", "1"), log("c"), END, END, log("d"), RETURN, log("e")]
+    assert ids(remove_dead_code(actions, match_blocks(actions))) == [22, 0, 24, 25, 0, 115]
+
+
+def test_simplify_blocks():
+    empty = [if_(18, "a", "b"), ELSE, END, log("x")]
+    assert ids(simplify_blocks(empty, match_blocks(empty))) == [0]
+    empty_else = [if_(18, "a", "b"), log("x"), ELSE, END]
+    assert ids(simplify_blocks(empty_else, match_blocks(empty_else))) == [18, 0, 25]
+    negatable = [if_(37, "a", "b"), ELSE, log("x"), END]
+    inverted = simplify_blocks(negatable, match_blocks(negatable))
+    assert ids(inverted) == [38, 0, 25]
+    assert inverted[0]["text"] == ["If", param("a"), "doesn't contain", param("b")]
+    # Conditions without a negation keep their else.
+    keep = [if_(20, "a", "b"), ELSE, log("x"), END]
+    assert simplify_blocks(keep, match_blocks(keep)) == keep
+
+
+def test_optimize_actions_repeats_until_stable():
+    actions = [set_("x", "1"), if_(18, "{x}", "1"), if_(19, "a", "b"), ELSE, END, ELSE, END, log("c"),
+               action(124, param("note", l="comment"))]
+    assert ids(optimize_actions(actions)) == [11, 0, 124]
+    assert ids(optimize_actions(actions, release=True)) == [11, 0]
+    unbalanced = [set_("x", "1"), update(12, "x", "1"), END, if_(18, "a", "b"), END]
+    assert ids(optimize_actions(unbalanced)) == [11, 25, 18, 25]
+
+
+def test_optimize_reports_the_action_budget():
+    long = [set_("x", "0")] + [update(12, "x", "1")] * (MAX_ACTIONS + 10) + [log("{x}")]
+    doc = [script(event(0, long, globalid="long"), event(0, [log("a")], globalid="short"))]
+    before = outcome(long)
+    report = optimize(doc)
+    assert report.events == [EventReport(0, 0, "long", MAX_ACTIONS + 12, 2), EventReport(0, 1, "short", 1, 1)]
+    assert report.events[0].saved == MAX_ACTIONS + 10 and report.events[0].fits
+    assert not EventReport(0, 0, None, 200, MAX_ACTIONS + 1).fits
+    assert (report.before, report.after) == (MAX_ACTIONS + 13, 3)
+    assert doc[0]["content"][0]["actions"] is not long
+    assert outcome(doc[0]["content"][0]["actions"]) == before == ([("info", str(MAX_ACTIONS + 10))], {
+        "x": str(MAX_ACTIONS + 10)})
+
+
+def test_optimized_sample_runs_the_same():
+    doc = loads(SAMPLE)
+    events = doc[0].content
+    actions = [events[0].actions, events[1].actions]
+    report = optimize(doc, release=True)
+    assert [e.saved for e in report.events] == [1, 0, 0]
+    assert events[0].actions is not actions[0] and events[1].actions is actions[1]
+    rt = Runtime(doc)
+    rt.start()
+    rt.run()
+    assert [entry.message for entry in rt.log] == ["ok 10", "res=13"]
+    assert rt.globals == {"count": "5", "total": 10, "res": 13}
+    assert loads(dumps(doc)) == doc and dumps(doc) != SAMPLE
+
+
+def program(rng, depth=0, length=6):
+    # A random balanced event body over two variables.
+    out = []
+    for _ in range(rng.randrange(1, length)):
+        choice = rng.randrange(10 if depth < 3 else 6)
+        name = rng.choice("xy")
+        if choice == 0:
+            out.append(set_(name, rng.choice(["0", "3", "-2", "7.5", "{x}", "{y}"])))
+        elif choice == 1:
+            out.append(update(rng.choice([12, 13, 14, 15, 16, 17, 40, 41, 78]), name, rng.choice(["0", "2", "-1.5"])))
+        elif choice == 2:
+            out.append(log(f"{{{name}}}"))
+        elif choice == 3:
+            out.append(rng.choice([BREAK, RETURN]))
+        elif choice in (4, 5):
+            out.append(action(124, param("c", l="comment")))
+        elif choice == 6:
+            out.extend([REPEAT, *program(rng, depth + 1), END])
+        else:
+            condition = if_(rng.choice([18, 19, 37, 38, 20]), f"{{{name}}}", rng.choice(["3", "2", ""]))
+            body = program(rng, depth + 1) if rng.random() < 0.6 else []
+            alternative = program(rng, depth + 1) if rng.random() < 0.6 else []
+            out.extend([condition, *body, ELSE, *alternative, END] if rng.random() < 0.7 else [condition, *body, END])
+    return out
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_random_programs_behave_the_same(seed):
+    actions = program(random.Random(seed))
+    optimized = optimize_actions(orjson.loads(orjson.dumps(actions)), release=True)
+    assert len(optimized) <= len(actions) and match_blocks(optimized).balanced
+    assert outcome(optimized) == outcome(actions)
@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from opencatwebjson.ids import CANVAS_SIZE
+from opencatwebjson.placement import (ACTION_HEIGHT, EVENT_WIDTH, FUNCTION_WIDTH, HEADER_HEIGHT, CanvasPlacer,
+                                      event_size, place_events)
+
+from .helpers import action, event, function
+
+
+def occupied(placer, row, col):
+    return 0 <= row < placer.cells and 0 <= col < placer.cells and placer.rows[row] >> col & 1
+
+
+def brute_force(placer, w, h):
+    # Smallest squared distance from the centered position over every free spot.
+    n, g = placer.cells, placer.gap
+    ox, oy = (n - w) // 2, (n - h) // 2
+    best = None
+    for cy in range(n - h + 1):
+        for cx in range(n - w + 1):
+            if not any(occupied(placer, r, c) for r in range(cy - g, cy + h + g) for c in range(cx - g, cx + w + g)):
+                d = (cx - ox) ** 2 + (cy - oy) ** 2
+                best = d if best is None else min(best, d)
+    return best
+
+
+def test_event_size():
+    assert event_size(event(0, [action(0)] * 3)) == (350, HEADER_HEIGHT + 3 * ACTION_HEIGHT)
+    assert event_size(function("f", [], []))[0] == 350
+    d = function("f", [], [])
+    del d["width"]
+    assert event_size(d) == (FUNCTION_WIDTH, HEADER_HEIGHT)
+    del d["id"]
+    assert event_size(d)[0] == EVENT_WIDTH
+
+
+def test_first_block_is_centered():
+    placer = CanvasPlacer(cell=25)
+    x, y = placer.find(350, 100)
+    n = CANVAS_SIZE // 25
+    assert (x, y) == ((n - 14) // 2 * 25, (n - 4) // 2 * 25)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_placements_are_nearest_free_spots(seed):
+    rng = random.Random(seed)
+    placer = CanvasPlacer(cell=500, gap=500)
+    for _ in range(40):
+        width, height = rng.choice((350, 722, 1200)), rng.randrange(60, 2500, 40)
+        w, h = placer._span(width), placer._span(height)
+        expected = brute_force(placer, w, h)
+        if expected is None:
+            with pytest.raises(ValueError):
+                placer.find(width, height)
+            break
+        n = placer.cells
+        x, y = placer.find(width, height)
+        assert (x // 500 - (n - w) // 2) ** 2 + (y // 500 - (n - h) // 2) ** 2 == expected
+
+
+def test_placed_events_keep_their_gap():
+    events = [event(0, [action(0)] * random.Random(i).randrange(20), globalid=f"e{i}") for i in range(60)]
+    place_events(events, gap=50)
+    rects = [(int(e["x"]), int(e["y"]), *event_size(e)) for e in events]
+    for i, (x0, y0, w0, h0) in enumerate(rects):
+        for x1, y1, w1, h1 in rects[i + 1:]:
+            assert x0 + w0 + 50 <= x1 or x1 + w1 + 50 <= x0 or y0 + h0 + 50 <= y1 or y1 + h1 + 50 <= y0
+
+
+def test_existing_events_are_avoided():
+    existing = event(0, [action(0)] * 10, globalid="old")
+    existing["x"] = existing["y"] = "4800"
+    new = event(0, [action(0)] * 10, globalid="new")
+    [(x, y)] = place_events([new], [existing])
+    assert (x, y) == (new["x"], new["y"]) and new["width"] == "350"
+    assert (x, y) != ("4800", "4800")
+    x, y = int(x), int(y)
+    assert x + 350 + 50 <= 4800 or 4800 + 350 + 50 <= x or y + 460 + 50 <= 4800 or 4800 + 460 + 50 <= y
+
+
+def test_blocks_that_do_not_fit_raise():
+    with pytest.raises(ValueError):
+        CanvasPlacer().find(CANVAS_SIZE + 1, 10)
+    placer = CanvasPlacer(cell=2500, gap=0)
+    for _ in range(9):
+        placer.find(2500, 2500)
+    with pytest.raises(ValueError):
+        placer.find(2500, 2500)
@@ -0,0 +1,193 @@
+import math
+
+import orjson
+import pytest
+
+from opencatwebjson import loads
+from opencatwebjson.ids import BLOCK_OPENERS
+from opencatwebjson.runtime import (MAX_CALL_DEPTH, _ACTIONS, _CONDITIONS, Runtime, ScriptError, to_number, to_string,
+                                    truthy)
+
+from .helpers import SAMPLE, action, event, function, param, script, tup, var
+
+
+def run(*events, **kwargs):
+    rt = Runtime([script(*events)], **kwargs)
+    rt.start()
+    rt.run()
+    return rt
+
+
+def messages(rt):
+    return [(entry.level, entry.message) for entry in rt.log]
+
+
+def log(text, level=0):
+    return action(level, "Log", param(text))
+
+
+def set_(name, value):
+    return action(11, "Set", var(name), "to", param(value))
+
+
+def test_conversions():
+    assert [to_string(v) for v in (None, True, False, 3.0, 2.5, "x")] == ["nil", "true", "false", "3", "2.5", "x"]
+    assert [to_number(v) for v in ("4", "x", None, "inf", 2)] == [4, 0, 0, 0, 2]
+    assert truthy(0) and truthy("") and not truthy(None) and not truthy(False)
+
+
+@pytest.mark.parametrize("data", [SAMPLE, orjson.loads(SAMPLE)])
+def test_sample_runs(data):
+    rt = Runtime(loads(data) if data.__class__ is bytes else data)
+    rt.start()
+    assert rt.run() == 0
+    assert messages(rt) == [("info", "ok 10"), ("info", "res=13")]
+    assert rt.globals == {"count": "5", "total": 10, "res": 13}
+
+
+def test_waits_advance_the_virtual_clock():
+    rt = Runtime(loads(SAMPLE))
+    rt.broadcast("ping")
+    assert rt.run(until=5) == 5 and rt.log == []
+    assert rt.run() == 10
+    assert rt.log[0].time == 10 and rt.log[0].message == "pong"
+
+
+def test_events_nearer_the_canvas_center_run_first():
+    far = event(0, [log("far")], globalid="far", x="0", y="0")
+    near = event(0, [log("near")], globalid="near", x="5000", y="5000")
+    assert [m for _, m in messages(run(far, near))] == ["near", "far"]
+
+
+def test_variables_and_scopes():
+    f = function("f", ["a"], [action(11, "Set", var("o!seen"), "to", param("{l!a}"))])
+    call = action(87, "Run function", param("f", "function"), tup("{x}"))
+    rt = run(event(0, [set_("x", "1"), set_("l!y", "2"), call, log("{x} {l!y} {o!seen} {l!a}")]), f)
+    assert messages(rt) == [("info", "1 2 1 nil")]
+    assert rt.object_vars == [{"seen": "1"}]
+
+
+def test_loops_and_else():
+    body = [
+        action(22, "Repeat", param("3", t="number"), "times"),
+        action(12, "Increase", var("n"), "by", param("1")),
+        action(18, "If", param("{n}"), "is equal to", param("2")),
+        action(24, "Break"),
+        action(112, "else"),
+        log("{n}"),
+        action(25, "end"),
+        action(25, "end"),
+        log("done {n}"),
+    ]
+    assert [m for _, m in messages(run(event(0, body)))] == ["1", "done 2"]
+
+
+def test_variables_holding_false_exist():
+    checks = []
+    for name in ("f", "z", "s", "missing"):
+        checks += [action(92, "If", var(name), "exists"), log(f"{name} exists"), action(25, "end"),
+                   action(93, "If", var(name), "doesn't exist"), log(f"{name} missing"), action(25, "end")]
+    rt = Runtime([script(event(0, checks))])
+    rt.globals.update(f=False, z=0, s="")
+    rt.start()
+    rt.run()
+    assert [m for _, m in messages(rt)] == ["f exists", "z exists", "s exists", "missing missing"]
+
+
+def test_error_stops_only_its_own_task():
+    rt = run(event(0, [log("bad", 2), log("after")], globalid="e1", x="5000", y="5000"),
+             event(0, [log("other")], globalid="e2"))
+    assert messages(rt) == [("error", "bad"), ("info", "other")]
+
+
+def test_unknown_function_stops_only_its_own_task():
+    call = action(87, "Run function", param("missing", "function"), tup())
+    rt = run(event(0, [call, log("after")], globalid="e1", x="5000", y="5000"),
+             event(0, [log("other")], globalid="e2"))
+    assert messages(rt) == [("error", "Unknown function 'missing'"), ("info", "other")]
+
+
+def test_runaway_recursion_is_a_stack_overflow():
+    count = action(12, "Increase", var("n"), "by", param("1"))
+    f = function("f", [], [count, action(87, "Run function", param("f", "function"), tup()), log("unreached")])
+    rt = run(event(0, [action(87, "Run function", param("f", "function"), tup()), log("after")]), f)
+    assert messages(rt) == [("error", "Stack overflow calling 'f'")]
+    assert rt.globals == {"n": MAX_CALL_DEPTH}
+    background = function("g", [], [count, action(63, "Run in background", param("g", "function"), tup())])
+    # Background calls start new tasks, so only the step limit ends the chain.
+    rt = Runtime([script(event(0, [action(63, "Run in background", param("g", "function"), tup())]), background)],
+                 max_steps=1000)
+    rt.start()
+    with pytest.raises(ScriptError):
+        rt.run()
+    assert rt.globals["n"] > MAX_CALL_DEPTH and rt.log == []
+
+
+def test_unknown_math_function_is_logged():
+    rt = run(event(0, [action(114, "Run", param("nope"), tup(1), "→", var("r")), log("after")]))
+    assert messages(rt) == [("error", "Unknown math function 'nope'")]
+
+
+def test_background_calls_evaluate_arguments_when_started():
+    f = function("show", ["v"], [action(3, "Wait", param("1"), "seconds"), log("{l!v}")])
+    background = action(63, "Run function", param("show", "function"), tup("{x}"), "in background")
+    rt = run(event(0, [set_("x", "1"), background, set_("x", "2"), log("main {x}")]), f)
+    assert messages(rt) == [("info", "main 2"), ("info", "1")]
+
+
+def test_rounding_keeps_non_finite_values():
+    divide = action(15, "Divide", var("x"), "by", param("0"))
+    floor = action(17, "Floor", var("x"))
+    overflow = action(14, "Multiply", var("y"), "by", param("10"))
+    rt = run(event(0, [set_("x", "1"), divide, floor, set_("y", "1e308"), overflow,
+                       action(16, "Round", var("y")), log("{x} {y}")]))
+    assert math.isnan(rt.globals["x"]) and math.isinf(rt.globals["y"])
+    assert messages(rt) == [("info", "nan inf")]
+
+
+def test_math_errors_give_nan():
+    rt = run(event(0, [set_("x", "-1"), action(40, "Raise", var("x"), "to", param("0.5")),
+                       set_("y", "10"), action(40, "Raise", var("y"), "to", param("400"))]))
+    assert math.isnan(rt.globals["x"]) and math.isnan(rt.globals["y"])
+
+
+def test_missing_operands_and_unsimulated_actions_are_skipped():
+    rt = run(event(0, [action(12, "Increase"), action(18, "If"), action(25, "end"), action(71, "Play sound"),
+                       log("still running")]))
+    assert {12, 18, 71} <= rt.skipped
+    assert messages(rt) == [("info", "still running")]
+
+
+def test_runaway_loops_raise():
+    forever = [action(23, "Repeat forever"), action(12, "Increase", var("n"), "by", param("1")), action(25, "end")]
+    with pytest.raises(ScriptError):
+        run(event(0, forever), max_steps=100)
+
+
+def test_step_budget_is_per_triggered_event():
+    f = function("f", [], [action(12, "Increase", var("n"), "by", param("1"))] * 4)
+    pressed = event(1, [action(87, "Run function", param("f", "function"), tup())] * 2, param("b"))
+    rt = Runtime([script(pressed, f)], max_steps=20)
+    for _ in range(50):
+        rt.fire(1, "b")
+        rt.run()
+    assert rt.globals == {"n": 400} and rt.log == []
+    rt = Runtime([script(event(1, [action(87, "Run function", param("f", "function"), tup())] * 5, param("b")),
+                         f)], max_steps=20)
+    rt.fire(1, "b")
+    with pytest.raises(ScriptError):
+        rt.run()
+
+
+def test_unbalanced_events_are_rejected():
+    with pytest.raises(ScriptError):
+        Runtime([script(event(0, [action(22, "Repeat", param("2"))]))])
+
+
+@pytest.mark.parametrize("aid", sorted(_ACTIONS.keys() | _CONDITIONS.keys()))
+def test_actions_with_missing_operands_are_skipped(aid):
+    actions = [action(aid), action(0, "Log", param("after"))]
+    if aid in BLOCK_OPENERS:
+        actions.insert(1, action(25, "end"))
+    rt = run(event(0, actions, globalid=f"missing{aid}"))
+    assert rt.log[-1].message == "after" or aid == 2
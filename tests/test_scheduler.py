@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from opencatwebjson import loads
+from opencatwebjson.runtime import Runtime, ScriptError
+from opencatwebjson.scheduler import AsyncScheduler
+
+from .helpers import SAMPLE, action, event, param, script
+
+
+def wait(seconds):
+    return action(3, "Wait", param(str(seconds)), "seconds")
+
+
+def log(text):
+    return action(0, "Log", param(text))
+
+
+def ticker(name, step, times, x="5000"):
+    return event(0, [action(22, "Repeat", param(str(times)), "times"), wait(step), log(name), action(25, "end")],
+                 globalid=name, x=x, y=x)
+
+
+def entries(rt):
+    return [(entry.time, entry.message) for entry in rt.log]
+
+
+def test_many_runtimes_share_one_loop():
+    scheduler = AsyncScheduler()
+    runtimes = [scheduler.add(Runtime(loads(SAMPLE))) for _ in range(50)]
+    for rt in runtimes:
+        rt.start()
+        rt.broadcast("ping")
+    assert asyncio.run(scheduler.run()) == 10
+    for rt in runtimes:
+        assert entries(rt) == [(0, "ok 10"), (0, "res=13"), (10, "pong")]
+        assert rt.clock == 10
+
+
+def test_interleaving_matches_the_runtime_queue():
+    doc = [script(ticker("a", 2, 3), ticker("b", 3, 2, x="4000"))]
+    plain = Runtime(doc)
+    plain.start()
+    plain.run()
+    scheduler = AsyncScheduler()
+    rt = scheduler.add(Runtime(doc))
+    rt.start()
+    asyncio.run(scheduler.run())
+    assert entries(rt) == entries(plain) == [(2, "a"), (3, "b"), (4, "a"), (6, "b"), (6, "a")]
+
+
+def test_run_until_stops_and_resumes():
+    scheduler = AsyncScheduler()
+    rt = scheduler.add(Runtime([script(ticker("a", 2, 3))]))
+    rt.start()
+    assert asyncio.run(scheduler.run(until=3)) == 3
+    assert entries(rt) == [(2, "a")]
+    asyncio.run(scheduler.run())
+    assert [t for t, _ in entries(rt)] == [2, 4, 6]
+    assert scheduler._ready == 0
+
+
+def test_run_until_resumes_on_the_same_loop():
+    async def main():
+        scheduler = AsyncScheduler()
+        rt = scheduler.add(Runtime([script(ticker("a", 2, 3))]))
+        rt.start()
+        await scheduler.run(until=3)
+        rt.fire(0)
+        await scheduler.run()
+        return rt
+
+    assert [t for t, _ in entries(asyncio.run(main()))] == [2, 4, 5, 6, 7, 9]
+
+
+def test_a_stopped_task_does_not_stop_others():
+    scheduler = AsyncScheduler()
+    rt = scheduler.add(Runtime([script(event(0, [wait(1), action(2, "Error", param("x")), log("after")], globalid="e1"),
+                                       ticker("b", 1, 2))]))
+    rt.start()
+    asyncio.run(scheduler.run())
+    assert entries(rt) == [(1, "b"), (1, "x"), (2, "b")]
+
+
+def test_runaway_tasks_stop_only_their_runtime():
+    forever = event(0, [wait(2), action(23, "Repeat forever"), action(0, "Log", param("x")), action(25, "end")],
+                    globalid="f")
+    scheduler = AsyncScheduler()
+    bad = scheduler.add(Runtime([script(forever, ticker("b", 1, 5))], max_steps=50))
+    good = scheduler.add(Runtime([script(ticker("a", 1, 5))]))
+    bad.start()
+    good.start()
+    assert asyncio.run(scheduler.run()) == 5
+    assert [(rt, e.__class__) for rt, e in scheduler.errors] == [(bad, ScriptError)]
+    assert set(entries(bad)) == {(1, "b"), (2, "b"), (2, "x")}
+    assert entries(good) == [(t, "a") for t in range(1, 6)]
+    assert not scheduler._timers and not scheduler._tasks and scheduler._ready == 0
+
+
+def test_other_errors_cancel_every_task():
+    scheduler = AsyncScheduler()
+    rt = scheduler.add(Runtime([script(ticker("a", 1, 5))]))
+    rt.start()
+    rt.write_log = None
+    with pytest.raises(TypeError):
+        asyncio.run(scheduler.run())
+    assert not scheduler._timers and scheduler._ready == 0
+
+
+def test_time_scale_sleeps_for_real():
+    scheduler = AsyncScheduler(time_scale=0.001)
+    rt = scheduler.add(Runtime([script(ticker("a", 5, 2))]))
+    rt.start()
+    assert asyncio.run(scheduler.run()) >= 10
+    assert [m for _, m in entries(rt)] == ["a", "a"]
+
+
+def test_queued_work_moves_to_the_scheduler():
+    rt = Runtime(loads(SAMPLE))
+    rt.broadcast("ping")
+    scheduler = AsyncScheduler()
+    scheduler.add(rt)
+    assert rt._queue == []
+    asyncio.run(scheduler.run())
+    assert entries(rt) == [(10, "pong")]
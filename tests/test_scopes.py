@@ -0,0 +1,83 @@
+import orjson
+
+from opencatwebjson import loads
+from opencatwebjson.scopes import GLOBAL, IMPLICIT, LOCAL, OBJECT, READ, WRITE, Reference, SymbolTable, analyze
+
+from .helpers import SAMPLE, action, event, function, param, script, var
+
+
+def found(*scripts):
+    return [(v.path, v.message) for v in analyze(scripts).violations]
+
+
+def log(text):
+    return action(0, "Log", param(text))
+
+
+def test_symbol_table_interns_names_once():
+    table = SymbolTable()
+    assert table.intern("x") == table.intern("x") == 0
+    assert table.intern("o!y") == 1 and table.intern("l!z") == 2
+    assert list(table.kinds) == [GLOBAL, OBJECT, LOCAL]
+    assert len(table) == 3 and table[1] == "o!y"
+
+
+def test_sample_has_no_violations():
+    report = analyze(loads(SAMPLE))
+    assert report.violations == []
+    assert report.symbols.names == ["count", "total", "res", "l!a", "l!b", "l!r"]
+    assert report.references[:4] == [
+        Reference(0, 0, 0, 0, WRITE), Reference(0, 0, 0, 1, READ),
+        Reference(1, 0, 0, 2, READ), Reference(1, 0, 0, 2, WRITE),
+    ]
+
+
+def test_dictionaries_and_objects_give_the_same_report():
+    assert analyze(loads(SAMPLE)).references == analyze(orjson.loads(SAMPLE)).references
+
+
+def test_function_parameters_and_iterate_locals_are_implicit():
+    doc = [script(
+        function("f", ["a"], [log("{l!a}")]),
+        event(0, [action(113, "Iterate", var("t")), log("{l!index} {l!value}")], globalid="e2"),
+    )]
+    refs = analyze(doc).references
+    assert refs[0] == Reference(0, 0, 0, -1, IMPLICIT)
+    assert [r.mode for r in refs if r.action == 0 and r.event == 1] == [READ, IMPLICIT, IMPLICIT]
+
+
+def test_undefined_variables():
+    assert found(script(event(0, [log("{g}"), log("{o!x}")]))) == [
+        ("$[0].content[0].actions[0]", "Variable 'g' is never defined anywhere"),
+        ("$[0].content[0].actions[1]", "Variable 'o!x' is never defined in this script"),
+    ]
+
+
+def test_object_variables_do_not_cross_scripts():
+    define = event(0, [action(11, "Set", var("o!x"), "to", param("1"))], globalid="e1")
+    use = event(0, [log("{o!x}")], globalid="e2")
+    assert found(script(define, use, globalid="s1")) == []
+    assert found(script(define, globalid="s1"), script(use, globalid="s2")) == [
+        ("$[0].content[0].actions[0]", "Variable 'o!x' is never used"),
+        ("$[1].content[0].actions[0]", "Variable 'o!x' is never defined in this script"),
+    ]
+
+
+def test_locals():
+    assert found(script(event(0, [log("{l!x}"), action(11, "Set", var("l!x"), "to", param("1"))]))) == [
+        ("$[0].content[0].actions[0]", "Variable 'l!x' is used before it is defined"),
+    ]
+    assert found(script(
+        event(0, [action(11, "Set", var("l!x"), "to", param("1")), log("{l!x}")], globalid="e1"),
+        event(0, [log("{l!x}")], globalid="e2"),
+    )) == [("$[0].content[1].actions[0]", "Local variable 'l!x' is only defined in another event")]
+
+
+def test_unused_function_parameter():
+    assert found(script(function("f", ["a"], []))) == [
+        ("$[0].content[0].variable_overrides", "Variable 'l!a' is never used"),
+    ]
+
+
+def test_comments_are_ignored():
+    assert found(script(event(0, [action(124, param("{nothing}", "comment"))]))) == []
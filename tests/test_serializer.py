@@ -0,0 +1,73 @@
+import io
+
+import orjson
+import pytest
+
+from opencatwebjson import dump, dumps, loads
+from opencatwebjson.classes import ColorGradient, GradientStop, Rotation, TransparencyGradient
+from opencatwebjson.elements import Frame, Gradient
+from opencatwebjson.loader import decode_element
+from opencatwebjson.script import Action, Parameter
+
+from .helpers import SAMPLE, frame
+
+
+def test_compact_documents_round_trip_byte_for_byte():
+    assert dumps(loads(SAMPLE)) == SAMPLE
+
+
+def test_indent_matches_orjson():
+    assert dumps(loads(SAMPLE), indent=True) == orjson.dumps(orjson.loads(SAMPLE), option=orjson.OPT_INDENT_2)
+
+
+def test_single_objects_serialize():
+    assert dumps(Parameter("x", "string", "variable")) == b'{"value":"x","t":"string","l":"variable"}'
+    action = Action("0", ["Log", Parameter("hi", "string", "any")], "a")
+    assert orjson.loads(dumps(action)) == {"id": "0", "text": ["Log", {"value": "hi", "t": "string", "l": "any"}],
+                                           "globalid": "a"}
+
+
+def test_unset_optional_keys_are_not_written():
+    assert b"help" not in dumps(Action("0", [], "a"))
+    assert dumps(Parameter("x")) == b'{"value":"x"}'
+
+
+def test_dump_writes_to_file():
+    fp = io.BytesIO()
+    dump(loads(SAMPLE), fp)
+    assert fp.getvalue() == SAMPLE
+
+
+def test_value_classes_serialize_as_catweb_json():
+    assert orjson.loads(dumps(frame())) == {
+        "name": "f", "background_transparency": 0.5, "background_color": "#FFF",
+        "position": [[0, 10], [0.5, -4]], "size": [[1, 0], [0, 30]], "rotation": 45,
+        "anchor_point": [0.5, 0.5], "layer": 2, "tooltip": "tip", "clip_descendants": False, "visible": True,
+    }
+
+
+def test_elements_round_trip_through_decode_element():
+    original = frame()
+    decoded = decode_element(Frame, orjson.loads(dumps(original)))
+    assert decoded == original
+    assert dumps(decoded) == dumps(original)
+
+
+def test_gradients_round_trip():
+    original = Gradient("g", Rotation(90), (0, 1),
+                        TransparencyGradient([GradientStop(0, 0), GradientStop(1, 0.5)]),
+                        ColorGradient([GradientStop(0, "#000000"), GradientStop(1, "#FFFFFF")]))
+    raw = dumps(original)
+    assert dumps(decode_element(Gradient, orjson.loads(raw))) == raw
+
+
+def test_decode_element_leaves_input_unchanged():
+    raw = orjson.loads(dumps(frame()))
+    before = orjson.loads(dumps(frame()))
+    decode_element(Frame, raw)
+    assert raw == before
+
+
+def test_unknown_objects_raise_type_error():
+    with pytest.raises(TypeError):
+        dumps([object()])
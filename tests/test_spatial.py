@@ -0,0 +1,81 @@
+import pytest
+
+from opencatwebjson.layout import Layout
+from opencatwebjson.spatial import SpatialIndex
+
+from .helpers import box
+
+
+def scene():
+    elements = [
+        box(w=(1, 0), h=(1, 0), name="page"),
+        box(x=(0, 100), y=(0, 100), w=(0, 200), h=(0, 200), name="a", clip=True),
+        box(x=(0, 250), y=(0, 250), w=(0, 200), h=(0, 200), name="b", layer=2),
+        box(x=(0, 150), w=(0, 200), h=(0, 50), name="c"),
+        box(x=(0, 600), y=(0, 600), w=(0, 100), h=(0, 100), name="hidden", visible=False),
+        box(x=(0, 700), y=(0, 100), w=(0, 100), h=(0, 20), name="rotated", rotation=90),
+    ]
+    lay = Layout(elements, [-1, 0, 0, 1, 0, 0])
+    lay.resolve(1000, 1000)
+    return lay
+
+
+@pytest.mark.parametrize("cell_size, max_cells", [(128, 256), (10, 50)])
+def test_hits_are_topmost_first(cell_size, max_cells):
+    index = SpatialIndex(scene(), cell_size, max_cells)
+    assert len(index) == 5
+    # b has a higher layer than a; c is a's child.
+    assert index.hit(275, 275) == [2, 1, 0]
+    assert index.hit(275, 125) == [3, 1, 0]
+    assert index.top(275, 275) == 2
+    assert index.top(275, 275, lambda e: e.name == "a") == 1
+    assert index.top(-5, 10) == -1
+
+
+def test_clipping_and_visibility():
+    index = SpatialIndex(scene())
+    # c reaches past a, which clips its descendants.
+    assert index.hit(350, 125) == [0]
+    assert index.hit(650, 650) == [0]
+    assert not index.shown[4]
+
+
+def test_rotation_is_honored():
+    index = SpatialIndex(scene())
+    assert [index.bounds[k][5] for k in range(4)] == pytest.approx([740, 60, 760, 160])
+    assert index.contains(5, 750, 150)
+    assert not index.contains(5, 790, 110)
+
+
+def test_query_and_overlaps():
+    index = SpatialIndex(scene())
+    assert index.query(0, 0, 120, 120) == [0, 1]
+    assert index.query(240, 90, 260, 110) == [0, 1, 3]
+    assert list(index.overlaps()) == [(1, 2)]
+
+
+def test_update_after_relayout_and_visibility_changes():
+    lay = scene()
+    index = SpatialIndex(lay)
+    lay.elements[2] = box(x=(0, 600), y=(0, 250), w=(0, 200), h=(0, 200), name="b", layer=2)
+    lay.mark_dirty(2)
+    index.update(lay.relayout(1000, 1000))
+    assert index.hit(275, 275) == [1, 0]
+    assert index.hit(650, 300) == [2, 0]
+    lay.elements[1].visible = False
+    index.update([1])
+    assert index.hit(275, 125) == [0]
+    assert list(index.overlaps()) == []
+
+
+def test_layer_changes_reorder_siblings():
+    lay = scene()
+    index = SpatialIndex(lay)
+    lay.elements[1].layer = 3
+    index.update([1])
+    assert index.hit(275, 275) == [1, 2, 0]
+
+
+def test_unresolved_layouts_are_rejected():
+    with pytest.raises(ValueError):
+        SpatialIndex(Layout([box()], [-1]))
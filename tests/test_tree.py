@@ -0,0 +1,106 @@
+import pytest
+
+from opencatwebjson.runtime import Runtime
+from opencatwebjson.tree import ElementTree
+
+from .helpers import action, event, frame, param, script, var
+
+# page
+#   header
+#     title
+#     menu
+#       title
+#   body
+#     title
+NAMES = ["page", "header", "title", "menu", "title", "body", "title"]
+PARENTS = [-1, 0, 1, 1, 3, 0, 5]
+
+
+def build() -> ElementTree:
+    return ElementTree([frame(name) for name in NAMES], PARENTS)
+
+
+def test_depth_first_numbering():
+    tree = build()
+    assert list(tree.order) == [0, 1, 2, 3, 4, 5, 6]
+    assert list(tree.depth) == [0, 1, 2, 2, 3, 1, 2]
+    assert list(tree.descendants(1)) == [2, 3, 4]
+    assert tree.children[0] == [1, 5]
+
+
+def test_relations():
+    tree = build()
+    assert list(tree.ancestors(4)) == [3, 1, 0]
+    assert tree.is_ancestor(1, 4) and not tree.is_ancestor(5, 4) and not tree.is_ancestor(4, 4)
+    assert tree.is_descendant(6, 0) and not tree.is_descendant(0, 6)
+    assert tree.is_child(3, 1) and not tree.is_child(4, 1)
+    assert tree.parent(0) == -1 and tree.element(-1) is None
+
+
+def test_name_queries():
+    tree = build()
+    assert tree.find("title") == [2, 4, 6]
+    assert tree.find("missing") == []
+    assert tree.find_child(1, "title") == 2
+    assert tree.find_child(3, "title") == 4
+    assert tree.find_child(0, "title") == -1
+    assert tree.find_descendant(0, "title") == 2
+    assert tree.find_descendant(5, "title") == 6
+    assert tree.find_descendant(2, "title") == -1
+    assert tree.find_ancestor(4, "header") == 1
+    assert tree.find_ancestor(4, "body") == -1
+
+
+def test_find_child_scans_positions_when_a_name_is_rare():
+    tree = ElementTree([frame("root")] + [frame(f"c{i}") for i in range(20)] + [frame("x")],
+                       [-1] + [0] * 20 + [5])
+    assert tree.find_child(0, "c7") == 8
+    assert tree.find_child(0, "x") == -1
+    assert tree.find_child(5, "x") == 21
+
+
+def test_index_uses_identity():
+    tree = build()
+    assert tree.index(tree.elements[4]) == 4
+    assert tree.index(frame("title")) == -1
+
+
+def test_bad_trees_are_rejected():
+    with pytest.raises(ValueError):
+        ElementTree([frame()], [0])
+    with pytest.raises(ValueError):
+        ElementTree([frame()], [-1, -1])
+
+
+def test_runtime_hierarchy_actions():
+    tree = build()
+    actions = [
+        action(97, "Get parent of", param("menu"), "→", var("p")),
+        action(100, "Find descendant named", param("title"), "in", param("body"), "→", var("d")),
+        action(102, "Get descendants of", param("header"), "→", var("all")),
+        action(101, "Get children of", param("page"), "→", var("kids")),
+        action(104, "If", param("body"), "is child of", param("page")),
+        action(0, "Log", param("child")),
+        action(25, "end"),
+    ]
+    rt = Runtime([script(event(0, actions))], tree)
+    rt.start()
+    rt.run()
+    assert rt.globals["p"] is tree.elements[1]
+    assert rt.globals["d"] is tree.elements[6]
+    assert rt.globals["all"] == {"1": tree.elements[2], "2": tree.elements[3], "3": tree.elements[4]}
+    assert rt.globals["kids"] == {"1": tree.elements[1], "2": tree.elements[5]}
+    assert rt.log[0].message == "child"
+
+
+def test_hierarchy_actions_need_a_tree_and_operands():
+    rt = Runtime([script(event(0, [action(97, "Get parent of", param("menu"), "→", var("p")),
+                                   action(98), action(0, "Log", param("ok"))]))], build())
+    rt.start()
+    rt.run()
+    assert 98 in rt.skipped and rt.log[0].message == "ok"
+    rt = Runtime([script(event(0, [action(97, "Get parent of", param("menu"), "→", var("p"))]))],
+                 [frame("menu")])
+    rt.start()
+    rt.run()
+    assert 97 in rt.skipped
@@ -0,0 +1,114 @@
+import orjson
+import pytest
+
+from opencatwebjson import loads, validate
+from opencatwebjson.validator import Violation, format_path
+
+from .helpers import SAMPLE, action, event, function, param, script, tup
+
+
+def messages(data):
+    return [(v.path, v.message) for v in validate(data)]
+
+
+def test_sample_is_valid_as_bytes_dicts_and_objects():
+    assert validate(SAMPLE) == []
+    assert validate(orjson.loads(SAMPLE)) == []
+    assert validate(loads(SAMPLE)) == []
+
+
+def test_format_path():
+    assert format_path(()) == "$"
+    assert format_path((1, 2, 3), "id") == "$[1].content[2].actions[3].id"
+
+
+def test_root_must_be_an_array():
+    assert validate({}) == [Violation("$", "Root must be an array")]
+
+
+def test_invalid_json_raises():
+    with pytest.raises(ValueError):
+        validate(b"[")
+
+
+def test_missing_and_unknown_keys():
+    doc = [script(event(0, [{"id": "0", "text": [], "extra": 1}]))]
+    assert messages(doc) == [
+        ("$[0].content[0].actions[0]", "Missing required key 'globalid'"),
+        ("$[0].content[0].actions[0].extra", "Unknown key 'extra'"),
+    ]
+
+
+def test_optional_keys_are_tied_to_ids():
+    doc = [script(
+        event(0, [dict(action(0, "Log", globalid="a"), help="x"), dict(action(124, globalid="b"), help="x")],
+              overrides=["p"]),
+    )]
+    assert messages(doc) == [
+        ("$[0].content[0].variable_overrides",
+         "variable_overrides is only allowed on function definitions (ID: 6)"),
+        ("$[0].content[0].actions[0].help", "help key is only allowed on comment actions (ID: 124)"),
+    ]
+    assert validate([script(function("f", ["a"], []))]) == []
+
+
+def test_duplicate_globalids_point_at_the_first_use():
+    doc = [script(event(0, [action(0, globalid="x")], globalid="x"))]
+    assert messages(doc) == [
+        ("$[0].content[0].actions[0].globalid", "Duplicate globalid 'x' (first used at $[0].content[0])"),
+    ]
+
+
+def test_globalids_are_unique_across_scripts():
+    doc = [script(globalid="s"), script(globalid="s")]
+    assert messages(doc) == [("$[1].globalid", "Duplicate globalid 's' (first used at $[0])")]
+
+
+def test_unknown_ids():
+    doc = [script(event(999, [action(9999, globalid="a")]))]
+    assert messages(doc) == [
+        ("$[0].content[0].id", "Unknown event ID '999'"),
+        ("$[0].content[0].actions[0].id", "Unknown action ID '9999'"),
+    ]
+
+
+
+def test_ids_must_be_strings():
+    doc = [script(event(0, [action(0, globalid="a"), action(0, globalid="b")], globalid="e"))]
+    doc[0]["content"][0]["id"] = 6
+    doc[0]["content"][0]["actions"][0]["id"] = ["0"]
+    doc[0]["content"][0]["actions"][1]["id"] = None
+    assert messages(doc) == [
+        ("$[0].content[0].id", "id must be a string"),
+        ("$[0].content[0].actions[0].id", "id must be a string"),
+        ("$[0].content[0].actions[1].id", "id must be a string"),
+    ]
+
+
+def test_coordinates_must_be_numeric_strings():
+    doc = [script(event(0, [], x="1.5", y="abc"))]
+    doc[0]["content"][0]["width"] = 350
+    assert messages(doc) == [
+        ("$[0].content[0].y", "y must be a string-encoded number"),
+        ("$[0].content[0].width", "width must be a string-encoded number"),
+    ]
+
+
+def test_action_and_tuple_limits():
+    doc = [script(event(0, [action(0, tup(*range(7)), globalid=f"a{i}") for i in range(121)]))]
+    found = messages(doc)
+    assert found[0] == ("$[0].content[0].actions", "Event has 121 actions, maximum is 120")
+    assert found[1] == ("$[0].content[0].actions[0].text[0].value", "Tuple has 7 parameters, maximum is 6")
+    assert len(found) == 122
+
+
+def test_type_errors():
+    doc = [{"class": "other", "content": [1], "globalid": 5},
+           script(event(0, "x", param(1), 3, globalid="e"), globalid="t")]
+    assert messages(doc) == [
+        ("$[0].globalid", "globalid must be a string"),
+        ("$[0].class", "class must be 'script'"),
+        ("$[0].content[0]", "Event must be an object"),
+        ("$[1].content[0].text[1]", "text entries must be strings or parameter objects"),
+        ("$[1].content[0].actions", "actions must be an array"),
+    ]